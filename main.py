@@ -2,7 +2,7 @@
 # coding:utf-8
 """
 车牌检测与识别系统 - 主入口
-支持图片、视频、摄像头三种检测模式
+支持图片、视频、摄像头、多路视频流、目录批量等检测模式，以及本地推理服务、模型导出和性能基准
 """
 import sys
 import os
@@ -11,6 +11,10 @@ import argparse
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# 检测推理后端可选项
+BACKEND_CHOICES = ['torch', 'onnxruntime', 'openvino']
+REC_BACKEND_CHOICES = ['paddle', 'onnxruntime']
+
 
 def print_banner():
     """打印欢迎横幅"""
@@ -35,12 +39,29 @@ def main():
 使用示例:
   图片检测:    python main.py image -i test.jpg
   视频检测:    python main.py video -v test.mp4
+  4K切片检测:  python main.py video -v overview_4k.mp4 --tiled
+  粗检测+精修: python main.py camera -c rtsp://127.0.0.1:8554/live --coarse --refine
   摄像头检测:  python main.py camera
+  区域检测:    python main.py camera -c 0 --roi "0,0.45;1,0.45;1,1;0,1"
+  限定延迟:    python main.py camera -c rtsp://127.0.0.1:8554/live --target-latency-ms 80
+  网络流检测:  python main.py camera -c rtsp://127.0.0.1:8554/live
+  多路视频流:  python main.py multi -s rtsp://cam1/live -s rtsp://cam2/live --max-fps 10
+  目录批量:    python main.py batch -i data/test_images -o results.jsonl
+  推理服务:    python main.py serve -p 8000 --max-batch 8 --max-wait-ms 5
+  服务压测:    python main.py loadtest -c 1,4,16 -d 10
+  模型导出:    python main.py export -f onnx
+  性能基准:    python main.py bench -o outputs/benchmark.json
 
 更多帮助:
   python main.py image --help
   python main.py video --help
   python main.py camera --help
+  python main.py multi --help
+  python main.py batch --help
+  python main.py serve --help
+  python main.py loadtest --help
+  python main.py export --help
+  python main.py bench --help
         """
     )
 
@@ -52,6 +73,11 @@ def main():
     image_parser.add_argument('--output', '-o', type=str, help='输出图片路径')
     image_parser.add_argument('--no-display', action='store_true', help='不显示结果')
     image_parser.add_argument('--scale', type=float, default=0.5, help='显示缩放比例')
+    image_parser.add_argument('--backend', type=str, choices=BACKEND_CHOICES, help='检测推理后端')
+    image_parser.add_argument('--rec-backend', type=str, choices=REC_BACKEND_CHOICES, help='识别推理后端')
+    image_parser.add_argument('--tiled', action='store_true', help='大尺寸帧切片检测')
+    image_parser.add_argument('--coarse', action='store_true', help='缩小帧粗检测，原图裁剪识别')
+    image_parser.add_argument('--refine', action='store_true', help='粗检测后小尺寸精修')
 
     # 视频检测模式
     video_parser = subparsers.add_parser('video', help='视频检测模式')
@@ -60,12 +86,123 @@ def main():
     video_parser.add_argument('--no-display', action='store_true', help='不显示结果')
     video_parser.add_argument('--scale', type=float, default=0.5, help='显示缩放比例')
     video_parser.add_argument('--skip-frames', type=int, default=1, help='跳帧处理')
+    video_parser.add_argument('--backend', type=str, choices=BACKEND_CHOICES, help='检测推理后端')
+    video_parser.add_argument('--rec-backend', type=str, choices=REC_BACKEND_CHOICES, help='识别推理后端')
+    video_parser.add_argument('--rec-cache', action='store_true', help='开启识别结果缓存')
+    video_parser.add_argument('--tiled', action='store_true', help='大尺寸帧切片检测')
+    video_parser.add_argument('--coarse', action='store_true', help='缩小帧粗检测，原图裁剪识别')
+    video_parser.add_argument('--refine', action='store_true', help='粗检测后小尺寸精修')
+    video_parser.add_argument('--roi', type=str, help='感兴趣区域多边形 "x1,y1;x2,y2;..."')
+    video_parser.add_argument('--target-fps', type=float, help='自适应质量控制的目标帧率')
+    video_parser.add_argument('--target-latency-ms', type=float, help='自适应质量控制的目标端到端延迟（毫秒）')
+    video_parser.add_argument('--adapt-log', type=str, help='自适应调整决策的JSONL日志路径')
+    video_parser.add_argument('--no-track', action='store_true', help='关闭车牌跟踪')
+    video_parser.add_argument('--motion-gate', action='store_true', help='开启运动门控')
+    video_parser.add_argument('--writer', type=str, choices=['opencv', 'ffmpeg'], help='输出视频编码后端')
+    video_parser.add_argument('--preset', type=str, help='ffmpeg后端的x264预设')
+    video_parser.add_argument('--crf', type=int, help='ffmpeg后端的x264质量参数')
+    video_parser.add_argument('--writer-drop', action='store_true', help='编码跟不上时丢帧')
+    video_parser.add_argument('--workers', '-w', type=int, help='离线并行模式的工作进程数')
+    video_parser.add_argument('--threads', type=int, help='并行模式下每个工作进程的计算线程数')
+    video_parser.add_argument('--timeline', type=str, help='并行模式的JSONL时间线输出路径')
+    video_parser.add_argument('--metrics-port', type=int, help='本机指标HTTP端点端口')
+    video_parser.add_argument('--metrics-file', type=str, help='Prometheus指标文本文件路径')
+    video_parser.add_argument('--metrics-json', type=str, help='结束时写入指标JSON汇总的路径')
 
     # 摄像头检测模式
     camera_parser = subparsers.add_parser('camera', help='摄像头检测模式')
-    camera_parser.add_argument('--camera', '-c', type=int, help='摄像头ID')
+    camera_parser.add_argument('--camera', '-c', type=str, help='摄像头ID、视频文件或网络流地址')
+    camera_parser.add_argument('--every-frame', action='store_true', help='处理每一帧（默认只处理最新帧）')
     camera_parser.add_argument('--output', '-o', type=str, help='输出视频路径')
     camera_parser.add_argument('--show-fps', action='store_true', help='显示FPS')
+    camera_parser.add_argument('--backend', type=str, choices=BACKEND_CHOICES, help='检测推理后端')
+    camera_parser.add_argument('--rec-backend', type=str, choices=REC_BACKEND_CHOICES, help='识别推理后端')
+    camera_parser.add_argument('--rec-cache', action='store_true', help='开启识别结果缓存')
+    camera_parser.add_argument('--tiled', action='store_true', help='大尺寸帧切片检测')
+    camera_parser.add_argument('--coarse', action='store_true', help='缩小帧粗检测，原图裁剪识别')
+    camera_parser.add_argument('--refine', action='store_true', help='粗检测后小尺寸精修')
+    camera_parser.add_argument('--roi', type=str, help='感兴趣区域多边形 "x1,y1;x2,y2;..."')
+    camera_parser.add_argument('--target-fps', type=float, help='自适应质量控制的目标帧率')
+    camera_parser.add_argument('--target-latency-ms', type=float, help='自适应质量控制的目标端到端延迟（毫秒）')
+    camera_parser.add_argument('--adapt-log', type=str, help='自适应调整决策的JSONL日志路径')
+    camera_parser.add_argument('--no-track', action='store_true', help='关闭车牌跟踪')
+    camera_parser.add_argument('--no-motion-gate', action='store_true', help='关闭运动门控')
+    camera_parser.add_argument('--writer', type=str, choices=['opencv', 'ffmpeg'], help='输出视频编码后端')
+    camera_parser.add_argument('--preset', type=str, help='ffmpeg后端的x264预设')
+    camera_parser.add_argument('--crf', type=int, help='ffmpeg后端的x264质量参数')
+    camera_parser.add_argument('--writer-drop', action='store_true', help='编码跟不上时丢帧')
+    camera_parser.add_argument('--metrics-port', type=int, help='本机指标HTTP端点端口')
+    camera_parser.add_argument('--metrics-file', type=str, help='Prometheus指标文本文件路径')
+    camera_parser.add_argument('--metrics-json', type=str, help='结束时写入指标JSON汇总的路径')
+
+    # 多路视频流模式
+    multi_parser = subparsers.add_parser('multi', help='多路视频流检测模式')
+    multi_parser.add_argument('--source', '-s', type=str, action='append', help='视频源，可重复指定多路')
+    multi_parser.add_argument('--config', type=str, help='视频流配置JSON文件')
+    multi_parser.add_argument('--output-dir', '-o', type=str, help='结果输出目录')
+    multi_parser.add_argument('--max-fps', type=float, help='每路默认的处理帧率上限')
+    multi_parser.add_argument('--save-video', action='store_true', help='每路同时录制带标注的视频')
+    multi_parser.add_argument('--batch-size', type=int, help='每轮最多合并检测的帧数')
+    multi_parser.add_argument('--duration', type=float, help='运行时长（秒）')
+    multi_parser.add_argument('--backend', type=str, choices=BACKEND_CHOICES, help='检测推理后端')
+    multi_parser.add_argument('--rec-backend', type=str, choices=REC_BACKEND_CHOICES, help='识别推理后端')
+    multi_parser.add_argument('--rec-cache', action='store_true', help='开启识别结果缓存')
+    multi_parser.add_argument('--tiled', action='store_true', help='大尺寸帧切片检测')
+    multi_parser.add_argument('--coarse', action='store_true', help='缩小帧粗检测，原图裁剪识别')
+    multi_parser.add_argument('--refine', action='store_true', help='粗检测后小尺寸精修')
+    multi_parser.add_argument('--no-track', action='store_true', help='关闭车牌跟踪')
+    multi_parser.add_argument('--motion-gate', action='store_true', help='开启运动门控')
+    multi_parser.add_argument('--metrics-port', type=int, help='本机指标HTTP端点端口')
+
+    # 目录批量检测模式
+    batch_parser = subparsers.add_parser('batch', help='目录批量检测模式')
+    batch_parser.add_argument('--input', '-i', type=str, required=True, help='输入目录或通配符')
+    batch_parser.add_argument('--output', '-o', type=str, help='输出文件路径（.jsonl 或 .csv）')
+    batch_parser.add_argument('--workers', '-w', type=int, help='工作进程数')
+    batch_parser.add_argument('--shard-size', type=int, help='每个分片的图片数')
+    batch_parser.add_argument('--threads', type=int, help='每个工作进程的计算线程数')
+    batch_parser.add_argument('--no-resume', action='store_true', help='忽略已有输出，从头开始')
+    batch_parser.add_argument('--backend', type=str, choices=BACKEND_CHOICES, help='检测推理后端')
+    batch_parser.add_argument('--rec-backend', type=str, choices=REC_BACKEND_CHOICES, help='识别推理后端')
+
+    # 本地推理服务
+    serve_parser = subparsers.add_parser('serve', help='本地推理服务')
+    serve_parser.add_argument('--host', type=str, help='监听地址')
+    serve_parser.add_argument('--port', '-p', type=int, help='监听端口')
+    serve_parser.add_argument('--max-batch', type=int, help='单个微批次的最大图像数')
+    serve_parser.add_argument('--max-wait-ms', type=float, help='凑批的最大等待时间（毫秒）')
+    serve_parser.add_argument('--backend', type=str, choices=BACKEND_CHOICES, help='检测推理后端')
+    serve_parser.add_argument('--rec-backend', type=str, choices=REC_BACKEND_CHOICES, help='识别推理后端')
+
+    # 推理服务压测
+    loadtest_parser = subparsers.add_parser('loadtest', help='推理服务压测')
+    loadtest_parser.add_argument('--url', type=str, help='服务地址')
+    loadtest_parser.add_argument('--input', '-i', type=str, help='请求使用的图片路径、目录或通配符')
+    loadtest_parser.add_argument('--concurrency', '-c', type=str, help='逗号分隔的并发数列表')
+    loadtest_parser.add_argument('--duration', '-d', type=float, help='每一级的压测时长（秒）')
+    loadtest_parser.add_argument('--timeout', type=float, help='单个请求的超时时间（秒）')
+    loadtest_parser.add_argument('--output', '-o', type=str, help='JSON报告路径')
+
+    # 模型导出模式
+    export_parser = subparsers.add_parser('export', help='模型导出模式')
+    export_parser.add_argument('--weights', '-w', type=str, help='YOLO权重路径')
+    export_parser.add_argument('--format', '-f', type=str, default='all',
+                               choices=['onnx', 'openvino', 'all'], help='导出格式')
+    export_parser.add_argument('--imgsz', type=int, help='模型输入边长')
+    export_parser.add_argument('--verify', action='store_true', help='与torch后端做一致性校验')
+    export_parser.add_argument('--rec', action='store_true', help='同时将PP-OCRv4识别模型转换为ONNX')
+
+    # 性能基准
+    bench_parser = subparsers.add_parser('bench', help='性能基准')
+    bench_parser.add_argument('--input', '-i', type=str, help='CCPD格式命名的测试图片目录')
+    bench_parser.add_argument('--output', '-o', type=str, help='JSON报告路径')
+    bench_parser.add_argument('--warmup', type=int, help='预热轮数')
+    bench_parser.add_argument('--iterations', '-n', type=int, help='计时轮数')
+    bench_parser.add_argument('--iou', type=float, help='IoU匹配阈值')
+    bench_parser.add_argument('--stages', type=str, help='要测试的部分（detector,recognizer,pipeline）')
+    bench_parser.add_argument('--backend', type=str, choices=BACKEND_CHOICES, help='检测推理后端')
+    bench_parser.add_argument('--rec-backend', type=str, choices=REC_BACKEND_CHOICES, help='识别推理后端')
+    bench_parser.add_argument('--rec-cache', action='store_true', help='启用识别结果缓存')
 
     args = parser.parse_args()
 
@@ -87,6 +224,16 @@ def main():
         if args.no_display:
             sys.argv.append('--no-display')
         sys.argv.extend(['--scale', str(args.scale)])
+        if args.backend:
+            sys.argv.extend(['--backend', args.backend])
+        if args.rec_backend:
+            sys.argv.extend(['--rec-backend', args.rec_backend])
+        if args.tiled:
+            sys.argv.append('--tiled')
+        if args.coarse:
+            sys.argv.append('--coarse')
+        if args.refine:
+            sys.argv.append('--refine')
         detect_image.main()
 
     elif args.mode == 'video':
@@ -100,19 +247,229 @@ def main():
             sys.argv.append('--no-display')
         sys.argv.extend(['--scale', str(args.scale)])
         sys.argv.extend(['--skip-frames', str(args.skip_frames)])
+        if args.no_track:
+            sys.argv.append('--no-track')
+        if args.motion_gate:
+            sys.argv.append('--motion-gate')
+        if args.workers:
+            sys.argv.extend(['--workers', str(args.workers)])
+        if args.threads:
+            sys.argv.extend(['--threads', str(args.threads)])
+        if args.timeline:
+            sys.argv.extend(['--timeline', args.timeline])
+        if args.backend:
+            sys.argv.extend(['--backend', args.backend])
+        if args.rec_backend:
+            sys.argv.extend(['--rec-backend', args.rec_backend])
+        if args.rec_cache:
+            sys.argv.append('--rec-cache')
+        if args.tiled:
+            sys.argv.append('--tiled')
+        if args.coarse:
+            sys.argv.append('--coarse')
+        if args.refine:
+            sys.argv.append('--refine')
+        if args.roi:
+            sys.argv.extend(['--roi', args.roi])
+        if args.target_fps:
+            sys.argv.extend(['--target-fps', str(args.target_fps)])
+        if args.target_latency_ms:
+            sys.argv.extend(['--target-latency-ms', str(args.target_latency_ms)])
+        if args.adapt_log:
+            sys.argv.extend(['--adapt-log', args.adapt_log])
+        if args.metrics_port:
+            sys.argv.extend(['--metrics-port', str(args.metrics_port)])
+        if args.metrics_file:
+            sys.argv.extend(['--metrics-file', args.metrics_file])
+        if args.metrics_json:
+            sys.argv.extend(['--metrics-json', args.metrics_json])
+        if args.writer:
+            sys.argv.extend(['--writer', args.writer])
+        if args.preset:
+            sys.argv.extend(['--preset', args.preset])
+        if args.crf is not None:
+            sys.argv.extend(['--crf', str(args.crf)])
+        if args.writer_drop:
+            sys.argv.append('--writer-drop')
         detect_video.main()
 
     elif args.mode == 'camera':
         from scripts import detect_camera
         sys.argv = ['detect_camera.py']
         if args.camera is not None:
-            sys.argv.extend(['--camera', str(args.camera)])
+            sys.argv.extend(['--camera', args.camera])
+        if args.every_frame:
+            sys.argv.append('--every-frame')
         if args.output:
             sys.argv.extend(['--output', args.output])
         if args.show_fps:
             sys.argv.append('--show-fps')
+        if args.no_track:
+            sys.argv.append('--no-track')
+        if args.no_motion_gate:
+            sys.argv.append('--no-motion-gate')
+        if args.backend:
+            sys.argv.extend(['--backend', args.backend])
+        if args.rec_backend:
+            sys.argv.extend(['--rec-backend', args.rec_backend])
+        if args.rec_cache:
+            sys.argv.append('--rec-cache')
+        if args.tiled:
+            sys.argv.append('--tiled')
+        if args.coarse:
+            sys.argv.append('--coarse')
+        if args.refine:
+            sys.argv.append('--refine')
+        if args.roi:
+            sys.argv.extend(['--roi', args.roi])
+        if args.target_fps:
+            sys.argv.extend(['--target-fps', str(args.target_fps)])
+        if args.target_latency_ms:
+            sys.argv.extend(['--target-latency-ms', str(args.target_latency_ms)])
+        if args.adapt_log:
+            sys.argv.extend(['--adapt-log', args.adapt_log])
+        if args.metrics_port:
+            sys.argv.extend(['--metrics-port', str(args.metrics_port)])
+        if args.metrics_file:
+            sys.argv.extend(['--metrics-file', args.metrics_file])
+        if args.metrics_json:
+            sys.argv.extend(['--metrics-json', args.metrics_json])
+        if args.writer:
+            sys.argv.extend(['--writer', args.writer])
+        if args.preset:
+            sys.argv.extend(['--preset', args.preset])
+        if args.crf is not None:
+            sys.argv.extend(['--crf', str(args.crf)])
+        if args.writer_drop:
+            sys.argv.append('--writer-drop')
         detect_camera.main()
 
+    elif args.mode == 'multi':
+        from scripts import detect_multi
+        sys.argv = ['detect_multi.py']
+        for source in args.source or []:
+            sys.argv.extend(['--source', source])
+        if args.config:
+            sys.argv.extend(['--config', args.config])
+        if args.output_dir:
+            sys.argv.extend(['--output-dir', args.output_dir])
+        if args.max_fps:
+            sys.argv.extend(['--max-fps', str(args.max_fps)])
+        if args.save_video:
+            sys.argv.append('--save-video')
+        if args.batch_size:
+            sys.argv.extend(['--batch-size', str(args.batch_size)])
+        if args.duration:
+            sys.argv.extend(['--duration', str(args.duration)])
+        if args.backend:
+            sys.argv.extend(['--backend', args.backend])
+        if args.rec_backend:
+            sys.argv.extend(['--rec-backend', args.rec_backend])
+        if args.rec_cache:
+            sys.argv.append('--rec-cache')
+        if args.tiled:
+            sys.argv.append('--tiled')
+        if args.coarse:
+            sys.argv.append('--coarse')
+        if args.refine:
+            sys.argv.append('--refine')
+        if args.no_track:
+            sys.argv.append('--no-track')
+        if args.motion_gate:
+            sys.argv.append('--motion-gate')
+        if args.metrics_port:
+            sys.argv.extend(['--metrics-port', str(args.metrics_port)])
+        detect_multi.main()
+
+    elif args.mode == 'batch':
+        from scripts import detect_batch
+        sys.argv = ['detect_batch.py', '--input', args.input]
+        if args.output:
+            sys.argv.extend(['--output', args.output])
+        if args.workers:
+            sys.argv.extend(['--workers', str(args.workers)])
+        if args.shard_size:
+            sys.argv.extend(['--shard-size', str(args.shard_size)])
+        if args.threads:
+            sys.argv.extend(['--threads', str(args.threads)])
+        if args.no_resume:
+            sys.argv.append('--no-resume')
+        if args.backend:
+            sys.argv.extend(['--backend', args.backend])
+        if args.rec_backend:
+            sys.argv.extend(['--rec-backend', args.rec_backend])
+        detect_batch.main()
+
+    elif args.mode == 'serve':
+        from scripts import serve
+        sys.argv = ['serve.py']
+        if args.host:
+            sys.argv.extend(['--host', args.host])
+        if args.port is not None:
+            sys.argv.extend(['--port', str(args.port)])
+        if args.max_batch:
+            sys.argv.extend(['--max-batch', str(args.max_batch)])
+        if args.max_wait_ms is not None:
+            sys.argv.extend(['--max-wait-ms', str(args.max_wait_ms)])
+        if args.backend:
+            sys.argv.extend(['--backend', args.backend])
+        if args.rec_backend:
+            sys.argv.extend(['--rec-backend', args.rec_backend])
+        serve.main()
+
+    elif args.mode == 'loadtest':
+        from scripts import load_test
+        sys.argv = ['load_test.py']
+        if args.url:
+            sys.argv.extend(['--url', args.url])
+        if args.input:
+            sys.argv.extend(['--input', args.input])
+        if args.concurrency:
+            sys.argv.extend(['--concurrency', args.concurrency])
+        if args.duration:
+            sys.argv.extend(['--duration', str(args.duration)])
+        if args.timeout:
+            sys.argv.extend(['--timeout', str(args.timeout)])
+        if args.output:
+            sys.argv.extend(['--output', args.output])
+        load_test.main()
+
+    elif args.mode == 'export':
+        from scripts import export_model
+        sys.argv = ['export_model.py', '--format', args.format]
+        if args.weights:
+            sys.argv.extend(['--weights', args.weights])
+        if args.imgsz:
+            sys.argv.extend(['--imgsz', str(args.imgsz)])
+        if args.verify:
+            sys.argv.append('--verify')
+        if args.rec:
+            sys.argv.append('--rec')
+        export_model.main()
+
+    elif args.mode == 'bench':
+        from scripts import benchmark
+        sys.argv = ['benchmark.py']
+        if args.input:
+            sys.argv.extend(['--input', args.input])
+        if args.output:
+            sys.argv.extend(['--output', args.output])
+        if args.warmup is not None:
+            sys.argv.extend(['--warmup', str(args.warmup)])
+        if args.iterations:
+            sys.argv.extend(['--iterations', str(args.iterations)])
+        if args.iou:
+            sys.argv.extend(['--iou', str(args.iou)])
+        if args.stages:
+            sys.argv.extend(['--stages', args.stages])
+        if args.backend:
+            sys.argv.extend(['--backend', args.backend])
+        if args.rec_backend:
+            sys.argv.extend(['--rec-backend', args.rec_backend])
+        if args.rec_cache:
+            sys.argv.append('--rec-cache')
+        benchmark.main()
+
 
 if __name__ == "__main__":
     main()
@@ -5,5 +5,12 @@
 from . import detect_image
 from . import detect_video
 from . import detect_camera
+from . import detect_multi
+from . import detect_batch
+from . import export_model
+from . import benchmark
+from . import serve
+from . import load_test
 
-__all__ = ['detect_image', 'detect_video', 'detect_camera']
+__all__ = ['detect_image', 'detect_video', 'detect_camera', 'detect_multi', 'detect_batch', 'export_model',
+           'benchmark', 'serve', 'load_test']
@@ -0,0 +1,312 @@
+# coding:utf-8
+"""
+性能基准脚本
+从CCPD格式的文件名中解析真值（车牌框和车牌号），分别对检测器、识别器和完整流程做预热和多轮重复测试，
+输出吞吐量、延迟分位数、峰值内存、检测IoU召回率和整牌准确率的JSON报告，便于比较不同版本
+"""
+import sys
+import os
+import argparse
+import glob
+import json
+import platform
+import time
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import settings
+from src.core.tracker import iou_matrix
+from src.utils.metrics import MetricsRegistry
+from src.utils.preprocess import load_image
+
+# CCPD车牌字符索引表
+PROVINCES = ['皖', '沪', '津', '渝', '冀', '晋', '蒙', '辽', '吉', '黑', '苏', '浙', '京', '闽', '赣', '鲁', '豫',
+             '鄂', '湘', '粤', '桂', '琼', '川', '贵', '云', '藏', '陕', '甘', '青', '宁', '新', '警', '学', 'O']
+ALPHABETS = ['A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'J', 'K', 'L', 'M', 'N', 'P', 'Q', 'R', 'S', 'T', 'U',
+             'V', 'W', 'X', 'Y', 'Z', 'O']
+ADS = ALPHABETS[:-1] + ['0', '1', '2', '3', '4', '5', '6', '7', '8', '9', 'O']
+
+
+def print_header():
+    """打印程序头部信息"""
+    print("=" * 60)
+    print("           车牌检测与识别系统 - 性能基准")
+    print("=" * 60)
+    print()
+
+
+def parse_ccpd_name(path):
+    """
+    解析CCPD文件名中的真值
+    文件名格式: 面积-倾斜角-左上&右下-四个顶点-车牌字符索引-亮度-模糊度.jpg
+    :param path: 图片路径
+    :return: {'box': [x1, y1, x2, y2], 'plate': 车牌号}，不是CCPD格式时返回None
+    """
+    fields = os.path.splitext(os.path.basename(path))[0].split('-')
+    if len(fields) != 7:
+        return None
+    try:
+        (x1, y1), (x2, y2) = [map(int, p.split('&')) for p in fields[2].split('_')]
+        indices = [int(i) for i in fields[4].split('_')]
+        plate = PROVINCES[indices[0]] + ALPHABETS[indices[1]] + ''.join(ADS[i] for i in indices[2:])
+    except (ValueError, IndexError):
+        return None
+    return {'box': [x1, y1, x2, y2], 'plate': plate}
+
+
+def load_samples(source):
+    """
+    加载带真值的测试图片（解码在计时之外完成）
+    :param source: 图片目录
+    :return: [(路径, BGR图像, 真值), ...]
+    """
+    samples = []
+    for path in sorted(glob.glob(os.path.join(source, '*.jpg'))):
+        truth = parse_ccpd_name(path)
+        if truth is None:
+            continue
+        image = load_image(path)
+        if image is not None:
+            samples.append((path, image, truth))
+    return samples
+
+
+def peak_rss_mb():
+    """
+    当前进程的峰值常驻内存（MB），平台不支持时返回None
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节，Linux 为KB
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def latency_summary(seconds):
+    """
+    延迟统计
+    :param seconds: 每次调用的耗时列表（秒）
+    :return: {'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms'}
+    """
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'mean_ms': float(ms.mean()), 'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)}
+
+
+def best_match(pred_boxes, truth_box):
+    """
+    找到与真值框IoU最大的预测框
+    :return: (下标, IoU)，没有预测框时为 (None, 0.0)
+    """
+    if len(pred_boxes) == 0:
+        return None, 0.0
+    ious = iou_matrix(np.asarray(pred_boxes)[:, :4], [truth_box])[:, 0]
+    i = int(ious.argmax())
+    return i, float(ious[i])
+
+
+def run_timed(fn, items, warmup, iterations):
+    """
+    预热后对每个输入重复调用并计时
+    :param fn: 被测函数
+    :param items: 输入列表
+    :param warmup: 预热轮数
+    :param iterations: 计时轮数
+    :return: (每次调用耗时列表, 总耗时, 最后一轮的输出列表)
+    """
+    for _ in range(warmup):
+        for item in items:
+            fn(item)
+
+    latencies = []
+    outputs = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        outputs = []
+        for item in items:
+            t0 = time.perf_counter()
+            outputs.append(fn(item))
+            latencies.append(time.perf_counter() - t0)
+    return latencies, time.perf_counter() - start, outputs
+
+
+def bench_detector(detector, samples, warmup, iterations, iou_threshold):
+    """检测器基准：单张与批量吞吐、延迟和IoU召回率"""
+    images = [image for _, image, _ in samples]
+    latencies, total, outputs = run_timed(detector.detect, images, warmup, iterations)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        detector.detect_batch(images)
+    batch_total = time.perf_counter() - start
+
+    hits = sum(best_match(dets, truth['box'])[1] >= iou_threshold
+               for dets, (_, _, truth) in zip(outputs, samples))
+    return {
+        'images_per_sec': len(latencies) / total,
+        'batch_images_per_sec': len(images) * iterations / batch_total,
+        'batch_size': detector.batch_size,
+        'latency': latency_summary(latencies),
+        'iou_recall': hits / len(samples),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def bench_recognizer(recognizer, samples, warmup, iterations):
+    """识别器基准：在真值框裁剪图上测吞吐、延迟和整牌准确率"""
+    crops = []
+    for _, image, truth in samples:
+        x1, y1, x2, y2 = truth['box']
+        crops.append(image[y1:y2, x1:x2])
+    latencies, total, outputs = run_timed(lambda crop: recognizer.recognize_batch([crop])[0],
+                                          crops, warmup, iterations)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        recognizer.recognize_batch(crops)
+    batch_total = time.perf_counter() - start
+
+    correct = sum(text == truth['plate'] for (text, _), (_, _, truth) in zip(outputs, samples))
+    return {
+        'crops_per_sec': len(latencies) / total,
+        'batch_crops_per_sec': len(crops) * iterations / batch_total,
+        'latency': latency_summary(latencies),
+        'plate_accuracy': correct / len(samples),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def bench_pipeline(pipeline, samples, warmup, iterations, iou_threshold):
+    """完整流程基准：端到端吞吐、延迟、各阶段分位数、召回率和整牌准确率"""
+    images = [image for _, image, _ in samples]
+    for _ in range(warmup):
+        for image in images:
+            pipeline.process_image(image)
+    # 预热的耗时不计入各阶段统计
+    pipeline.metrics = MetricsRegistry()
+    latencies, total, outputs = run_timed(pipeline.process_image, images, 0, iterations)
+
+    hits = correct = 0
+    for (boxes, license_list, _), (_, _, truth) in zip(outputs, samples):
+        i, iou = best_match(boxes, truth['box'])
+        if iou >= iou_threshold:
+            hits += 1
+            correct += license_list[i] == truth['plate']
+    return {
+        'images_per_sec': len(latencies) / total,
+        'latency': latency_summary(latencies),
+        'stages': pipeline.metrics.summary()['stages'],
+        'iou_recall': hits / len(samples),
+        'plate_accuracy': correct / len(samples),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main():
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='车牌检测与识别 - 性能基准')
+    parser.add_argument('--input', '-i', type=str, default=os.path.join(settings.ROOT_DIR, 'data', 'test_images'),
+                       help='CCPD格式命名的测试图片目录（默认data/test_images）')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                       help='JSON报告路径（默认outputs/benchmark.json）')
+    parser.add_argument('--warmup', type=int, default=3,
+                       help='预热轮数（默认3）')
+    parser.add_argument('--iterations', '-n', type=int, default=5,
+                       help='计时轮数（默认5）')
+    parser.add_argument('--iou', type=float, default=0.5,
+                       help='检测框与真值框匹配的IoU阈值（默认0.5）')
+    parser.add_argument('--stages', type=str, default='detector,recognizer,pipeline',
+                       help='要测试的部分，逗号分隔（detector / recognizer / pipeline）')
+    parser.add_argument('--backend', type=str, default=None,
+                       choices=['torch', 'onnxruntime', 'openvino'],
+                       help='检测推理后端（默认使用配置中的DETECT_BACKEND）')
+    parser.add_argument('--rec-backend', type=str, default=None,
+                       choices=['paddle', 'onnxruntime'],
+                       help='识别推理后端（默认使用配置中的REC_BACKEND）')
+    parser.add_argument('--rec-cache', action='store_true',
+                       help='启用识别结果缓存（默认关闭，否则重复轮次全部命中缓存）')
+
+    args = parser.parse_args()
+
+    print_header()
+
+    stages = [s.strip() for s in args.stages.split(',') if s.strip()]
+    output_path = args.output or os.path.join(settings.OUTPUT_DIR, 'benchmark.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    samples = load_samples(args.input)
+    if not samples:
+        print(f"✗ 错误: 没有找到CCPD格式命名的测试图片: {args.input}")
+        return
+    print(f"测试图片: {len(samples)} 张 | 预热: {args.warmup} 轮 | 计时: {args.iterations} 轮")
+    print("正在加载模型...")
+
+    from src.core.pipeline import PlatePipeline
+    from src.core.detector import PlateDetector
+    from src.core.recognizer import create_recognizer
+
+    detector = PlateDetector(backend=args.backend)
+    recognizer = create_recognizer(args.rec_backend, cache_size=settings.REC_CACHE_OPT_IN_SIZE if args.rec_cache else 0)
+    print("✓ 模型加载成功\n")
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'detect_backend': args.backend or settings.DETECT_BACKEND,
+            'rec_backend': args.rec_backend or settings.REC_BACKEND,
+            'rec_cache': args.rec_cache,
+            'imgsz': detector.backend.imgsz,
+            'images': len(samples),
+            'warmup': args.warmup,
+            'iterations': args.iterations,
+            'iou_threshold': args.iou,
+        },
+    }
+
+    if 'detector' in stages:
+        print("测试检测器...")
+        report['detector'] = bench_detector(detector, samples, args.warmup, args.iterations, args.iou)
+    if 'recognizer' in stages:
+        print("测试识别器...")
+        report['recognizer'] = bench_recognizer(recognizer, samples, args.warmup, args.iterations)
+    if 'pipeline' in stages:
+        print("测试完整流程...")
+        pipeline = PlatePipeline(detector=detector, recognizer=recognizer)
+        report['pipeline'] = bench_pipeline(pipeline, samples, args.warmup, args.iterations, args.iou)
+    report['peak_rss_mb'] = peak_rss_mb()
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    # 打印摘要
+    print(f"\n{'='*60}")
+    print("基准测试完成!")
+    print(f"{'='*60}")
+    if 'detector' in report:
+        d = report['detector']
+        print(f"  检测器: {d['images_per_sec']:.2f} 张/秒 (批量 {d['batch_images_per_sec']:.2f}) | "
+              f"p50 {d['latency']['p50_ms']:.1f}ms | p95 {d['latency']['p95_ms']:.1f}ms | 召回率 {d['iou_recall']:.1%}")
+    if 'recognizer' in report:
+        r = report['recognizer']
+        print(f"  识别器: {r['crops_per_sec']:.2f} 张/秒 (批量 {r['batch_crops_per_sec']:.2f}) | "
+              f"p50 {r['latency']['p50_ms']:.1f}ms | p95 {r['latency']['p95_ms']:.1f}ms | 准确率 {r['plate_accuracy']:.1%}")
+    if 'pipeline' in report:
+        p = report['pipeline']
+        print(f"  完整流程: {p['images_per_sec']:.2f} 张/秒 | p50 {p['latency']['p50_ms']:.1f}ms | "
+              f"p95 {p['latency']['p95_ms']:.1f}ms | 召回率 {p['iou_recall']:.1%} | 准确率 {p['plate_accuracy']:.1%}")
+    if report['peak_rss_mb'] is not None:
+        print(f"  峰值内存: {report['peak_rss_mb']:.1f} MB")
+    print(f"  报告已保存到: {output_path}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
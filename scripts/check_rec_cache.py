@@ -0,0 +1,157 @@
+# coding:utf-8
+"""
+识别缓存指纹检查脚本
+从CCPD格式测试图片中按真值框裁出车牌，对每个裁剪加高斯噪声、JPEG压缩并把框平移±1像素，
+统计扰动后的裁剪命中同一车牌缓存条目的比例；再把车牌的一个字符区域换成另一块车牌的对应区域，
+构造只差一个字符的车牌对，检查它们和不同车牌都不会误命中（误命中会返回另一块车牌的文本）
+"""
+import sys
+import os
+import argparse
+
+import cv2
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import settings
+from src.core.rec_cache import FingerprintCache, crop_fingerprint, hamming_distances
+from scripts.benchmark import load_samples
+
+# 框的平移 (dx1, dy1, dx2, dy2)
+JITTERS = [(0, 0, 0, 0), (1, 0, 1, 0), (-1, 0, -1, 0), (0, 1, 0, 1), (0, -1, 0, -1),
+           (1, 1, -1, -1), (-1, -1, 1, 1)]
+
+
+def print_header():
+    """打印程序头部信息"""
+    print("=" * 60)
+    print("           车牌检测与识别系统 - 识别缓存指纹检查")
+    print("=" * 60)
+    print()
+
+
+def perturb(image, box, rng, sigmas, quality):
+    """
+    生成一个车牌的扰动裁剪：框平移、高斯噪声、JPEG压缩往返
+    :param image: 原图
+    :param box: 真值框 [x1, y1, x2, y2]
+    :param rng: 随机数生成器
+    :param sigmas: 噪声标准差列表
+    :param quality: JPEG质量
+    :return: 裁剪列表
+    """
+    x1, y1, x2, y2 = box
+    crops = []
+    for dx1, dy1, dx2, dy2 in JITTERS:
+        crop = image[y1 + dy1:y2 + dy2, x1 + dx1:x2 + dx2].astype(np.float32)
+        for sigma in sigmas:
+            noisy = np.clip(crop + rng.normal(0, sigma, crop.shape), 0, 255).astype(np.uint8)
+            encoded = cv2.imencode('.jpg', noisy, [cv2.IMWRITE_JPEG_QUALITY, quality])[1]
+            crops.append(cv2.imdecode(encoded, cv2.IMREAD_COLOR))
+    return crops
+
+
+def swap_character(crop, other, slot, slots):
+    """
+    把车牌的一个字符区域换成另一块车牌的对应区域（按字符数等分车牌宽度近似字符位置）
+    :param crop: 车牌裁剪
+    :param other: 另一块车牌的裁剪
+    :param slot: 字符序号
+    :param slots: 字符数
+    :return: 只差一个字符的车牌裁剪
+    """
+    h, w = crop.shape[:2]
+    x1, x2 = w * slot // slots, w * (slot + 1) // slots
+    swapped = crop.copy()
+    swapped[:, x1:x2] = cv2.resize(other, (w, h), interpolation=cv2.INTER_AREA)[:, x1:x2]
+    return swapped
+
+
+def main():
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='车牌检测与识别 - 识别缓存指纹检查')
+    parser.add_argument('--input', '-i', type=str, default=settings.TEST_IMAGES_DIR,
+                       help='CCPD格式命名的测试图片目录（默认data/test_images）')
+    parser.add_argument('--sigmas', type=str, default='1,2,3',
+                       help='高斯噪声标准差，逗号分隔（默认1,2,3）')
+    parser.add_argument('--quality', type=int, default=90,
+                       help='JPEG压缩质量（默认90）')
+    parser.add_argument('--max-distance', type=int, default=None,
+                       help='视为同一车牌的最大汉明距离（默认使用配置中的REC_CACHE_MAX_DISTANCE）')
+    parser.add_argument('--seed', type=int, default=0,
+                       help='随机种子')
+
+    args = parser.parse_args()
+
+    print_header()
+
+    samples = load_samples(args.input)
+    if len(samples) < 2:
+        print(f"✗ 错误: 至少需要2张CCPD格式命名的测试图片: {args.input}")
+        sys.exit(1)
+
+    hash_w, hash_h = settings.REC_CACHE_HASH_SIZE
+    max_distance = settings.REC_CACHE_MAX_DISTANCE if args.max_distance is None else args.max_distance
+    sigmas = [float(s) for s in args.sigmas.split(',') if s.strip()]
+    rng = np.random.default_rng(args.seed)
+    plates = [truth['plate'] for _, _, truth in samples]
+    crops = [image[y1:y2, x1:x2] for _, image, truth in samples for x1, y1, x2, y2 in [truth['box']]]
+    keys = [crop_fingerprint(crop) for crop in crops]
+    variants = [[crop_fingerprint(crop) for crop in perturb(image, truth['box'], rng, sigmas, args.quality)]
+                for _, image, truth in samples]
+    print(f"车牌: {len(samples)} 个 | 每个车牌扰动: {len(variants[0])} 个 | 哈希: {hash_w * hash_h - 1} 位 | "
+          f"阈值: {max_distance}")
+
+    # 同一车牌：缓存中存有全部车牌的原始裁剪，扰动后的裁剪应命中自己的条目
+    cache = FingerprintCache(len(samples), 0, max_distance)
+    for key, plate in zip(keys, plates):
+        cache.put(key, plate)
+    hits = sum(cache.get_nearest(key) == plate for plate, keys_ in zip(plates, variants) for key in keys_)
+    total = sum(len(keys_) for keys_ in variants)
+    matrix = np.frombuffer(b''.join(keys), dtype=np.uint8).reshape(len(keys), -1)
+    intra = max(int(hamming_distances(matrix[i:i + 1], key)[0]) for i, keys_ in enumerate(variants)
+                for key in keys_)
+
+    # 不同车牌：缓存中只存其它车牌，原始和扰动后的裁剪都不应命中
+    false_hits = 0
+    inter = None
+    for i, plate in enumerate(plates):
+        others = [j for j in range(len(samples)) if plates[j] != plate]
+        cache = FingerprintCache(len(others), 0, max_distance)
+        for j in others:
+            cache.put(keys[j], plates[j])
+        false_hits += sum(cache.get_nearest(key) is not None for key in [keys[i]] + variants[i])
+        nearest = int(hamming_distances(matrix[others], keys[i]).min())
+        inter = nearest if inter is None else min(inter, nearest)
+    queries = sum(len(keys_) + 1 for keys_ in variants)
+
+    # 只差一个字符：缓存中只存原始车牌，替换一个字符区域后的裁剪不应命中
+    swap_hits = 0
+    swap_queries = 0
+    swap_min = None
+    for i, plate in enumerate(plates):
+        cache = FingerprintCache(1, 0, max_distance)
+        cache.put(keys[i], plate)
+        for j, other in enumerate(plates):
+            for slot in range(min(len(plate), len(other))):
+                if plate[slot] == other[slot]:
+                    continue
+                key = crop_fingerprint(swap_character(crops[i], crops[j], slot, len(plate)))
+                swap_queries += 1
+                swap_hits += cache.get_nearest(key) is not None
+                distance = int(hamming_distances(matrix[i:i + 1], key)[0])
+                swap_min = distance if swap_min is None else min(swap_min, distance)
+
+    print(f"  同一车牌命中: {hits}/{total} (最大距离 {intra})")
+    print(f"  不同车牌误命中: {false_hits}/{queries} (最小距离 {inter})")
+    print(f"  只差一个字符误命中: {swap_hits}/{swap_queries} (最小距离 {swap_min})")
+    if false_hits or swap_hits:
+        print(f"✗ 检查未通过: 阈值应小于 {min(inter, swap_min)}")
+        sys.exit(1)
+    print("✓ 检查通过")
+
+
+if __name__ == "__main__":
+    main()
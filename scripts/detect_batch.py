@@ -0,0 +1,258 @@
+# coding:utf-8
+"""
+目录批量车牌检测脚本
+把目录（或通配符）下的图片分片到多进程池中处理，结果流式写入JSONL/CSV，支持断点续跑
+"""
+import sys
+import os
+import argparse
+import csv
+import glob
+import json
+import time
+from multiprocessing import Pool
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import settings
+
+# 支持的图片扩展名
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+# CSV输出列
+CSV_FIELDS = ['path', 'plate', 'conf', 'x1', 'y1', 'x2', 'y2', 'error']
+
+# 每个工作进程中的检测识别流程（进程内只加载一次模型）
+_worker_pipeline = None
+
+
+def print_header():
+    """打印程序头部信息"""
+    print("=" * 60)
+    print("           车牌检测与识别系统 - 目录批量检测模式")
+    print("=" * 60)
+    print()
+
+
+def print_progress(done, total, elapsed):
+    """打印处理进度"""
+    speed = done / elapsed if elapsed > 0 else 0
+    print(f"\r进度: {done}/{total} | 速度: {speed:.1f} 张/秒", end='', flush=True)
+
+
+def collect_images(source):
+    """
+    收集待处理图片
+    :param source: 目录或通配符
+    :return: 排序后的图片路径列表
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            paths.extend(os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS))
+    else:
+        paths = [p for p in glob.glob(source, recursive=True) if p.lower().endswith(IMAGE_EXTENSIONS)]
+    return sorted(paths)
+
+
+def load_done(output_path, fmt):
+    """
+    读取已有输出文件中已处理的图片，用于断点续跑
+    :param output_path: 输出文件路径
+    :param fmt: 输出格式（jsonl / csv）
+    :return: 已处理图片路径集合
+    """
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            for row in csv.DictReader(f):
+                done.add(row['path'])
+        else:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['path'])
+                except (ValueError, KeyError):
+                    # 崩溃时可能留下写了一半的最后一行
+                    continue
+    return done
+
+
+def truncate_partial_line(output_path):
+    """
+    截掉崩溃时写了一半的最后一行，保证续写的第一条记录从新行开始
+    :param output_path: 输出文件路径
+    """
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return
+    with open(output_path, 'rb+') as f:
+        data = f.read()
+        if data.endswith(b'\n'):
+            return
+        f.truncate(data.rfind(b'\n') + 1)
+
+
+def init_worker(backend, rec_backend, threads):
+    """
+    工作进程初始化：限制每个进程的计算线程数并加载一次模型
+    :param backend: 检测推理后端
+    :param rec_backend: 识别推理后端
+    :param threads: 每个进程的计算线程数
+    """
+    global _worker_pipeline
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import cv2
+    cv2.setNumThreads(threads)
+
+    from src.core.pipeline import PlatePipeline
+    from src.core.detector import PlateDetector
+    from src.core.recognizer import create_recognizer
+    _worker_pipeline = PlatePipeline(detector=PlateDetector(backend=backend),
+                                     recognizer=create_recognizer(rec_backend))
+
+
+def process_shard(paths):
+    """
+    在工作进程中处理一个分片
+    :param paths: 图片路径列表
+    :return: 每张图片的结果记录列表
+    """
+    try:
+        outputs = _worker_pipeline.process_batch(paths)
+    except Exception:
+        # 分片中有损坏图片时逐张处理，避免整片失败
+        outputs = []
+        for path in paths:
+            try:
+                outputs.append(_worker_pipeline.process_image(path))
+            except Exception as e:
+                outputs.append(e)
+
+    records = []
+    for path, output in zip(paths, outputs):
+        if isinstance(output, Exception):
+            records.append({'path': path, 'plates': [], 'error': str(output)})
+            continue
+        boxes, license_list, conf_list = output
+        plates = [{'text': text, 'conf': float(conf), 'box': list(map(int, box))}
+                  for box, text, conf in zip(boxes, license_list, conf_list)]
+        records.append({'path': path, 'plates': plates})
+    return records
+
+
+def write_record(f, writer, record):
+    """
+    写入一张图片的结果
+    :param f: 输出文件对象
+    :param writer: CSV写入器（JSONL格式时为None）
+    :param record: 结果记录
+    """
+    if writer is None:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    elif not record['plates']:
+        # 没有车牌的图片也写一行，便于断点续跑时识别为已处理
+        writer.writerow({'path': record['path'], 'error': record.get('error', '')})
+    else:
+        for plate in record['plates']:
+            x1, y1, x2, y2 = plate['box']
+            writer.writerow({'path': record['path'], 'plate': plate['text'], 'conf': f"{plate['conf']:.4f}",
+                             'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2, 'error': ''})
+    f.flush()
+
+
+def main():
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='车牌检测与识别 - 目录批量模式')
+    parser.add_argument('--input', '-i', type=str, required=True,
+                       help='输入目录或通配符（如 "data/**/*.jpg"）')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                       help='输出文件路径，按扩展名选择 .jsonl 或 .csv（默认outputs/batch_results.jsonl）')
+    parser.add_argument('--workers', '-w', type=int, default=settings.BATCH_WORKERS,
+                       help='工作进程数')
+    parser.add_argument('--shard-size', type=int, default=settings.BATCH_SHARD_SIZE,
+                       help='每个分片的图片数')
+    parser.add_argument('--threads', type=int, default=1,
+                       help='每个工作进程的计算线程数（默认1）')
+    parser.add_argument('--no-resume', action='store_true',
+                       help='忽略已有输出文件，从头开始')
+    parser.add_argument('--backend', type=str, default=None,
+                       choices=['torch', 'onnxruntime', 'openvino'],
+                       help='检测推理后端（默认使用配置中的DETECT_BACKEND）')
+    parser.add_argument('--rec-backend', type=str, default=None,
+                       choices=['paddle', 'onnxruntime'],
+                       help='识别推理后端（默认使用配置中的REC_BACKEND）')
+
+    args = parser.parse_args()
+
+    print_header()
+
+    output_path = args.output or os.path.join(settings.OUTPUT_DIR, 'batch_results.jsonl')
+    fmt = 'csv' if output_path.lower().endswith('.csv') else 'jsonl'
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+
+    paths = collect_images(args.input)
+    if not paths:
+        print(f"✗ 错误: 没有找到图片: {args.input}")
+        return
+
+    if args.no_resume and os.path.exists(output_path):
+        os.remove(output_path)
+    truncate_partial_line(output_path)
+    done = load_done(output_path, fmt)
+    todo = [p for p in paths if p not in done]
+
+    print(f"输入: {args.input}")
+    print(f"图片总数: {len(paths)} | 已完成: {len(paths) - len(todo)} | 待处理: {len(todo)}")
+    print(f"输出: {output_path} ({fmt})")
+    print(f"工作进程: {args.workers} | 分片大小: {args.shard_size}\n")
+
+    if not todo:
+        print("✓ 所有图片均已处理")
+        return
+
+    shards = [todo[i:i + args.shard_size] for i in range(0, len(todo), args.shard_size)]
+    new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+
+    processed = 0
+    plate_count = 0
+    error_count = 0
+    start_time = time.time()
+    try:
+        with open(output_path, 'a', encoding='utf-8', newline='') as f, \
+                Pool(args.workers, initializer=init_worker,
+                     initargs=(args.backend, args.rec_backend, args.threads)) as pool:
+            writer = None
+            if fmt == 'csv':
+                writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+                if new_file:
+                    writer.writeheader()
+
+            for records in pool.imap_unordered(process_shard, shards):
+                for record in records:
+                    write_record(f, writer, record)
+                    plate_count += len(record['plates'])
+                    error_count += 'error' in record
+                processed += len(records)
+                print_progress(processed, len(todo), time.time() - start_time)
+    except KeyboardInterrupt:
+        print("\n\n✗ 已中断，已完成的结果已保存，重新运行即可从断点继续")
+        return
+
+    # 打印统计信息
+    elapsed = time.time() - start_time
+    print(f"\n\n{'='*60}")
+    print("处理完成!")
+    print(f"{'='*60}")
+    print(f"  处理图片数: {processed}")
+    print(f"  识别车牌数: {plate_count}")
+    print(f"  失败图片数: {error_count}")
+    print(f"  总耗时: {elapsed:.2f} 秒（含模型加载）")
+    print(f"  平均速度: {processed / elapsed:.2f} 张/秒")
+    print(f"  结果已保存到: {output_path}")
+    print(f"{'='*60}")
+
+
+if __name__ == "__main__":
+    main()
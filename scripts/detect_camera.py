@@ -1,7 +1,7 @@
 # coding:utf-8
 """
 摄像头实时车牌检测脚本
-使用摄像头进行实时车牌检测和识别
+使用摄像头、网络流（RTSP/HTTP等）或本地视频文件进行实时车牌检测和识别
 """
 import sys
 import os
@@ -14,6 +14,18 @@ from collections import deque
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.core.pipeline import PlatePipeline
+from src.core.detector import PlateDetector
+from src.core.recognizer import create_recognizer
+from src.core.tracker import PlateTracker
+from src.core.motion import MotionGate
+from src.core.quality import QualityGate
+from src.core.roi import load_roi
+from src.core.frame_reader import FrameReader
+from src.core.adaptive import AdaptiveController, format_decision, format_state
+from src.core.source import VideoSource, find_camera
+from src.core.video_writer import create_writer
+from src.utils.metrics import format_stage_table
+from src.config import settings
 
 
 def print_header():
@@ -24,39 +36,86 @@ def print_header():
     print()
 
 
-def find_camera(camera_id=None):
-    """查找可用的摄像头"""
-    if camera_id is not None:
-        cap = cv2.VideoCapture(camera_id)
-        ret, _ = cap.read()
-        if ret:
-            print(f'✓ 找到摄像头，ID: {camera_id}')
-            return cap
+def open_source(source=None):
+    """
+    打开视频源：未指定时自动查找摄像头
+    :param source: 摄像头ID、视频文件路径或网络流地址
+    :return: VideoSource，打开失败时返回None
+    """
+    if source is None:
+        print("正在搜索可用摄像头...")
+        source = find_camera()
+        if source is None:
+            return None
+
+    # 本地文件按原始帧率读取，模拟实时画面
+    cap = VideoSource(source, realtime=True)
+    if not cap.isOpened():
         cap.release()
-        print(f'✗ 无法打开摄像头 ID: {camera_id}')
+        print(f'✗ 无法打开视频源: {source}')
         return None
+    print(f'✓ 已打开视频源: {cap.source}')
+    return cap
 
-    # 自动搜索
-    print("正在搜索可用摄像头...")
-    for cid in range(10):
-        cap = cv2.VideoCapture(cid)
-        ret, _ = cap.read()
-        if ret:
-            print(f'✓ 找到摄像头，ID: {cid}')
-            return cap
-        cap.release()
-    return None
+
+def format_plates(license_list, track_ids):
+    """格式化车牌列表，启用跟踪时带上跟踪ID"""
+    return ', '.join(plate if tid is None else f"#{tid} {plate}"
+                     for plate, tid in zip(license_list, track_ids))
 
 
 def main():
     # 解析命令行参数
     parser = argparse.ArgumentParser(description='车牌检测与识别 - 摄像头模式')
-    parser.add_argument('--camera', '-c', type=int,
-                       help='摄像头ID（默认自动搜索）')
+    parser.add_argument('--camera', '-c', type=str,
+                       help='摄像头ID、视频文件路径或网络流地址（默认自动搜索摄像头）')
+    parser.add_argument('--every-frame', action='store_true',
+                       help='处理每一帧（默认只处理最新帧，处理跟不上时丢弃积压的旧帧）')
     parser.add_argument('--output', '-o', type=str,
                        help='输出视频路径（可选）')
     parser.add_argument('--show-fps', action='store_true',
                        help='在画面上显示FPS')
+    parser.add_argument('--backend', type=str, default=None,
+                       choices=['torch', 'onnxruntime', 'openvino'],
+                       help='检测推理后端（默认使用配置中的DETECT_BACKEND）')
+    parser.add_argument('--tiled', action='store_true',
+                       help='大尺寸帧切片检测（长边超过DETECT_TILE_MIN_SIZE时切成重叠切片，提高远处小车牌的召回）')
+    parser.add_argument('--coarse', action='store_true',
+                       help='在缩小的帧上粗检测（DETECT_COARSE_IMGSZ），识别裁剪仍取自原始分辨率帧')
+    parser.add_argument('--refine', action='store_true',
+                       help='粗检测后在外扩区域上做小尺寸精修检测以收紧边界框（需配合 --coarse）')
+    parser.add_argument('--roi', type=str, default=None,
+                       help='感兴趣区域多边形 "x1,y1;x2,y2;..."（坐标不大于1时按帧宽高比例；默认使用配置中的ROI_POLYGONS）')
+    parser.add_argument('--rec-backend', type=str, default=None,
+                       choices=['paddle', 'onnxruntime'],
+                       help='识别推理后端（默认使用配置中的REC_BACKEND）')
+    parser.add_argument('--rec-cache', action='store_true',
+                       help='开启识别结果缓存（按车牌裁剪的感知哈希复用识别结果，默认关闭）')
+    parser.add_argument('--no-track', action='store_true',
+                       help='关闭车牌跟踪（每帧都做识别）')
+    parser.add_argument('--no-motion-gate', action='store_true',
+                       help='关闭运动门控（画面静止时也每帧检测）')
+    parser.add_argument('--writer', type=str, default=None,
+                       choices=['opencv', 'ffmpeg'],
+                       help='输出视频编码后端（默认使用配置中的WRITER_BACKEND）')
+    parser.add_argument('--preset', type=str, default=None,
+                       help='ffmpeg后端的x264预设（如 ultrafast / veryfast / medium）')
+    parser.add_argument('--crf', type=int, default=None,
+                       help='ffmpeg后端的x264质量参数（越小质量越高）')
+    parser.add_argument('--writer-drop', action='store_true',
+                       help='编码跟不上时丢弃待写入的帧（默认阻塞等待）')
+    parser.add_argument('--target-fps', type=float, default=None,
+                       help='自适应质量控制的目标帧率（超出预算时依次降低识别频率、检测尺寸并增加跳帧，负载回落后恢复）')
+    parser.add_argument('--target-latency-ms', type=float, default=None,
+                       help='自适应质量控制的目标端到端延迟（毫秒，从采集到输出）')
+    parser.add_argument('--adapt-log', type=str, default=None,
+                       help='自适应调整决策的JSONL日志路径')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                       help='在本机该端口提供 /metrics（Prometheus）和 /metrics.json 端点')
+    parser.add_argument('--metrics-file', type=str, default=None,
+                       help='定期写入Prometheus文本文件的路径')
+    parser.add_argument('--metrics-json', type=str, default=None,
+                       help='结束时写入各阶段耗时JSON汇总的路径')
 
     args = parser.parse_args()
 
@@ -66,30 +125,55 @@ def main():
 
     try:
         # 创建检测识别流程
-        pipeline = PlatePipeline()
+        detector = PlateDetector(backend=args.backend, tiled=args.tiled, coarse=args.coarse, refine=args.refine)
+        pipeline = PlatePipeline(detector=detector,
+                                 recognizer=create_recognizer(args.rec_backend, cache_size=(
+                                     settings.REC_CACHE_OPT_IN_SIZE if args.rec_cache else None)),
+                                 tracker=None if args.no_track else PlateTracker(),
+                                 motion_gate=None if args.no_motion_gate else MotionGate(),
+                                 quality_gate=None if args.no_track else QualityGate())
         print("✓ 模型加载成功\n")
 
-        # 查找摄像头
-        cap = find_camera(args.camera)
-        if cap is None:
-            print("✗ 错误: 未找到可用的摄像头")
+        metrics = pipeline.metrics
+        metrics_server = metrics.serve_http(args.metrics_port) if args.metrics_port else None
+        metrics_writer = metrics.start_textfile_writer(args.metrics_file) if args.metrics_file else None
+
+        # 打开视频源（断线时自动重连）
+        source = open_source(args.camera)
+        if source is None:
+            print("✗ 错误: 未找到可用的视频源")
             return
+        pipeline.roi = load_roi(source.source, args.roi)
 
         # 获取摄像头信息
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = int(cap.get(cv2.CAP_PROP_FPS))
+        width = int(source.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(source.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        # 实时画面默认只处理最新帧，处理跟不上时丢弃积压的旧帧，延迟不会随时间增长
+        cap = FrameReader(source, latest_only=not args.every_frame)
 
         print(f"摄像头分辨率: {width}x{height}")
+        if pipeline.roi is not None:
+            print(f"感兴趣区域: {pipeline.roi.rect((height, width))}")
         print(f"按 'q' 键退出, 按 's' 键截图\n")
 
         # 准备输出视频
         out = None
         if args.output:
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(args.output, fourcc, 20, (width, height))
+            # 帧率按实际处理速率测得；编码在独立线程中进行
+            out = create_writer(args.output, None, (width, height), backend=args.writer,
+                                preset=args.preset, crf=args.crf,
+                                policy='drop' if args.writer_drop else None)
             print(f"录制到: {args.output}\n")
 
+        # 自适应质量控制（指定了目标帧率或延迟时启用）
+        controller = None
+        if args.target_fps or args.target_latency_ms:
+            controller = AdaptiveController(
+                target_fps=args.target_fps,
+                target_latency=args.target_latency_ms / 1000 if args.target_latency_ms else None,
+                on_decision=lambda d: print(f"\n自适应调整 {format_decision(d)}"),
+                log_path=args.adapt_log)
+
         print("开始实时检测...\n")
 
         frame_count = 0
@@ -97,25 +181,21 @@ def main():
         start_time = time.time()
         fps_queue = deque(maxlen=30)  # 用于计算平均FPS
 
-        while cap.isOpened():
-            loop_start = time.time()
-            success, frame = cap.read()
-
-            if not success:
-                print("\n✗ 无法读取摄像头画面")
-                break
-
-            frame_count += 1
-
-            # 处理帧
-            boxes, license_list, conf_list = pipeline.process_image(frame)
+        last_time = time.time()
+        # 采集、检测、识别、绘制在各自线程中并行，这里负责叠加信息、录制、显示和统计
+        stream = pipeline.process_stream(cap, controller=controller)
+        for result in stream:
+            frame = result.frame
+            frame_count = result.index
+            license_list, track_ids = result.license_list, result.track_ids
 
-            if boxes:
+            if result.boxes:
                 detected_count += 1
-                frame = pipeline.draw_results(frame, boxes, license_list)
 
-            # 计算FPS
-            loop_time = time.time() - loop_start
+            # 计算FPS（相邻两帧输出的时间间隔）
+            now = time.time()
+            loop_time = now - last_time
+            last_time = now
             fps_queue.append(1.0 / loop_time if loop_time > 0 else 0)
             avg_fps = sum(fps_queue) / len(fps_queue)
 
@@ -129,18 +209,19 @@ def main():
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
 
             if license_list:
-                plates_text = ", ".join(license_list)
+                plates_text = format_plates(license_list, track_ids)
                 cv2.putText(frame, f"Detected: {plates_text}", (10, info_y + 70),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
 
-            # 保存到输出视频
+            # 录制叠加信息后的画面（写入器在独立线程中编码）
             if out:
-                out.write(frame)
+                with metrics.timer('encode'):
+                    out.write(frame)
 
             # 显示结果
-            cv2.imshow("摄像头车牌检测 (q:退出 s:截图)", frame)
-
-            key = cv2.waitKey(1) & 0xFF
+            with metrics.timer('display'):
+                cv2.imshow("摄像头车牌检测 (q:退出 s:截图)", frame)
+                key = cv2.waitKey(1) & 0xFF
             if key == ord("q"):
                 break
             elif key == ord("s"):
@@ -150,12 +231,22 @@ def main():
                 cv2.imwrite(screenshot_path, frame)
                 print(f"\n✓ 截图已保存: {screenshot_path}")
 
-        # 清理
+        # 清理（先停止各阶段线程，再释放采集和写入器）
+        stream.close()
         cap.release()
         if out:
             out.release()
         cv2.destroyAllWindows()
 
+        # 导出指标
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if metrics_writer is not None:
+            metrics_writer.set()
+            metrics.write_prometheus(args.metrics_file)
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+
         # 打印统计信息
         elapsed = time.time() - start_time
         print(f"\n{'='*60}")
@@ -163,10 +254,28 @@ def main():
         print(f"{'='*60}")
         print(f"  总帧数: {frame_count}")
         print(f"  检测到车牌的帧数: {detected_count}")
+        print(f"  识别次数: {pipeline.ocr_count} | 质量门控跳过: {pipeline.rejected_count}")
+        print(f"  丢弃的积压帧: {cap.dropped}/{cap.frames_read}")
+        if source.live:
+            print(f"  断线重连次数: {source.reconnects}")
+        if pipeline.roi is not None:
+            print(f"  感兴趣区域外丢弃: {metrics.counter('roi_discarded')} 个检测框")
+        if pipeline.motion_gate is not None:
+            print(f"  运动门控跳过检测: {pipeline.motion_gate.skipped}/{pipeline.motion_gate.checked} 帧")
+        if hasattr(pipeline.recognizer, 'stats'):
+            cache = pipeline.recognizer.stats()
+            print(f"  识别缓存: 命中 {cache['hits']} | 未命中 {cache['misses']} | 命中率 {cache['hit_rate']:.1%}")
         print(f"  运行时长: {elapsed:.2f} 秒")
         print(f"  平均FPS: {frame_count/elapsed:.2f}")
         if args.output:
-            print(f"  录制已保存到: {args.output}")
+            print(f"  录制已保存到: {args.output}（{out.fps} FPS，写入 {out.written} 帧，丢弃 {out.dropped} 帧）")
+        if controller is not None:
+            controller.close()
+            print(f"  自适应调整: {len(controller.decisions)} 次 | 最终参数: {format_state(controller.state)}")
+        print("  各阶段耗时:")
+        print('\n'.join(format_stage_table(metrics.summary())))
+        if args.metrics_json:
+            print(f"  指标汇总已保存到: {args.metrics_json}")
         print(f"{'='*60}")
 
     except Exception as e:
@@ -14,6 +14,8 @@ from datetime import datetime
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.core.pipeline import PlatePipeline
+from src.core.detector import PlateDetector
+from src.core.recognizer import create_recognizer
 from src.utils.visualization import img_cvread
 from src.config import settings
 
@@ -68,6 +70,18 @@ def main():
                        help='不显示结果窗口')
     parser.add_argument('--scale', type=float, default=0.5,
                        help='显示缩放比例（默认0.5）')
+    parser.add_argument('--backend', type=str, default=None,
+                       choices=['torch', 'onnxruntime', 'openvino'],
+                       help='检测推理后端（默认使用配置中的DETECT_BACKEND）')
+    parser.add_argument('--tiled', action='store_true',
+                       help='大尺寸帧切片检测（长边超过DETECT_TILE_MIN_SIZE时切成重叠切片，提高远处小车牌的召回）')
+    parser.add_argument('--coarse', action='store_true',
+                       help='在缩小的帧上粗检测（DETECT_COARSE_IMGSZ），识别裁剪仍取自原始分辨率帧')
+    parser.add_argument('--refine', action='store_true',
+                       help='粗检测后在外扩区域上做小尺寸精修检测以收紧边界框（需配合 --coarse）')
+    parser.add_argument('--rec-backend', type=str, default=None,
+                       choices=['paddle', 'onnxruntime'],
+                       help='识别推理后端（默认使用配置中的REC_BACKEND）')
 
     args = parser.parse_args()
 
@@ -95,7 +109,9 @@ def main():
 
     try:
         # 创建检测识别流程
-        pipeline = PlatePipeline()
+        detector = PlateDetector(backend=args.backend, tiled=args.tiled, coarse=args.coarse, refine=args.refine)
+        pipeline = PlatePipeline(detector=detector,
+                                 recognizer=create_recognizer(args.rec_backend))
         print("✓ 模型加载成功\n")
 
         # 读取图片
@@ -0,0 +1,177 @@
+# coding:utf-8
+"""
+多路视频流车牌检测脚本
+一个进程同时处理多路摄像头/网络流/视频文件，共享一份检测和识别模型；
+每路结果写入各自的JSONL文件（可选同时录制带标注的视频）
+"""
+import sys
+import os
+import argparse
+import json
+import threading
+import time
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.pipeline import PlatePipeline
+from src.core.detector import PlateDetector
+from src.core.recognizer import create_recognizer
+from src.core.quality import QualityGate
+from src.core.multi_stream import MultiStreamScheduler, JsonlSink, VideoSink
+from src.config import settings
+
+
+def print_header():
+    """打印程序头部信息"""
+    print("=" * 60)
+    print("           车牌检测与识别系统 - 多路视频流检测")
+    print("=" * 60)
+    print()
+
+
+def load_stream_configs(args):
+    """
+    汇总视频流配置
+    --config 为JSON数组，每项形如 {"name": "gate1", "source": "rtsp://...", "max_fps": 10, "video": true}，
+    可选 "roi": [[x, y], ...] 指定该路的感兴趣区域多边形（默认使用配置中的ROI_POLYGONS）
+    :return: 配置字典列表
+    """
+    configs = []
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            configs.extend(json.load(f))
+    for source in args.source or []:
+        configs.append({'name': f"stream{len(configs) + 1}", 'source': source})
+    for config in configs:
+        config.setdefault('max_fps', args.max_fps)
+        config.setdefault('video', args.save_video)
+    return configs
+
+
+def main():
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='车牌检测与识别 - 多路视频流模式')
+    parser.add_argument('--source', '-s', type=str, action='append',
+                       help='视频源（摄像头ID、视频文件或网络流地址），可重复指定多路')
+    parser.add_argument('--config', type=str, default=None,
+                       help='视频流配置JSON文件（每路可单独设置名称、帧率上限和是否录像）')
+    parser.add_argument('--output-dir', '-o', type=str, default=None,
+                       help='结果输出目录（默认outputs/streams），每路写入 <名称>.jsonl')
+    parser.add_argument('--max-fps', type=float, default=None,
+                       help='每路默认的处理帧率上限（默认不限）')
+    parser.add_argument('--save-video', action='store_true',
+                       help='每路同时录制带标注的视频 <名称>.mp4')
+    parser.add_argument('--batch-size', type=int, default=None,
+                       help='每轮最多合并检测的帧数（默认使用配置中的MULTI_BATCH_SIZE）')
+    parser.add_argument('--duration', type=float, default=None,
+                       help='运行时长（秒，默认一直运行到所有视频源结束或按 Ctrl+C）')
+    parser.add_argument('--backend', type=str, default=None,
+                       choices=['torch', 'onnxruntime', 'openvino'],
+                       help='检测推理后端（默认使用配置中的DETECT_BACKEND）')
+    parser.add_argument('--tiled', action='store_true',
+                       help='大尺寸帧切片检测（长边超过DETECT_TILE_MIN_SIZE时切成重叠切片，提高远处小车牌的召回）')
+    parser.add_argument('--coarse', action='store_true',
+                       help='在缩小的帧上粗检测（DETECT_COARSE_IMGSZ），识别裁剪仍取自原始分辨率帧')
+    parser.add_argument('--refine', action='store_true',
+                       help='粗检测后在外扩区域上做小尺寸精修检测以收紧边界框（需配合 --coarse）')
+    parser.add_argument('--rec-backend', type=str, default=None,
+                       choices=['paddle', 'onnxruntime'],
+                       help='识别推理后端（默认使用配置中的REC_BACKEND）')
+    parser.add_argument('--rec-cache', action='store_true',
+                       help='开启识别结果缓存（按车牌裁剪的感知哈希复用识别结果，默认关闭）')
+    parser.add_argument('--no-track', action='store_true',
+                       help='关闭车牌跟踪（每帧都做识别）')
+    parser.add_argument('--motion-gate', action='store_true',
+                       help='开启运动门控（画面静止时跳过检测）')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                       help='在本机该端口提供 /metrics（Prometheus）和 /metrics.json 端点')
+
+    args = parser.parse_args()
+
+    print_header()
+
+    configs = load_stream_configs(args)
+    if not configs:
+        print("✗ 错误: 请用 --source 或 --config 指定至少一路视频源")
+        return
+
+    output_dir = args.output_dir or os.path.join(settings.OUTPUT_DIR, 'streams')
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"视频流: {len(configs)} 路 | 输出目录: {output_dir}")
+    print("正在加载模型...")
+
+    try:
+        # 所有视频流共享一份模型
+        detector = PlateDetector(backend=args.backend, tiled=args.tiled, coarse=args.coarse, refine=args.refine)
+        pipeline = PlatePipeline(detector=detector,
+                                 recognizer=create_recognizer(args.rec_backend, cache_size=(
+                                     settings.REC_CACHE_OPT_IN_SIZE if args.rec_cache else None)),
+                                 quality_gate=None if args.no_track else QualityGate())
+        print("✓ 模型加载成功\n")
+        metrics_server = pipeline.metrics.serve_http(args.metrics_port) if args.metrics_port else None
+
+        scheduler = MultiStreamScheduler(pipeline, batch_size=args.batch_size)
+        for config in configs:
+            name = config['name']
+            sinks = [JsonlSink(os.path.join(output_dir, f"{name}.jsonl"))]
+            if config['video']:
+                sinks.append(VideoSink(os.path.join(output_dir, f"{name}.mp4"), pipeline))
+            try:
+                state = scheduler.add_stream(name, config['source'], max_fps=config['max_fps'], sinks=sinks,
+                                             track=not args.no_track, motion_gate=args.motion_gate,
+                                             roi=config.get('roi'))
+            except (IOError, ValueError) as e:
+                for sink in sinks:
+                    sink.close()
+                print(f"✗ {name}: {e}")
+                continue
+            fps_text = f"{config['max_fps']} FPS" if config['max_fps'] else "不限帧率"
+            roi_text = f" | ROI {len(state.roi.polygon)} 个顶点" if state.roi is not None else ""
+            print(f"✓ {name}: {config['source']} ({fps_text}{roi_text})")
+
+        if not scheduler.streams:
+            print("✗ 错误: 没有可用的视频源")
+            return
+
+        print("\n开始检测，按 Ctrl+C 停止...\n")
+        start_time = time.time()
+        worker = threading.Thread(target=scheduler.run, args=(args.duration,), daemon=True)
+        worker.start()
+        try:
+            while worker.is_alive():
+                worker.join(timeout=2.0)
+                elapsed = time.time() - start_time
+                total = sum(s['frames'] for s in scheduler.stats().values())
+                print(f"\r运行: {elapsed:.0f}s | 总帧数: {total} | 总速度: {total / elapsed:.1f} 帧/秒",
+                      end='', flush=True)
+        except KeyboardInterrupt:
+            scheduler.stop()
+            worker.join()
+
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+        # 打印统计信息
+        elapsed = time.time() - start_time
+        print(f"\n\n{'='*60}")
+        print("检测结束!")
+        print(f"{'='*60}")
+        for name, stats in scheduler.stats().items():
+            print(f"  {name}: 帧数 {stats['frames']} ({stats['frames'] / elapsed:.1f} FPS) | "
+                  f"车牌 {stats['plates']} | 丢弃旧帧 {stats['dropped']} | 重连 {stats['reconnects']}")
+        print(f"  识别次数: {pipeline.ocr_count} | 质量门控跳过: {pipeline.rejected_count} | "
+              f"感兴趣区域外丢弃: {pipeline.metrics.counter('roi_discarded')}")
+        print(f"  运行时长: {elapsed:.2f} 秒")
+        print(f"  结果已保存到: {output_dir}")
+        print(f"{'='*60}")
+
+    except Exception as e:
+        print(f"\n✗ 处理过程中出错: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
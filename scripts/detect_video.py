@@ -1,20 +1,35 @@
 # coding:utf-8
 """
 视频车牌检测脚本
-对视频文件进行车牌检测和识别
+对视频文件进行车牌检测和识别；离线模式下把长视频按时间切成多段，在多个进程中并行处理后合并为一条时间线
 """
 import sys
 import os
 import cv2
 import argparse
+import json
 import time
+from multiprocessing import Pool
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.core.pipeline import PlatePipeline
+from src.core.detector import PlateDetector
+from src.core.recognizer import create_recognizer
+from src.core.tracker import PlateTracker
+from src.core.motion import MotionGate
+from src.core.quality import QualityGate
+from src.core.roi import load_roi
+from src.core.frame_reader import FrameReader
+from src.core.adaptive import AdaptiveController, format_decision, format_state
+from src.core.video_writer import create_writer
+from src.utils.metrics import format_stage_table
 from src.config import settings
 
+# 每个工作进程中的检测识别流程（进程内只加载一次模型）
+_worker_pipeline = None
+
 
 def print_header():
     """打印程序头部信息"""
@@ -29,6 +44,169 @@ def print_progress(frame_count, detected_count, fps, current_plates):
     print(f"\r帧数: {frame_count} | 检测到车牌: {detected_count} | FPS: {fps:.1f} | 当前: {current_plates}", end='', flush=True)
 
 
+def show_frame(window_name, frame, scale, status):
+    """缩放并显示一帧，左上角显示播放状态"""
+    display_frame = cv2.resize(frame, dsize=None, fx=scale, fy=scale,
+                               interpolation=cv2.INTER_LINEAR)
+    cv2.putText(display_frame, status, (10, 30),
+               cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+    cv2.imshow(window_name, display_frame)
+
+
+def format_plates(license_list, track_ids):
+    """格式化车牌列表，启用跟踪时带上跟踪ID"""
+    return ', '.join(plate if tid is None else f"#{tid} {plate}"
+                     for plate, tid in zip(license_list, track_ids))
+
+
+def split_segments(total_frames, workers, min_frames=None):
+    """
+    把视频切分为若干时间段，段数多于进程数以均衡负载
+    :param total_frames: 视频总帧数
+    :param workers: 工作进程数
+    :param min_frames: 每段最少帧数
+    :return: [(起始帧, 结束帧), ...]，帧号从0开始、左闭右开，最后一段的结束帧为None（读到结尾）
+    """
+    min_frames = min_frames or settings.VIDEO_SEGMENT_MIN_FRAMES
+    count = max(1, min(workers * 4, total_frames // min_frames))
+    bounds = [total_frames * i // count for i in range(count)] + [None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def init_worker(backend, rec_backend, track, motion_gate, threads, tiled, coarse, refine, roi, rec_cache):
+    """
+    工作进程初始化：限制每个进程的计算线程数并加载一次模型
+    :param backend: 检测推理后端
+    :param rec_backend: 识别推理后端
+    :param track: 是否启用车牌跟踪
+    :param motion_gate: 是否启用运动门控
+    :param threads: 每个进程的计算线程数
+    :param tiled: 是否对大尺寸帧做切片检测
+    :param coarse: 是否在缩小的帧上粗检测
+    :param refine: 粗检测后是否精修
+    :param roi: 感兴趣区域（RegionOfInterest，可为None）
+    :param rec_cache: 是否开启识别结果缓存
+    """
+    global _worker_pipeline
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    cv2.setNumThreads(threads)
+    detector = PlateDetector(backend=backend, tiled=tiled, coarse=coarse, refine=refine)
+    _worker_pipeline = PlatePipeline(detector=detector,
+                                     recognizer=create_recognizer(rec_backend, cache_size=(
+                                         settings.REC_CACHE_OPT_IN_SIZE if rec_cache else None)),
+                                     tracker=PlateTracker() if track else None,
+                                     motion_gate=MotionGate() if motion_gate else None,
+                                     quality_gate=QualityGate() if track else None,
+                                     roi=roi)
+
+
+def process_segment(task):
+    """
+    在工作进程中处理一个时间段
+    :param task: (段序号, 视频路径, 起始帧, 结束帧, 跳帧间隔)
+    :return: (段序号, 每个处理帧的结果记录列表)
+    """
+    segment_id, video_path, start, end, skip_frames = task
+    pipeline = _worker_pipeline
+    # 跟踪和运动门控状态不能跨段延续
+    if pipeline.tracker is not None:
+        pipeline.tracker = PlateTracker()
+    if pipeline.motion_gate is not None:
+        pipeline.motion_gate = MotionGate()
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    records = []
+    position = start
+    while end is None or position < end:
+        # 帧序号从1开始，与流式处理一致：只处理序号为 skip_frames 整数倍的帧
+        index = position + 1
+        position += 1
+        if index % skip_frames != 0:
+            if not cap.grab():
+                break
+            continue
+        success, frame = cap.read()
+        if not success:
+            break
+        boxes, license_list, conf_list, track_ids = pipeline.process_frame(frame)
+        records.append({
+            'frame': index,
+            'time': round(index / fps, 3),
+            'plates': [{'text': text, 'conf': float(conf), 'box': list(map(int, box)),
+                        'track_id': tid}
+                       for box, text, conf, tid in zip(boxes, license_list, conf_list, track_ids)],
+        })
+    cap.release()
+    return segment_id, records
+
+
+def run_parallel(args, video_path):
+    """
+    离线并行模式：按时间段分片到多进程，结果按帧序合并写入JSONL时间线
+    各段的跟踪ID加上偏移量后全局唯一
+    """
+    cap = cv2.VideoCapture(video_path)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total_frames <= 0:
+        print("✗ 错误: 无法获取视频总帧数，不能分段并行处理")
+        return
+
+    timeline_path = args.timeline or os.path.join(
+        settings.OUTPUT_DIR, os.path.splitext(os.path.basename(video_path))[0] + '_timeline.jsonl')
+    os.makedirs(os.path.dirname(os.path.abspath(timeline_path)), exist_ok=True)
+
+    segments = split_segments(total_frames, args.workers)
+    tasks = [(i, video_path, start, end, max(1, args.skip_frames)) for i, (start, end) in enumerate(segments)]
+    print(f"并行模式: {len(segments)} 段 | 工作进程: {args.workers}")
+    print(f"时间线输出: {timeline_path}\n")
+    if args.output or not args.no_display:
+        print("提示: 并行模式不显示画面、不写出视频\n")
+
+    processed = 0
+    track_offset = 0
+    plates = {}
+    start_time = time.time()
+    with open(timeline_path, 'w', encoding='utf-8') as f, \
+            Pool(args.workers, initializer=init_worker,
+                 initargs=(args.backend, args.rec_backend, not args.no_track, args.motion_gate,
+                           args.threads, args.tiled, args.coarse, args.refine,
+                           load_roi(video_path, args.roi), args.rec_cache)) as pool:
+        # imap 按段序返回，时间线可以边处理边顺序写出
+        for _, records in pool.imap(process_segment, tasks):
+            max_track = 0
+            for record in records:
+                for plate in record['plates']:
+                    if plate['track_id'] is not None:
+                        max_track = max(max_track, plate['track_id'])
+                        plate['track_id'] += track_offset
+                    if plate['text'] != '无法识别':
+                        first, last = plates.get(plate['text'], (record['time'], record['time']))
+                        plates[plate['text']] = (min(first, record['time']), max(last, record['time']))
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            track_offset += max_track
+            processed += len(records)
+            elapsed = time.time() - start_time
+            print(f"\r已处理帧数: {processed} | 速度: {processed / elapsed:.1f} 帧/秒", end='', flush=True)
+
+    elapsed = time.time() - start_time
+    print(f"\n\n{'='*60}")
+    print("处理完成!")
+    print(f"{'='*60}")
+    print(f"  处理帧数: {processed}")
+    print(f"  识别到的车牌: {len(plates)}")
+    for text, (first, last) in sorted(plates.items(), key=lambda item: item[1]):
+        print(f"    {text}  {first:.1f}s - {last:.1f}s")
+    print(f"  总耗时: {elapsed:.2f} 秒（含模型加载）")
+    print(f"  平均速度: {processed / elapsed:.2f} 帧/秒")
+    print(f"  时间线已保存到: {timeline_path}")
+    print(f"{'='*60}")
+
+
 def main():
     # 解析命令行参数
     parser = argparse.ArgumentParser(description='车牌检测与识别 - 视频模式')
@@ -42,6 +220,53 @@ def main():
                        help='显示缩放比例（默认0.5）')
     parser.add_argument('--skip-frames', type=int, default=1,
                        help='跳帧处理（默认1，即每帧都处理）')
+    parser.add_argument('--backend', type=str, default=None,
+                       choices=['torch', 'onnxruntime', 'openvino'],
+                       help='检测推理后端（默认使用配置中的DETECT_BACKEND）')
+    parser.add_argument('--tiled', action='store_true',
+                       help='大尺寸帧切片检测（长边超过DETECT_TILE_MIN_SIZE时切成重叠切片，提高远处小车牌的召回）')
+    parser.add_argument('--coarse', action='store_true',
+                       help='在缩小的帧上粗检测（DETECT_COARSE_IMGSZ），识别裁剪仍取自原始分辨率帧')
+    parser.add_argument('--refine', action='store_true',
+                       help='粗检测后在外扩区域上做小尺寸精修检测以收紧边界框（需配合 --coarse）')
+    parser.add_argument('--roi', type=str, default=None,
+                       help='感兴趣区域多边形 "x1,y1;x2,y2;..."（坐标不大于1时按帧宽高比例；默认使用配置中的ROI_POLYGONS）')
+    parser.add_argument('--rec-backend', type=str, default=None,
+                       choices=['paddle', 'onnxruntime'],
+                       help='识别推理后端（默认使用配置中的REC_BACKEND）')
+    parser.add_argument('--rec-cache', action='store_true',
+                       help='开启识别结果缓存（按车牌裁剪的感知哈希复用识别结果，默认关闭）')
+    parser.add_argument('--no-track', action='store_true',
+                       help='关闭车牌跟踪（每帧都做识别）')
+    parser.add_argument('--motion-gate', action='store_true',
+                       help='开启运动门控（画面静止时跳过检测）')
+    parser.add_argument('--writer', type=str, default=None,
+                       choices=['opencv', 'ffmpeg'],
+                       help='输出视频编码后端（默认使用配置中的WRITER_BACKEND）')
+    parser.add_argument('--preset', type=str, default=None,
+                       help='ffmpeg后端的x264预设（如 ultrafast / veryfast / medium）')
+    parser.add_argument('--crf', type=int, default=None,
+                       help='ffmpeg后端的x264质量参数（越小质量越高）')
+    parser.add_argument('--writer-drop', action='store_true',
+                       help='编码跟不上时丢弃待写入的帧（默认阻塞等待）')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                       help='离线并行模式的工作进程数（大于1时按时间段分片并行处理，只输出时间线）')
+    parser.add_argument('--threads', type=int, default=1,
+                       help='并行模式下每个工作进程的计算线程数（默认1）')
+    parser.add_argument('--timeline', type=str, default=None,
+                       help='并行模式的JSONL时间线输出路径（默认outputs/<视频名>_timeline.jsonl）')
+    parser.add_argument('--target-fps', type=float, default=None,
+                       help='自适应质量控制的目标帧率（超出预算时依次降低识别频率、检测尺寸并增加跳帧，负载回落后恢复）')
+    parser.add_argument('--target-latency-ms', type=float, default=None,
+                       help='自适应质量控制的目标端到端延迟（毫秒，从采集到输出）')
+    parser.add_argument('--adapt-log', type=str, default=None,
+                       help='自适应调整决策的JSONL日志路径')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                       help='在本机该端口提供 /metrics（Prometheus）和 /metrics.json 端点')
+    parser.add_argument('--metrics-file', type=str, default=None,
+                       help='定期写入Prometheus文本文件的路径')
+    parser.add_argument('--metrics-json', type=str, default=None,
+                       help='结束时写入各阶段耗时JSON汇总的路径')
 
     args = parser.parse_args()
 
@@ -60,19 +285,37 @@ def main():
         return
 
     print(f"输入视频: {video_path}")
+
+    if args.workers > 1:
+        run_parallel(args, video_path)
+        return
+
     print(f"正在加载模型...")
 
     try:
         # 创建检测识别流程
-        pipeline = PlatePipeline()
+        detector = PlateDetector(backend=args.backend, tiled=args.tiled, coarse=args.coarse, refine=args.refine)
+        pipeline = PlatePipeline(detector=detector,
+                                 recognizer=create_recognizer(args.rec_backend, cache_size=(
+                                     settings.REC_CACHE_OPT_IN_SIZE if args.rec_cache else None)),
+                                 tracker=None if args.no_track else PlateTracker(),
+                                 motion_gate=MotionGate() if args.motion_gate else None,
+                                 quality_gate=None if args.no_track else QualityGate(),
+                                 roi=load_roi(video_path, args.roi))
         print("✓ 模型加载成功\n")
 
+        metrics = pipeline.metrics
+        metrics_server = metrics.serve_http(args.metrics_port) if args.metrics_port else None
+        metrics_writer = metrics.start_textfile_writer(args.metrics_file) if args.metrics_file else None
+
         # 打开视频
         cap = cv2.VideoCapture(video_path)
 
         if not cap.isOpened():
             print("✗ 错误: 无法打开视频文件")
             return
+        # 后台线程提前解码到预分配的缓冲区中，与推理并行；跳过的帧只 grab() 不解码
+        cap = FrameReader(cap, skip_frames=args.skip_frames)
 
         # 获取视频信息
         fps = int(cap.get(cv2.CAP_PROP_FPS))
@@ -86,71 +329,75 @@ def main():
         # 准备输出视频
         out = None
         if args.output:
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(args.output, fourcc, fps, (width, height))
+            # 编码在独立线程中进行；跳帧时按实际写入的帧率输出
+            out = create_writer(args.output, fps / max(1, args.skip_frames) if fps > 0 else None,
+                                (width, height), backend=args.writer, preset=args.preset, crf=args.crf,
+                                policy='drop' if args.writer_drop else None)
 
         frame_count = 0
         detected_count = 0
         start_time = time.time()
-        paused = False
 
-        print("开始处理...")
+        # 自适应质量控制（指定了目标帧率或延迟时启用）
+        controller = None
+        if args.target_fps or args.target_latency_ms:
+            controller = AdaptiveController(
+                target_fps=args.target_fps,
+                target_latency=args.target_latency_ms / 1000 if args.target_latency_ms else None,
+                on_decision=lambda d: print(f"\n自适应调整 {format_decision(d)}"),
+                log_path=args.adapt_log)
 
-        while cap.isOpened():
-            if not paused:
-                success, frame = cap.read()
-                if not success:
-                    break
-
-                frame_count += 1
-
-                # 跳帧处理
-                if frame_count % args.skip_frames != 0:
-                    continue
-
-                # 处理帧
-                boxes, license_list, conf_list = pipeline.process_image(frame)
-
-                if boxes:
-                    detected_count += 1
-                    frame = pipeline.draw_results(frame, boxes, license_list)
+        print("开始处理...")
 
-                # 计算FPS
-                elapsed = time.time() - start_time
-                current_fps = frame_count / elapsed if elapsed > 0 else 0
+        window_name = "视频车牌检测 (q:退出 p:暂停)"
+        # 采集、检测、识别、绘制/编码在各自线程中并行，这里只负责显示和统计
+        stream = pipeline.process_stream(cap, writer=out, controller=controller)
+        for result in stream:
+            frame_count = result.index
+            if result.boxes:
+                detected_count += 1
 
-                # 打印进度
-                current_plates = ', '.join(license_list) if license_list else '无'
-                print_progress(frame_count, detected_count, current_fps, current_plates)
+            # 计算FPS
+            elapsed = time.time() - start_time
+            current_fps = frame_count / elapsed if elapsed > 0 else 0
 
-                # 保存到输出视频
-                if out:
-                    out.write(frame)
+            # 打印进度
+            current_plates = format_plates(result.license_list, result.track_ids) or '无'
+            print_progress(frame_count, detected_count, current_fps, current_plates)
 
             # 显示结果
             if not args.no_display:
-                display_frame = cv2.resize(frame, dsize=None, fx=args.scale, fy=args.scale,
-                                          interpolation=cv2.INTER_LINEAR)
-
-                # 添加状态文本
-                status = "暂停" if paused else "播放中"
-                cv2.putText(display_frame, status, (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-                cv2.imshow("视频车牌检测 (q:退出 p:暂停)", display_frame)
-
-                key = cv2.waitKey(1) & 0xFF
+                with metrics.timer('display'):
+                    show_frame(window_name, result.frame, args.scale, "播放中")
+                    key = cv2.waitKey(1) & 0xFF
                 if key == ord("q"):
                     break
                 elif key == ord("p"):
-                    paused = not paused
-
-        # 清理
+                    # 暂停时不再取新帧，上游队列写满后各阶段自然阻塞
+                    show_frame(window_name, result.frame, args.scale, "暂停")
+                    while True:
+                        key = cv2.waitKey(30) & 0xFF
+                        if key in (ord("p"), ord("q")):
+                            break
+                    if key == ord("q"):
+                        break
+
+        # 清理（先停止各阶段线程，再释放采集和写入器）
+        stream.close()
         cap.release()
         if out:
             out.release()
         cv2.destroyAllWindows()
 
+        # 导出指标
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        if metrics_writer is not None:
+            metrics_writer.set()
+            metrics.write_prometheus(args.metrics_file)
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+
         # 打印统计信息
         elapsed = time.time() - start_time
         print(f"\n\n{'='*60}")
@@ -158,10 +405,25 @@ def main():
         print(f"{'='*60}")
         print(f"  总帧数: {frame_count}")
         print(f"  检测到车牌的帧数: {detected_count}")
+        print(f"  识别次数: {pipeline.ocr_count} | 质量门控跳过: {pipeline.rejected_count}")
+        if pipeline.roi is not None:
+            print(f"  感兴趣区域外丢弃: {metrics.counter('roi_discarded')} 个检测框")
+        if pipeline.motion_gate is not None:
+            print(f"  运动门控跳过检测: {pipeline.motion_gate.skipped}/{pipeline.motion_gate.checked} 帧")
+        if hasattr(pipeline.recognizer, 'stats'):
+            cache = pipeline.recognizer.stats()
+            print(f"  识别缓存: 命中 {cache['hits']} | 未命中 {cache['misses']} | 命中率 {cache['hit_rate']:.1%}")
         print(f"  总耗时: {elapsed:.2f} 秒")
         print(f"  平均FPS: {frame_count/elapsed:.2f}")
         if args.output:
-            print(f"  输出已保存到: {args.output}")
+            print(f"  输出已保存到: {args.output}（写入 {out.written} 帧，丢弃 {out.dropped} 帧）")
+        if controller is not None:
+            controller.close()
+            print(f"  自适应调整: {len(controller.decisions)} 次 | 最终参数: {format_state(controller.state)}")
+        print("  各阶段耗时:")
+        print('\n'.join(format_stage_table(metrics.summary())))
+        if args.metrics_json:
+            print(f"  指标汇总已保存到: {args.metrics_json}")
         print(f"{'='*60}")
 
     except Exception as e:
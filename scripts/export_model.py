@@ -0,0 +1,172 @@
+# coding:utf-8
+"""
+模型导出脚本
+将YOLO权重（best.pt）导出为 ONNX / OpenVINO 格式，并可与torch后端做一致性校验
+"""
+import sys
+import os
+import argparse
+import glob
+import shutil
+import subprocess
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import settings
+from src.core.backends import create_backend
+from src.utils.preprocess import load_image
+
+# 导出格式 -> 对应的检测后端
+FORMAT_BACKENDS = {
+    'onnx': 'onnxruntime',
+    'openvino': 'openvino',
+}
+
+
+def print_header():
+    """打印程序头部信息"""
+    print("=" * 60)
+    print("           车牌检测与识别系统 - 模型导出")
+    print("=" * 60)
+    print()
+
+
+def export(weights, fmt, imgsz, dynamic=True):
+    """
+    导出模型
+    :param weights: YOLO权重路径
+    :param fmt: 导出格式（onnx / openvino）
+    :param imgsz: 模型输入边长
+    :param dynamic: 是否导出动态批维度（批量检测需要）
+    :return: 导出文件路径
+    """
+    from ultralytics import YOLO
+    model = YOLO(weights, task='detect')
+    return model.export(format=fmt, imgsz=imgsz, dynamic=dynamic)
+
+
+def export_rec_onnx(rec_model_dir, save_file, opset=11):
+    """
+    使用paddle2onnx将PP-OCRv4识别模型转换为ONNX
+    :param rec_model_dir: Paddle识别模型目录
+    :param save_file: ONNX输出路径
+    :param opset: ONNX算子集版本
+    :return: ONNX文件路径
+    """
+    if shutil.which('paddle2onnx') is None:
+        raise RuntimeError("未找到paddle2onnx命令，请先安装: pip install paddle2onnx")
+    subprocess.run([
+        'paddle2onnx',
+        '--model_dir', rec_model_dir,
+        '--model_filename', 'inference.pdmodel',
+        '--params_filename', 'inference.pdiparams',
+        '--save_file', save_file,
+        '--opset_version', str(opset),
+    ], check=True)
+    return save_file
+
+
+def box_iou(a, b):
+    """
+    计算两组边界框的IoU矩阵
+    :param a: (N, 4)
+    :param b: (M, 4)
+    :return: (N, M)
+    """
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:4] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:4] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def verify_parity(backend_name, model_path, images, imgsz, weights=None, min_iou=0.9, max_conf_diff=0.05):
+    """
+    与torch后端对比检测结果
+    :param backend_name: 待校验的后端名称
+    :param model_path: 待校验的模型路径
+    :param images: 测试图片路径列表
+    :param imgsz: 模型输入边长
+    :param weights: 导出所用的YOLO权重路径（torch参考后端加载，默认使用配置中的权重）
+    :param min_iou: 对应框的最小IoU
+    :param max_conf_diff: 对应框的最大置信度差
+    :return: 是否一致
+    """
+    reference = create_backend('torch', weights, imgsz=imgsz)
+    candidate = create_backend(backend_name, model_path, imgsz=imgsz)
+
+    ok = True
+    worst_iou, worst_conf = 1.0, 0.0
+    for path in images:
+        frame = load_image(path)
+        ref = reference.predict([frame])[0]
+        out = candidate.predict([frame])[0]
+        if len(ref) != len(out):
+            print(f"  ✗ 检测数量不一致 ({len(ref)} vs {len(out)}): {os.path.basename(path)}")
+            ok = False
+            continue
+        if len(ref) == 0:
+            continue
+        iou = box_iou(ref[:, :4], out[:, :4])
+        match = iou.argmax(1)
+        worst_iou = min(worst_iou, float(iou[np.arange(len(ref)), match].min()))
+        worst_conf = max(worst_conf, float(np.abs(ref[:, 4] - out[match, 4]).max()))
+
+    ok = ok and worst_iou >= min_iou and worst_conf <= max_conf_diff
+    print(f"  最小IoU: {worst_iou:.4f} | 最大置信度差: {worst_conf:.4f}")
+    print(f"  {'✓' if ok else '✗'} {backend_name} 与 torch 后端{'一致' if ok else '不一致'}")
+    return ok
+
+
+def main():
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='车牌检测与识别 - 模型导出')
+    parser.add_argument('--weights', '-w', type=str, default=settings.YOLO_MODEL_PATH,
+                       help='YOLO权重路径（默认models/yolo/best.pt）')
+    parser.add_argument('--format', '-f', type=str, default='all',
+                       choices=['onnx', 'openvino', 'all'],
+                       help='导出格式（默认all）')
+    parser.add_argument('--imgsz', type=int, default=settings.DETECT_IMGSZ,
+                       help='模型输入边长（默认640）')
+    parser.add_argument('--verify', action='store_true',
+                       help='导出后在测试图片上与torch后端做一致性校验')
+    parser.add_argument('--rec', action='store_true',
+                       help='同时将PP-OCRv4识别模型转换为ONNX（供onnxruntime识别后端使用）')
+
+    args = parser.parse_args()
+
+    print_header()
+
+    if not os.path.exists(args.weights):
+        print(f"✗ 错误: 权重文件不存在: {args.weights}")
+        return
+
+    formats = list(FORMAT_BACKENDS) if args.format == 'all' else [args.format]
+    images = sorted(glob.glob(os.path.join(settings.TEST_IMAGES_DIR, '*.jpg')))
+
+    all_ok = True
+    for fmt in formats:
+        print(f"正在导出 {fmt} ...")
+        path = export(args.weights, fmt, args.imgsz)
+        print(f"✓ 已导出: {path}\n")
+
+        if args.verify:
+            print(f"正在校验 {fmt} ({len(images)} 张测试图片)...")
+            all_ok = verify_parity(FORMAT_BACKENDS[fmt], path, images, args.imgsz, args.weights) and all_ok
+            print()
+
+    if args.rec:
+        print("正在转换识别模型为 ONNX ...")
+        path = export_rec_onnx(settings.PADDLE_REC_MODEL, settings.PADDLE_REC_ONNX)
+        print(f"✓ 已导出: {path}\n")
+
+    if args.verify and not all_ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# coding:utf-8
+"""
+推理服务压测脚本
+按给定的并发数逐级向本地推理服务发送图像请求（闭环：每个客户端收到响应后立即发下一个），
+统计每一级的吞吐量、延迟分位数和平均批大小，用于权衡 max_batch / max_wait 设置
+"""
+import sys
+import os
+import argparse
+import glob
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import settings
+
+
+def print_header():
+    """打印程序头部信息"""
+    print("=" * 60)
+    print("           车牌检测与识别系统 - 推理服务压测")
+    print("=" * 60)
+    print()
+
+
+def load_payloads(source):
+    """
+    读取待发送的图像文件字节
+    :param source: 图片路径、目录或通配符
+    :return: 字节串列表
+    """
+    if os.path.isdir(source):
+        paths = [p for ext in ('*.jpg', '*.jpeg', '*.png') for p in glob.glob(os.path.join(source, ext))]
+    else:
+        paths = glob.glob(source)
+    payloads = []
+    for path in sorted(paths):
+        with open(path, 'rb') as f:
+            payloads.append(f.read())
+    return payloads
+
+
+def get_json(url, timeout=5.0):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def run_level(url, payloads, concurrency, duration, timeout):
+    """
+    以固定并发数压测一段时间
+    :return: 该级别的统计字典
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        local, failed = [], 0
+        i = offset
+        while time.perf_counter() < deadline:
+            data = payloads[i % len(payloads)]
+            i += concurrency
+            request = urllib.request.Request(f"{url}/recognize", data=data,
+                                             headers={'Content-Type': 'application/octet-stream'})
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+                local.append(time.perf_counter() - start)
+            except (urllib.error.URLError, OSError):
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    before = get_json(f"{url}/health")
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    after = get_json(f"{url}/health")
+
+    batches = after['batches'] - before['batches']
+    items = after['items'] - before['items']
+    result = {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'mean_batch_size': items / batches if batches else 0.0,
+    }
+    if latencies:
+        p50, p95, p99 = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99])
+        result.update({'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99)})
+    else:
+        result.update({'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0})
+    return result
+
+
+def main():
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='车牌检测与识别 - 推理服务压测')
+    parser.add_argument('--url', type=str, default=None,
+                       help=f'服务地址（默认 http://{settings.SERVER_HOST}:{settings.SERVER_PORT}）')
+    parser.add_argument('--input', '-i', type=str, default=None,
+                       help='请求使用的图片路径、目录或通配符（默认使用测试图片目录）')
+    parser.add_argument('--concurrency', '-c', type=str, default='1,2,4,8,16',
+                       help='逗号分隔的并发数列表，逐级压测（默认 1,2,4,8,16）')
+    parser.add_argument('--duration', '-d', type=float, default=10.0,
+                       help='每一级的压测时长（秒）')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                       help='单个请求的超时时间（秒）')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                       help='JSON报告输出路径（可选）')
+
+    args = parser.parse_args()
+
+    print_header()
+
+    url = (args.url or f"http://{settings.SERVER_HOST}:{settings.SERVER_PORT}").rstrip('/')
+    payloads = load_payloads(args.input or settings.TEST_IMAGES_DIR)
+    if not payloads:
+        print(f"✗ 错误: 没有找到图片: {args.input or settings.TEST_IMAGES_DIR}")
+        return
+    try:
+        levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    except ValueError:
+        print(f"✗ 错误: 无效的并发数列表: {args.concurrency}")
+        return
+
+    try:
+        get_json(f"{url}/health")
+    except (urllib.error.URLError, OSError) as e:
+        print(f"✗ 错误: 无法连接服务 {url}: {e}")
+        return
+
+    print(f"服务地址: {url} | 图片: {len(payloads)} 张 | 每级时长: {args.duration:.0f}s\n")
+    print(f"  {'并发':>6}{'请求数':>8}{'错误':>6}{'吞吐(张/秒)':>13}{'平均批大小':>11}"
+          f"{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+
+    results = []
+    for concurrency in levels:
+        r = run_level(url, payloads, concurrency, args.duration, args.timeout)
+        results.append(r)
+        print(f"  {r['concurrency']:>6}{r['requests']:>8}{r['errors']:>6}{r['throughput']:>13.1f}"
+              f"{r['mean_batch_size']:>11.2f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}")
+
+    if args.output:
+        output_dir = os.path.dirname(args.output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'duration': args.duration, 'levels': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n报告已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
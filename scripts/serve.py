@@ -0,0 +1,88 @@
+# coding:utf-8
+"""
+本地推理服务脚本
+常驻加载模型，在本机提供 POST /recognize（上传图像字节，返回JSON车牌结果）、
+GET /health 和 GET /metrics 端点；并发请求按最大等待窗口合并成微批次处理
+"""
+import sys
+import os
+import argparse
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.pipeline import PlatePipeline
+from src.core.detector import PlateDetector
+from src.core.recognizer import create_recognizer
+from src.config import settings
+
+
+def print_header():
+    """打印程序头部信息"""
+    print("=" * 60)
+    print("           车牌检测与识别系统 - 本地推理服务")
+    print("=" * 60)
+    print()
+
+
+def main():
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='车牌检测与识别 - 本地推理服务')
+    parser.add_argument('--host', type=str, default=None,
+                       help='监听地址（默认使用配置中的SERVER_HOST，仅本机）')
+    parser.add_argument('--port', '-p', type=int, default=None,
+                       help='监听端口（默认使用配置中的SERVER_PORT）')
+    parser.add_argument('--max-batch', type=int, default=None,
+                       help='单个微批次的最大图像数（默认使用配置中的SERVER_MAX_BATCH）')
+    parser.add_argument('--max-wait-ms', type=float, default=None,
+                       help='凑批的最大等待时间（毫秒，默认使用配置中的SERVER_MAX_WAIT）')
+    parser.add_argument('--backend', type=str, default=None,
+                       choices=['torch', 'onnxruntime', 'openvino'],
+                       help='检测推理后端（默认使用配置中的DETECT_BACKEND）')
+    parser.add_argument('--rec-backend', type=str, default=None,
+                       choices=['paddle', 'onnxruntime'],
+                       help='识别推理后端（默认使用配置中的REC_BACKEND）')
+
+    args = parser.parse_args()
+
+    print_header()
+    print("正在加载模型...")
+
+    try:
+        pipeline = PlatePipeline(detector=PlateDetector(backend=args.backend),
+                                 recognizer=create_recognizer(args.rec_backend))
+        print("✓ 模型加载成功\n")
+
+        max_wait = args.max_wait_ms / 1000 if args.max_wait_ms is not None else None
+        server = pipeline.serve(host=args.host, port=args.port, max_batch=args.max_batch, max_wait=max_wait)
+        batcher = server.batcher
+        print(f"服务地址: {server.url}")
+        print(f"  POST {server.url}/recognize  (请求体为图像文件字节)")
+        print(f"  GET  {server.url}/health")
+        print(f"  GET  {server.url}/metrics")
+        print(f"微批次: 最多 {batcher.max_batch} 张 | 最长等待 {batcher.max_wait * 1000:.1f} ms")
+        print("\n按 Ctrl+C 停止...\n")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        server.shutdown()
+
+        stats = batcher.stats()
+        print(f"\n{'='*60}")
+        print("服务已停止")
+        print(f"{'='*60}")
+        print(f"  请求数: {stats['items']}")
+        print(f"  批次数: {stats['batches']} (平均 {stats['mean_batch_size']:.2f} 张/批)")
+        print(f"  识别次数: {pipeline.ocr_count} | 质量门控跳过: {pipeline.rejected_count}")
+        print(f"{'='*60}")
+
+    except Exception as e:
+        print(f"\n✗ 处理过程中出错: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# coding:utf-8
+"""
+本地测试流服务脚本
+把本地视频文件按原始帧率循环编码为MJPEG，通过本机HTTP提供（http://127.0.0.1:<端口>/video.mjpg），
+用于在没有网络摄像头时测试网络流读取、断线重连和只取最新帧模式
+"""
+import sys
+import os
+import argparse
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import settings
+
+# multipart 分隔符
+BOUNDARY = 'frame'
+
+
+class FrameBroadcaster:
+    """循环读取视频文件并编码为JPEG，所有连接共享最新的一帧"""
+
+    def __init__(self, video_path, quality=80):
+        """
+        :param video_path: 视频文件路径
+        :param quality: JPEG质量
+        """
+        self.video_path = video_path
+        self.quality = quality
+        self.jpeg = None
+        self.sequence = 0
+        self.cond = threading.Condition()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def _loop(self):
+        cap = cv2.VideoCapture(self.video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25
+        interval = 1.0 / fps
+        next_time = time.perf_counter()
+        while True:
+            success, frame = cap.read()
+            if not success:
+                # 读到结尾后从头循环
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            ok, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if ok:
+                with self.cond:
+                    self.jpeg = data.tobytes()
+                    self.sequence += 1
+                    self.cond.notify_all()
+            next_time += interval
+            time.sleep(max(0.0, next_time - time.perf_counter()))
+
+    def wait_frame(self, last_sequence):
+        """等待比 last_sequence 更新的一帧"""
+        with self.cond:
+            self.cond.wait_for(lambda: self.sequence != last_sequence)
+            return self.sequence, self.jpeg
+
+
+def make_handler(broadcaster):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != '/video.mjpg':
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', f'multipart/x-mixed-replace; boundary={BOUNDARY}')
+            self.end_headers()
+            sequence = 0
+            try:
+                while True:
+                    sequence, jpeg = broadcaster.wait_frame(sequence)
+                    self.wfile.write(f'--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n'
+                                     f'Content-Length: {len(jpeg)}\r\n\r\n'.encode('ascii'))
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b'\r\n')
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    # 解析命令行参数
+    parser = argparse.ArgumentParser(description='车牌检测与识别 - 本地测试流服务')
+    parser.add_argument('--video', '-v', type=str,
+                       default=os.path.join(settings.ROOT_DIR, "data", "test_images", "1.mp4"),
+                       help='循环播放的视频文件')
+    parser.add_argument('--port', '-p', type=int, default=8554,
+                       help='HTTP端口（默认8554）')
+    parser.add_argument('--quality', type=int, default=80,
+                       help='JPEG质量（默认80）')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.video):
+        print(f"✗ 错误: 视频文件不存在: {args.video}")
+        return
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(FrameBroadcaster(args.video, args.quality)))
+    server.daemon_threads = True
+    print(f"测试流地址: http://127.0.0.1:{args.port}/video.mjpg")
+    print("按 Ctrl+C 停止（停止后再启动可测试断线重连）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,9 +10,13 @@ ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 
 # 模型路径配置
 YOLO_MODEL_PATH = os.path.join(ROOT_DIR, 'models', 'yolo', 'best.pt')
+YOLO_ONNX_PATH = os.path.join(ROOT_DIR, 'models', 'yolo', 'best.onnx')
+YOLO_OPENVINO_PATH = os.path.join(ROOT_DIR, 'models', 'yolo', 'best_openvino_model')
 PADDLE_CLS_MODEL = os.path.join(ROOT_DIR, 'models', 'paddle', 'cls', 'ch_ppocr_mobile_v2.0_cls_infer')
 PADDLE_DET_MODEL = os.path.join(ROOT_DIR, 'models', 'paddle', 'det', 'ch', 'ch_PP-OCRv4_det_infer')
 PADDLE_REC_MODEL = os.path.join(ROOT_DIR, 'models', 'paddle', 'rec', 'ch', 'ch_PP-OCRv4_rec_infer')
+PADDLE_REC_ONNX = os.path.join(PADDLE_REC_MODEL, 'inference.onnx')
+PADDLE_REC_DICT = os.path.join(PADDLE_REC_MODEL, 'ppocr_keys_v1.txt')
 
 # 字体路径
 FONT_PATH = os.path.join(ROOT_DIR, 'assets', 'fonts', 'platech.ttf')
@@ -33,8 +37,123 @@ CH_NAMES = ['车牌']
 # 检测参数
 CONF_THRESHOLD = 0.25  # 置信度阈值
 IOU_THRESHOLD = 0.7    # NMS的IoU阈值
+DETECT_BACKEND = 'torch'  # 检测推理后端: torch / onnxruntime / openvino
+DETECT_IMGSZ = 640     # 检测模型输入边长
+DETECT_BATCH_SIZE = 4  # 多帧批量检测的默认批大小
+DETECT_BATCH_CANDIDATES = (1, 2, 4, 8)  # 启动测速时的候选批大小
+DETECT_PROBE_SHAPE = (720, 1280, 3)     # 启动测速使用的帧尺寸 (H, W, C)
+DETECT_INPUT_BUFFERS = 8            # 张量后端每个线程缓存的预分配输入缓冲区数（按批大小和输入边长区分）
+DETECT_TILED = False                # 是否对大尺寸帧做切片检测
+DETECT_TILE_SIZE = 960              # 切片边长（像素）
+DETECT_TILE_OVERLAP = 0.2           # 相邻切片的重叠比例
+DETECT_TILE_MIN_SIZE = 1920         # 帧的长边超过该值时才切片
+DETECT_TILE_FULL_FRAME = True       # 切片时是否同时检测缩小的整帧（找回跨切片的大车牌）
+DETECT_TILE_BATCH_SIZE = 16         # 切片检测单次前向推理的切片数
+DETECT_TILE_MERGE_THRESHOLD = 0.6   # 合并切片结果的重叠度阈值（交集占较小框面积的比例）
+DETECT_COARSE = False               # 是否在缩小的帧上做粗检测（识别裁剪仍取自原始分辨率帧）
+DETECT_COARSE_IMGSZ = 320           # 粗检测的输入边长
+DETECT_COARSE_PAD = 0.1             # 粗检测框映射回原图后每边外扩的比例（相对框宽/高）
+DETECT_REFINE = False               # 是否在外扩区域上做第二次小尺寸检测以收紧边界框
+DETECT_REFINE_IMGSZ = 160           # 精修检测的输入边长
+
+# 识别参数
+REC_BACKEND = 'paddle'  # 识别推理后端: paddle / onnxruntime
+REC_IMAGE_SHAPE = (3, 48, 320)  # 识别模型输入形状 (C, H, W)，ONNX后端使用
+REC_BATCH_NUM = 16     # 单次识别前向推理的最大车牌数
+REC_CACHE_SIZE = 0     # 识别结果缓存条目数，0表示关闭缓存（默认关闭，命令行用 --rec-cache 开启）
+REC_CACHE_OPT_IN_SIZE = 512    # --rec-cache 开启缓存时的条目数
+REC_CACHE_TTL = 5.0    # 识别结果缓存有效期（秒）
+REC_CACHE_HASH_SIZE = (16, 8)  # 感知哈希的低频DCT系数块大小 (宽, 高)，共127个比特
+REC_CACHE_MAX_DISTANCE = 0     # 视为同一车牌的最大汉明距离，0表示只接受完全相同的哈希（只差一个字符的车牌可低至8，同一车牌加噪/压缩/抖动后可达12）
+
+# 识别前质量门控参数（不合格的车牌裁剪跳过识别，开启跟踪时在后续帧重试）
+QUALITY_GATE = False            # 是否默认开启质量门控（视频/摄像头/多路流开启跟踪时由脚本单独开启）
+QUALITY_MIN_WIDTH = 24          # 最小宽度（像素）
+QUALITY_MIN_HEIGHT = 8          # 最小高度（像素）
+QUALITY_ASPECT_RANGE = (1.2, 8.0)   # 宽高比允许范围（单层牌约3.1，双层牌约2）
+QUALITY_MIN_SHARPNESS = 50.0    # 最小清晰度（拉普拉斯方差，正常车牌通常在1000以上）
+QUALITY_MIN_CONF = 0.3          # 最小检测置信度
+QUALITY_SHARPNESS_SIZE = (96, 32)   # 计算清晰度时缩放到的尺寸 (宽, 高)
+
+# 感兴趣区域（ROI）：按视频源配置多边形，只检测其外接矩形，中心点在多边形外的车牌不识别
+# 键为设备ID、网络流地址、文件路径或文件名；顶点坐标全部不大于1时按帧宽高的比例解释
+# 例: ROI_POLYGONS = {'0': [[0, 0.45], [1, 0.45], [1, 1], [0, 1]]}
+ROI_POLYGONS = {}
+
+# 跟踪参数（视频/摄像头模式下每个车牌只识别一次）
+TRACK_IOU_THRESHOLD = 0.3   # 检测框与跟踪关联的最小IoU
+TRACK_MAX_AGE = 30          # 跟踪允许连续丢失的最大帧数
+TRACK_OCR_CONF = 0.9        # 融合置信度低于该值时周期性重新识别
+TRACK_REOCR_INTERVAL = 10   # 低置信度跟踪重新识别的帧间隔
+TRACK_MAX_READS = 5         # 每个跟踪最多识别次数
+
+# 运动门控参数（画面静止时跳过检测）
+MOTION_WIDTH = 160              # 帧差计算使用的缩小宽度
+MOTION_PIXEL_THRESHOLD = 25     # 灰度差大于该值的像素视为变化
+MOTION_AREA_THRESHOLD = 0.002   # 变化像素占比超过该值时视为有运动
+MOTION_FORCE_INTERVAL = 50      # 连续跳过该帧数后强制检测一次
+
+# 流式处理参数
+STREAM_QUEUE_SIZE = 8       # 各阶段之间队列的容量
+STREAM_OCR_WORKERS = 2      # 识别线程数
+READER_BUFFERS = 16         # 预读取读取器的帧缓冲区数量（最多提前解码的帧数）
+
+# 自适应质量控制参数（实时流按目标帧率/延迟自动调整检测尺寸、跳帧和识别频率）
+ADAPT_TARGET_FPS = None             # 目标帧率（按源帧计，None表示不约束）
+ADAPT_TARGET_LATENCY = None         # 目标端到端延迟（秒，采集到输出，None表示不约束）
+ADAPT_INTERVAL = 2.0                # 每个评估窗口的时长（秒）
+ADAPT_MIN_SAMPLES = 10              # 窗口内至少处理的帧数，不足时延长窗口
+ADAPT_QUANTILE = 0.95               # 评估延迟和单帧耗时使用的分位数
+ADAPT_HIGH_LOAD = 1.0               # 负载（实测/预算）超过该值时降一级
+ADAPT_LOW_LOAD = 0.6                # 负载连续低于该值时升一级
+ADAPT_RECOVER_WINDOWS = 3           # 连续多少个低负载窗口后才升级
+ADAPT_IMGSZ_LEVELS = (640, 512, 416, 320)   # 检测输入边长的可选档位（从高到低）
+ADAPT_MAX_SKIP = 4                  # 最大跳帧间隔
+ADAPT_MAX_REOCR_INTERVAL = 40       # 低置信度跟踪重新识别的最大帧间隔
+
+# 目录批量处理参数
+BATCH_WORKERS = max(1, (os.cpu_count() or 2) // 2)  # 工作进程数
+BATCH_SHARD_SIZE = 16       # 每个分片的图片数
+VIDEO_SEGMENT_MIN_FRAMES = 250  # 视频分段并行时每段最少帧数
+
+# 视频写入参数
+WRITER_BACKEND = 'opencv'     # 编码后端: opencv / ffmpeg
+WRITER_QUEUE_SIZE = 16        # 待编码帧缓冲区数量
+WRITER_POLICY = 'block'       # 缓冲区用尽时的策略: block 阻塞 / drop 丢帧
+WRITER_PRESET = 'veryfast'    # ffmpeg libx264 预设
+WRITER_CRF = 23               # ffmpeg libx264 质量参数（越小质量越高）
+WRITER_FPS_PROBE_FRAMES = 30  # 未指定帧率时用于测量写入速率的帧数
+WRITER_DEFAULT_FPS = 20       # 无法测得帧率时的默认帧率
+FFMPEG_PATH = 'ffmpeg'        # ffmpeg 可执行文件
+
+# 视频源参数
+SOURCE_TIMEOUT = 5.0               # 网络流打开/读取超时（秒）
+SOURCE_RECONNECT_DELAY = 0.5       # 断线后首次重连的等待时间（秒），之后按倍数增长
+SOURCE_RECONNECT_MAX_DELAY = 10.0  # 重连等待时间上限（秒）
+SOURCE_RECONNECT_ATTEMPTS = 0      # 单次断线的最大重连次数，0表示不限
+CAMERA_PROBE_IDS = 10              # 自动查找摄像头时探测的设备ID范围
+
+# 多路视频流参数
+MULTI_BATCH_SIZE = 8       # 每轮最多合并检测的帧数
+MULTI_IDLE_SLEEP = 0.005   # 各路都没有新帧时的等待时间（秒）
+
+# 推理服务参数
+SERVER_HOST = '127.0.0.1'   # 监听地址（默认仅本机）
+SERVER_PORT = 8000          # 监听端口
+SERVER_MAX_BATCH = 8        # 单个微批次的最大图像数
+SERVER_MAX_WAIT = 0.005     # 收到第一个请求后最多等待凑批的时间（秒）
+SERVER_MAX_BODY = 20 * 1024 * 1024  # 单个请求体的最大字节数
+
+# asyncio接口参数
+ASYNC_MAX_BATCH = 8         # 单个检测/识别批次的最大请求数
+ASYNC_MAX_WAIT = 0.002      # 收到第一个请求后最多等待凑批的时间（秒）
+BATCH_MAX_INFLIGHT = 2      # 微批次交给线程池/进程池执行时最多同时执行的批次数
+
+# 性能指标参数
+METRICS_WINDOW = 2048        # 分位数统计的滑动窗口大小（样本数）
+METRICS_FLUSH_INTERVAL = 10  # Prometheus文本文件写入间隔（秒）
 
 # 兼容旧版本的变量名
 save_path = OUTPUT_DIR
 model_path = YOLO_MODEL_PATH
-names = NAMES
\ No newline at end of file
+names = NAMES
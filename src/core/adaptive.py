@@ -0,0 +1,216 @@
+# coding:utf-8
+"""
+自适应质量控制模块
+实时流处理时按评估窗口统计端到端延迟和单帧处理耗时，与目标帧率/延迟预算比较：
+超出预算时按 识别频率 -> 检测输入尺寸 -> 跳帧 的顺序逐级降级，负载持续回落后按相反顺序逐级恢复，
+每次调整都记录为一条决策
+"""
+import json
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+from src.config import settings
+
+# 一次调整决策：相对启动的秒数、动作（degrade / recover / saturated）、调整后的档位、
+# 各参数的 (原值, 新值)、负载（实测/预算）、延迟分位数（毫秒）和窗口内的处理帧率
+Decision = namedtuple('Decision', ['time', 'action', 'level', 'changes', 'load', 'latency_ms', 'fps'])
+
+# 可调参数的显示名称
+KNOB_NAMES = {'reocr_interval': '重识别间隔', 'imgsz': '检测尺寸', 'skip_frames': '跳帧间隔'}
+
+
+def format_decision(decision):
+    """
+    格式化决策为一行文本
+    :param decision: Decision
+    :return: 文本
+    """
+    changes = ', '.join(f"{KNOB_NAMES.get(knob, knob)} {old}->{new}"
+                        for knob, (old, new) in decision.changes.items())
+    return (f"[{decision.time:7.1f}s] {decision.action} L{decision.level} {changes or '-'} | "
+            f"负载 {decision.load:.2f} | 延迟 {decision.latency_ms:.0f} ms | {decision.fps:.1f} 帧/秒")
+
+
+def format_state(state):
+    """
+    格式化档位参数为一行文本
+    :param state: {参数: 值}
+    :return: 文本
+    """
+    return ', '.join(f"{KNOB_NAMES.get(knob, knob)} {value}" for knob, value in state.items())
+
+
+class AdaptiveController:
+    """自适应质量控制器类"""
+
+    def __init__(self, target_fps=None, target_latency=None, interval=None, imgsz_levels=None, max_skip=None,
+                 max_reocr_interval=None, on_decision=None, log_path=None):
+        """
+        初始化控制器（至少需要一个目标）
+        :param target_fps: 目标帧率（按源帧计：跳帧后每个处理帧的预算为 跳帧间隔 / 目标帧率）
+        :param target_latency: 目标端到端延迟（秒，从采集到输出）
+        :param interval: 评估窗口时长（秒）
+        :param imgsz_levels: 检测输入边长的可选档位
+        :param max_skip: 最大跳帧间隔
+        :param max_reocr_interval: 低置信度跟踪重新识别的最大帧间隔
+        :param on_decision: 每次决策的回调 on_decision(Decision)
+        :param log_path: 决策JSONL日志路径（可选）
+        """
+        self.target_fps = target_fps or settings.ADAPT_TARGET_FPS
+        self.target_latency = target_latency or settings.ADAPT_TARGET_LATENCY
+        if not self.target_fps and not self.target_latency:
+            raise ValueError("自适应质量控制需要指定目标帧率或目标延迟")
+        self.interval = interval or settings.ADAPT_INTERVAL
+        self.imgsz_levels = imgsz_levels or settings.ADAPT_IMGSZ_LEVELS
+        self.max_skip = max_skip or settings.ADAPT_MAX_SKIP
+        self.max_reocr_interval = max_reocr_interval or settings.ADAPT_MAX_REOCR_INTERVAL
+        self.on_decision = on_decision
+        self.log_file = open(log_path, 'w', encoding='utf-8') if log_path else None
+        self.decisions = []
+        self.level = 0
+        self.ladder = []
+        self.processor = None
+        self._latencies = []
+        self._costs = []
+        self._low_windows = 0
+        self._saturated = False
+        self._settling = False
+        self._window_start = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def bind(self, processor):
+        """
+        绑定流式处理器，以当前配置为最高档生成降级档位表
+        每一档是 {参数: 值}，相邻两档只有一个参数不同
+        :param processor: StreamProcessor
+        """
+        self.processor = processor
+        pipeline = processor.pipeline
+        state = {'skip_frames': processor.skip_frames}
+        if pipeline.tracker is not None:
+            state['reocr_interval'] = pipeline.tracker.reocr_interval
+        if getattr(pipeline.detector, 'dynamic_imgsz', False):
+            state['imgsz'] = pipeline.detector.imgsz
+
+        self.ladder = [dict(state)]
+        if 'reocr_interval' in state:
+            while state['reocr_interval'] < self.max_reocr_interval:
+                state['reocr_interval'] = min(state['reocr_interval'] * 2, self.max_reocr_interval)
+                self.ladder.append(dict(state))
+        if 'imgsz' in state:
+            for imgsz in sorted(self.imgsz_levels, reverse=True):
+                if imgsz < state['imgsz']:
+                    state['imgsz'] = imgsz
+                    self.ladder.append(dict(state))
+        while state['skip_frames'] < self.max_skip:
+            state['skip_frames'] += 1
+            self.ladder.append(dict(state))
+        self.level = 0
+
+    def _apply(self, state):
+        """把档位写入处理器、跟踪器和检测器（各阶段线程下一帧读取到新值）"""
+        pipeline = self.processor.pipeline
+        self.processor.skip_frames = state['skip_frames']
+        if 'reocr_interval' in state:
+            pipeline.tracker.reocr_interval = state['reocr_interval']
+        if 'imgsz' in state:
+            pipeline.detector.imgsz = state['imgsz']
+
+    def observe(self, latency, cost):
+        """
+        记录一帧的测量值，窗口结束时评估并调整档位
+        :param latency: 该帧从采集到输出的延迟（秒）
+        :param cost: 该帧的处理耗时（秒，检测阶段耗时 + 平摊到识别线程上的识别耗时）
+        """
+        now = time.perf_counter()
+        with self._lock:
+            if self._window_start is None:
+                self._window_start = now
+            self._latencies.append(latency)
+            self._costs.append(cost)
+            elapsed = now - self._window_start
+            if elapsed < self.interval or len(self._latencies) < settings.ADAPT_MIN_SAMPLES:
+                return
+            self._evaluate(now, elapsed)
+
+    def load(self, latency, cost):
+        """
+        计算负载：各目标下实测值与预算之比的最大值
+        :param latency: 延迟分位数（秒）
+        :param cost: 单帧处理耗时分位数（秒）
+        :return: 负载，大于1表示超出预算
+        """
+        loads = []
+        if self.target_latency:
+            loads.append(latency / self.target_latency)
+        if self.target_fps:
+            skip = self.processor.skip_frames if self.processor is not None else 1
+            loads.append(cost * self.target_fps / skip)
+        return max(loads)
+
+    def _evaluate(self, now, elapsed):
+        """评估一个窗口：超出预算降一级，连续低负载升一级；调整后的第一个窗口只用于让队列中的旧帧排空，不做评估"""
+        quantile = settings.ADAPT_QUANTILE * 100
+        latency = float(np.percentile(self._latencies, quantile))
+        cost = float(np.percentile(self._costs, quantile))
+        fps = len(self._latencies) / elapsed
+        load = self.load(latency, cost)
+        self._latencies = []
+        self._costs = []
+        self._window_start = now
+        if self._settling:
+            self._settling = False
+            return
+
+        if load > settings.ADAPT_HIGH_LOAD:
+            self._low_windows = 0
+            if self.level + 1 < len(self.ladder):
+                self._change(self.level + 1, 'degrade', load, latency, fps)
+            elif not self._saturated:
+                # 已降到最低档仍超出预算，只记录一次
+                self._saturated = True
+                self._record('saturated', {}, load, latency, fps)
+        elif load < settings.ADAPT_LOW_LOAD and self.level > 0:
+            self._low_windows += 1
+            if self._low_windows >= settings.ADAPT_RECOVER_WINDOWS:
+                self._low_windows = 0
+                self._change(self.level - 1, 'recover', load, latency, fps)
+        else:
+            self._low_windows = 0
+
+    def _change(self, level, action, load, latency, fps):
+        """切换到指定档位并记录决策"""
+        old, new = self.ladder[self.level], self.ladder[level]
+        self.level = level
+        self._saturated = False
+        self._settling = True
+        self._apply(new)
+        changes = {knob: (old[knob], new[knob]) for knob in new if old[knob] != new[knob]}
+        self._record(action, changes, load, latency, fps)
+
+    def _record(self, action, changes, load, latency, fps):
+        """记录决策：保存、计数、写入日志并回调"""
+        decision = Decision(round(time.perf_counter() - self._start, 3), action, self.level, changes,
+                            round(load, 3), round(latency * 1000, 1), round(fps, 2))
+        self.decisions.append(decision)
+        if self.processor is not None:
+            self.processor.pipeline.metrics.inc(f"adapt_{action}")
+        if self.log_file is not None:
+            self.log_file.write(json.dumps(decision._asdict(), ensure_ascii=False) + '\n')
+            self.log_file.flush()
+        if self.on_decision is not None:
+            self.on_decision(decision)
+
+    @property
+    def state(self):
+        """当前档位的参数 {参数: 值}"""
+        return dict(self.ladder[self.level]) if self.ladder else {}
+
+    def close(self):
+        """关闭决策日志"""
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
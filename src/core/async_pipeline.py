@@ -0,0 +1,214 @@
+# coding:utf-8
+"""
+asyncio 接口模块
+检测和识别分别经过一个微批处理器：并发等待的协程各自提交单张图像/一组车牌，
+在等待窗口内合并成批次后交给线程池或进程池执行，事件循环不被阻塞，多个协程共享同一份模型
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from src.config import settings
+from src.core.batching import MicroBatcher
+from src.core.frame_reader import FrameReader
+from src.core.source import VideoSource
+from src.core.stream import FrameResult
+from src.core.tracker import PlateTracker
+from src.utils.preprocess import load_image
+
+# 进程池工作进程中的流程实例
+_worker_pipeline = None
+
+
+def init_worker(backend=None, rec_backend=None, threads=None):
+    """
+    进程池工作进程初始化：限制计算线程数并加载一次模型
+    :param backend: 检测推理后端
+    :param rec_backend: 识别推理后端
+    :param threads: 每个进程的计算线程数
+    """
+    global _worker_pipeline
+    import cv2
+    from src.core.detector import PlateDetector
+    from src.core.pipeline import PlatePipeline
+    from src.core.recognizer import create_recognizer
+
+    if threads:
+        os.environ['OMP_NUM_THREADS'] = str(threads)
+        cv2.setNumThreads(threads)
+    _worker_pipeline = PlatePipeline(detector=PlateDetector(backend=backend),
+                                     recognizer=create_recognizer(rec_backend))
+
+
+def create_process_executor(workers=1, backend=None, rec_backend=None, threads=None):
+    """
+    创建可用于 AsyncRunner 的进程池（每个工作进程加载一份模型）
+    :param workers: 工作进程数
+    :param backend: 检测推理后端
+    :param rec_backend: 识别推理后端
+    :param threads: 每个进程的计算线程数
+    :return: ProcessPoolExecutor
+    """
+    return ProcessPoolExecutor(workers, initializer=init_worker, initargs=(backend, rec_backend, threads))
+
+
+def recognize_groups(recognize, groups):
+    """
+    多组车牌合并成一次批量识别后按组拆分
+    :param recognize: 批量识别函数
+    :param groups: [[车牌图像, ...], ...]
+    :return: [[(车牌号, 置信度), ...], ...]，与 groups 一一对应
+    """
+    flat = [image for group in groups for image in group]
+    results = recognize(flat) if flat else []
+    outputs = []
+    start = 0
+    for group in groups:
+        outputs.append(results[start:start + len(group)])
+        start += len(group)
+    return outputs
+
+
+def detect_in_worker(images):
+    """进程池中执行的批量检测"""
+    return _worker_pipeline.detector.get_plate_detections_batch(images)
+
+
+def recognize_in_worker(groups):
+    """进程池中执行的分组批量识别"""
+    return recognize_groups(_worker_pipeline.recognizer.recognize_batch, groups)
+
+
+class AsyncRunner:
+    """PlatePipeline 的 asyncio 执行器类"""
+
+    def __init__(self, pipeline, detect_executor=None, ocr_executor=None, max_batch=None, max_wait=None,
+                 max_inflight=None):
+        """
+        初始化
+        :param pipeline: PlatePipeline 实例
+        :param detect_executor: 执行批量检测的线程池/进程池，为None时在专用线程中执行
+        :param ocr_executor: 执行批量识别的线程池/进程池，为None时在专用线程中执行
+        :param max_batch: 单个检测批次的最大图像数
+        :param max_wait: 收到批次中第一个请求后最多再等待的时间（秒）
+        :param max_inflight: 使用执行器时每个阶段最多同时执行的批次数
+        """
+        self.pipeline = pipeline
+        metrics = pipeline.metrics
+
+        # 进程池中使用工作进程自己的模型（create_process_executor 创建）
+        if isinstance(detect_executor, ProcessPoolExecutor):
+            detect_fn = detect_in_worker
+        else:
+            def detect_fn(images):
+                with metrics.timer('detect'):
+                    return pipeline.detector.get_plate_detections_batch(images)
+        if isinstance(ocr_executor, ProcessPoolExecutor):
+            ocr_fn = recognize_in_worker
+        else:
+            def ocr_fn(groups):
+                return recognize_groups(pipeline._recognize, groups)
+
+        max_batch = max_batch or settings.ASYNC_MAX_BATCH
+        max_wait = settings.ASYNC_MAX_WAIT if max_wait is None else max_wait
+        self.detect_batcher = MicroBatcher(detect_fn, max_batch=max_batch, max_wait=max_wait,
+                                           executor=detect_executor, max_inflight=max_inflight)
+        # 识别批次的每一项是一帧的全部车牌
+        self.ocr_batcher = MicroBatcher(ocr_fn, max_batch=max_batch, max_wait=max_wait,
+                                        executor=ocr_executor, max_inflight=max_inflight)
+
+    async def detect(self, image):
+        """
+        检测一张图像中的车牌（与其它协程的请求合并成批次）
+        :param image: BGR图像
+        :return: (车牌边界框列表, 检测置信度列表)
+        """
+        return await asyncio.wrap_future(self.detect_batcher.submit(image))
+
+    async def recognize(self, plate_images):
+        """
+        识别一组车牌图像（与其它协程的请求合并成批次）
+        :param plate_images: 车牌图像列表
+        :return: [(车牌号, 置信度), ...]
+        """
+        if not plate_images:
+            return []
+        return await asyncio.wrap_future(self.ocr_batcher.submit(plate_images))
+
+    async def process_image(self, image):
+        """
+        处理单张图像
+        :param image: 输入图像（numpy数组或路径）
+        :return: (检测框列表, 识别结果列表, 置信度列表)
+        """
+        pipeline = self.pipeline
+        if isinstance(image, str):
+            image = await asyncio.get_running_loop().run_in_executor(None, load_image, image)
+        pipeline.metrics.inc('images')
+        boxes, confs = await self.detect(image)
+        if not boxes:
+            return [], [], []
+        pipeline.metrics.inc('plates', len(boxes))
+        plate_images, keep = pipeline.select_for_ocr(image, boxes, confs)
+        results = pipeline.fill_results(await self.recognize(plate_images), keep, len(boxes))
+        return boxes, [r[0] for r in results], [r[1] for r in results]
+
+    async def process_stream(self, source, skip_frames=1, track=True, latest_only=None):
+        """
+        异步处理视频源，逐帧产出结果；多路视频流和单张图像请求共享检测/识别批次
+        :param source: 视频路径、摄像头ID、网络流地址或已打开的 cv2.VideoCapture
+        :param skip_frames: 每隔多少帧处理一帧
+        :param track: 是否启用车牌跟踪（每个视频源独立跟踪）
+        :param latest_only: 是否只处理最新帧，None时实时源开启、本地文件关闭
+        :return: FrameResult 异步生成器
+        """
+        pipeline = self.pipeline
+        metrics = pipeline.metrics
+        loop = asyncio.get_running_loop()
+        cap = source if hasattr(source, 'read') else VideoSource(source)
+        if latest_only is None:
+            latest_only = getattr(cap, 'live', False)
+        reader = FrameReader(cap, latest_only=latest_only, skip_frames=skip_frames)
+        tracker = PlateTracker() if track else None
+        index = 0
+        try:
+            while True:
+                success, frame = await loop.run_in_executor(None, reader.read)
+                if not success:
+                    break
+                # 读取器在解码线程中跳帧，每读一帧对应源中的 skip_frames 帧
+                index += reader.skip_frames
+                metrics.inc('frames')
+                boxes, confs = await self.detect(frame)
+                metrics.inc('plates', len(boxes))
+
+                if tracker is None:
+                    plate_images, keep = pipeline.select_for_ocr(frame, boxes, confs) if boxes else ([], [])
+                    results = pipeline.fill_results(await self.recognize(plate_images), keep, len(boxes))
+                    license_list = [r[0] for r in results]
+                    conf_list = [r[1] for r in results]
+                    track_ids = [None] * len(boxes)
+                else:
+                    with metrics.timer('track'):
+                        tracks = tracker.update(boxes)
+                    # 被质量门控拒绝的跟踪不记录识别，下一帧重试
+                    pending, plate_images = pipeline.select_tracks_for_ocr(tracker, frame, tracks, confs)
+                    if pending:
+                        for t, (text, conf) in zip(pending, await self.recognize(plate_images)):
+                            t.add_read(text, conf, tracker.frame_index)
+                    license_list = [t.text or '无法识别' for t in tracks]
+                    conf_list = [t.conf if t.text else 0 for t in tracks]
+                    track_ids = [t.track_id for t in tracks]
+
+                yield FrameResult(index, frame, boxes, license_list, conf_list, track_ids)
+                reader.recycle(frame)
+        finally:
+            # 调用方传入的视频源由调用方释放
+            reader.stop()
+            if cap is not source:
+                cap.release()
+
+    def close(self):
+        """处理完已提交的请求后停止"""
+        self.detect_batcher.close()
+        self.ocr_batcher.close()
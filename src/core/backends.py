@@ -0,0 +1,180 @@
+# coding:utf-8
+"""
+检测推理后端模块
+提供 torch（ultralytics）、onnxruntime、openvino 三种可替换的检测后端，
+统一输出 [x1,y1,x2,y2,conf,cls] 格式的检测结果
+"""
+import os
+
+import numpy as np
+from src.config import settings
+from src.utils.preprocess import DetectorPreprocessor, load_image
+from src.utils.postprocess import postprocess_yolo
+
+
+class DetectorBackend:
+    """检测后端基类"""
+
+    name = None
+
+    def __init__(self, model_path, conf, iou, imgsz):
+        """
+        初始化后端
+        :param model_path: 模型路径
+        :param conf: 置信度阈值
+        :param iou: NMS的IoU阈值
+        :param imgsz: 模型输入边长
+        """
+        self.model_path = model_path
+        self.conf = conf
+        self.iou = iou
+        self.imgsz = imgsz
+        # 导出模型的输入尺寸固定时忽略 predict 传入的 imgsz
+        self.static_shape = False
+
+    def predict(self, frames, imgsz=None):
+        """
+        对多帧图像做一次批量检测
+        :param frames: 图像列表（numpy数组或图像路径）
+        :param imgsz: 本次推理的输入边长（默认使用初始化时的 imgsz）
+        :return: 每帧的检测结果列表，每项为 (M, 6) 数组 [x1,y1,x2,y2,conf,cls]
+        """
+        raise NotImplementedError
+
+
+class TorchBackend(DetectorBackend):
+    """基于ultralytics YOLO（PyTorch）的检测后端"""
+
+    name = 'torch'
+
+    def __init__(self, model_path, conf, iou, imgsz):
+        super().__init__(model_path, conf, iou, imgsz)
+        from ultralytics import YOLO
+        self.model = YOLO(self.model_path, task='detect')
+
+    def predict(self, frames, imgsz=None):
+        results = self.model(list(frames), conf=self.conf, iou=self.iou, imgsz=imgsz or self.imgsz, verbose=False)
+        return [r.boxes.data.cpu().numpy().astype(np.float32) for r in results]
+
+
+class TensorBackend(DetectorBackend):
+    """
+    接收原始输入张量的后端基类
+    预处理（写入复用的输入缓冲区）和后处理（解码、NMS）均使用NumPy实现，子类只需实现 _infer
+    """
+
+    def __init__(self, model_path, conf, iou, imgsz):
+        super().__init__(model_path, conf, iou, imgsz)
+        # 导出模型的批维度固定为1时逐帧推理，否则整批推理
+        self.fixed_batch = False
+        self.preprocessor = DetectorPreprocessor()
+
+    def predict(self, frames, imgsz=None):
+        frames = [load_image(f) for f in frames]
+        if imgsz is None or self.static_shape:
+            imgsz = self.imgsz
+        tensor, geometries = self.preprocessor.prepare(frames, imgsz)
+        if self.fixed_batch:
+            preds = np.concatenate([self._infer(tensor[i:i + 1]) for i in range(len(tensor))])
+        else:
+            preds = self._infer(tensor)
+        return postprocess_yolo(preds, geometries, self.conf, self.iou)
+
+    def _infer(self, tensor):
+        """
+        执行前向推理
+        :param tensor: float32 输入张量 (N, 3, imgsz, imgsz)，是复用的缓冲区，不能在返回后继续引用
+        :return: 模型原始输出 (N, 4+类别数, 锚点数)
+        """
+        raise NotImplementedError
+
+
+class OnnxRuntimeBackend(TensorBackend):
+    """基于ONNX Runtime的检测后端"""
+
+    name = 'onnxruntime'
+
+    def __init__(self, model_path, conf, iou, imgsz):
+        super().__init__(model_path, conf, iou, imgsz)
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("onnxruntime 后端需要安装 onnxruntime: pip install onnxruntime") from e
+
+        self.session = ort.InferenceSession(self.model_path, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.fixed_batch = model_input.shape[0] == 1
+        if isinstance(model_input.shape[2], int):
+            self.imgsz = model_input.shape[2]
+            self.static_shape = True
+
+    def _infer(self, tensor):
+        return self.session.run(None, {self.input_name: tensor})[0]
+
+
+class OpenVINOBackend(TensorBackend):
+    """基于OpenVINO的检测后端"""
+
+    name = 'openvino'
+
+    def __init__(self, model_path, conf, iou, imgsz):
+        super().__init__(model_path, conf, iou, imgsz)
+        try:
+            from openvino.runtime import Core
+        except ImportError as e:
+            raise ImportError("openvino 后端需要安装 openvino: pip install openvino") from e
+
+        # 支持传入导出目录或 .xml 文件
+        if os.path.isdir(self.model_path):
+            xml_files = [f for f in os.listdir(self.model_path) if f.endswith('.xml')]
+            if not xml_files:
+                raise FileNotFoundError(f"目录中没有OpenVINO模型文件: {self.model_path}")
+            self.model_path = os.path.join(self.model_path, xml_files[0])
+
+        core = Core()
+        model = core.read_model(self.model_path)
+        self.compiled = core.compile_model(model, 'CPU')
+        self.output = self.compiled.output(0)
+        input_shape = self.compiled.input(0).get_partial_shape()
+        self.fixed_batch = input_shape[0].is_static and input_shape[0].get_length() == 1
+        if input_shape[2].is_static:
+            self.imgsz = input_shape[2].get_length()
+            self.static_shape = True
+
+    def _infer(self, tensor):
+        return self.compiled([tensor])[self.output]
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenVINOBackend.name: OpenVINOBackend,
+}
+
+DEFAULT_MODEL_PATHS = {
+    TorchBackend.name: settings.YOLO_MODEL_PATH,
+    OnnxRuntimeBackend.name: settings.YOLO_ONNX_PATH,
+    OpenVINOBackend.name: settings.YOLO_OPENVINO_PATH,
+}
+
+
+def create_backend(name=None, model_path=None, conf=None, iou=None, imgsz=None):
+    """
+    创建检测后端
+    :param name: 后端名称（torch / onnxruntime / openvino）
+    :param model_path: 模型路径，默认使用该后端在配置中的模型路径
+    :param conf: 置信度阈值
+    :param iou: NMS的IoU阈值
+    :param imgsz: 模型输入边长
+    :return: 检测后端实例
+    """
+    name = name or settings.DETECT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"未知的检测后端: {name}，可选: {', '.join(BACKENDS)}")
+    return BACKENDS[name](
+        model_path or DEFAULT_MODEL_PATHS[name],
+        conf or settings.CONF_THRESHOLD,
+        iou or settings.IOU_THRESHOLD,
+        imgsz or settings.DETECT_IMGSZ,
+    )
@@ -0,0 +1,138 @@
+# coding:utf-8
+"""
+动态微批处理模块
+把多个线程并发提交的单个请求在很短的等待窗口内合并成一个批次，交给批处理函数一次执行；
+批处理函数默认在收集线程中执行，也可以交给线程池或进程池，允许多个批次同时执行
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, wait
+
+from src.config import settings
+
+# 队列结束标记
+_END = object()
+
+
+class MicroBatcher:
+    """动态微批处理器类"""
+
+    def __init__(self, batch_fn, max_batch=None, max_wait=None, executor=None, max_inflight=None):
+        """
+        初始化
+        :param batch_fn: 批处理函数，输入列表返回等长的结果列表（使用进程池时需可pickle）
+        :param max_batch: 单个批次的最大请求数
+        :param max_wait: 收到批次中第一个请求后最多再等待的时间（秒）
+        :param executor: 执行批处理函数的线程池/进程池，为None时在收集线程中执行
+        :param max_inflight: 使用 executor 时最多同时执行的批次数
+        """
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch or settings.SERVER_MAX_BATCH
+        self.max_wait = settings.SERVER_MAX_WAIT if max_wait is None else max_wait
+        self.executor = executor
+        self.batches = 0
+        self.items = 0
+        self._inflight = threading.Semaphore(max_inflight or settings.BATCH_MAX_INFLIGHT)
+        self._tasks = set()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        提交一个请求
+        :param item: 请求数据
+        :return: Future，结果为批处理函数对该请求的输出
+        """
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self):
+        """
+        阻塞等待第一个请求，然后在等待窗口内继续收集，直到批次满或窗口结束
+        :return: [(请求, Future), ...]，收到结束标记时返回None
+        """
+        first = self._queue.get()
+        if first is _END:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _END:
+                self._queue.put(_END)
+                break
+            batch.append(item)
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # 已取消的请求不再处理
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            items = [item for item, _ in batch]
+            if self.executor is None:
+                try:
+                    results = self.batch_fn(items)
+                except Exception as e:
+                    self._fail(batch, e)
+                else:
+                    self._deliver(batch, results)
+                continue
+            # 限制同时执行的批次数，执行器繁忙时在这里积累下一个批次
+            self._inflight.acquire()
+            try:
+                task = self.executor.submit(self.batch_fn, items)
+            except Exception as e:
+                self._inflight.release()
+                self._fail(batch, e)
+                continue
+            self._tasks.add(task)
+            task.add_done_callback(lambda t, batch=batch: self._on_done(batch, t))
+
+    def _on_done(self, batch, task):
+        self._tasks.discard(task)
+        self._inflight.release()
+        error = task.exception()
+        if error is not None:
+            self._fail(batch, error)
+        else:
+            self._deliver(batch, task.result())
+
+    @staticmethod
+    def _deliver(batch, results):
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, future in batch:
+            future.set_exception(error)
+
+    def stats(self):
+        """
+        :return: {'batches', 'items', 'mean_batch_size'}
+        """
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        """处理完已提交的请求后停止"""
+        self._queue.put(_END)
+        self._thread.join()
+        wait(list(self._tasks))
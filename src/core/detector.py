@@ -1,44 +1,271 @@
 # coding:utf-8
 """
 车牌检测模块
-使用YOLOv8进行车牌位置检测
+使用YOLOv8进行车牌位置检测，推理后端可选 torch / onnxruntime / openvino；
+大尺寸帧可切成相互重叠的切片批量检测，避免远处的小车牌在整帧缩放后丢失；
+也可以只在大幅缩小的帧上粗检测，边界框外扩后映射回原图（可选在外扩区域上小尺寸精修），
+检测开销取决于缩小后的尺寸，识别裁剪仍取自原始分辨率帧
 """
-from ultralytics import YOLO
+import time
+
+import cv2
+import numpy as np
 from src.config import settings
+from src.core.backends import create_backend
+from src.utils.postprocess import merge_tile_detections, pad_boxes
+from src.utils.preprocess import load_image, tile_windows
 
 
 class PlateDetector:
     """车牌检测器类"""
 
-    def __init__(self, model_path=None, conf=None, iou=None):
+    def __init__(self, model_path=None, conf=None, iou=None, batch_size=None, auto_batch=False,
+                 backend=None, imgsz=None, tiled=None, tile_size=None, tile_overlap=None, tile_min_size=None,
+                 coarse=None, refine=None):
         """
         初始化检测器
-        :param model_path: YOLO模型路径
+        :param model_path: 模型路径（默认使用所选后端在配置中的模型路径）
         :param conf: 置信度阈值
         :param iou: IoU阈值
+        :param batch_size: 多帧批量检测时单次前向推理的帧数
+        :param auto_batch: 是否在启动时测速并自动选择吞吐量最高的批大小
+        :param backend: 推理后端名称（torch / onnxruntime / openvino）
+        :param imgsz: 模型输入边长
+        :param tiled: 是否对大尺寸帧做切片检测
+        :param tile_size: 切片边长
+        :param tile_overlap: 相邻切片的重叠比例
+        :param tile_min_size: 帧的长边超过该值时才切片
+        :param coarse: 是否在缩小的帧上做粗检测（与切片检测互斥）
+        :param refine: 粗检测后是否在外扩区域上做精修检测
         """
-        self.model_path = model_path or settings.YOLO_MODEL_PATH
         self.conf = conf or settings.CONF_THRESHOLD
         self.iou = iou or settings.IOU_THRESHOLD
-        self.model = YOLO(self.model_path, task='detect')
+        self.batch_size = batch_size or settings.DETECT_BATCH_SIZE
+        self.backend = create_backend(backend, model_path, self.conf, self.iou, imgsz)
+        self.model_path = self.backend.model_path
+        self.tiled = settings.DETECT_TILED if tiled is None else tiled
+        self.tile_size = tile_size or settings.DETECT_TILE_SIZE
+        self.tile_overlap = settings.DETECT_TILE_OVERLAP if tile_overlap is None else tile_overlap
+        self.tile_min_size = tile_min_size or settings.DETECT_TILE_MIN_SIZE
+        self.coarse = settings.DETECT_COARSE if coarse is None else coarse
+        self.refine = settings.DETECT_REFINE if refine is None else refine
+        if self.tiled and self.coarse:
+            raise ValueError("切片检测和粗检测不能同时开启")
+        if auto_batch:
+            self.batch_size = self.probe_batch_size()
+
+    @property
+    def imgsz(self):
+        """当前的检测输入边长"""
+        return self.backend.imgsz
+
+    @imgsz.setter
+    def imgsz(self, value):
+        self.backend.imgsz = value
+
+    @property
+    def dynamic_imgsz(self):
+        """运行中能否调整检测输入边长（导出模型的输入尺寸固定、或粗检测使用固定尺寸时不能）"""
+        return not self.backend.static_shape and not self.coarse
 
     def detect(self, image):
         """
         检测图像中的车牌
         :param image: 输入图像（numpy数组或图像路径）
-        :return: 检测结果对象
+        :return: 检测结果数组 (M, 6)，每行为 [x1,y1,x2,y2,conf,cls]
+        """
+        if self.tiled or self.coarse:
+            return self.detect_batch([image])[0]
+        return self.backend.predict([image])[0]
+
+    def detect_batch(self, frames):
         """
-        results = self.model(image)[0]
+        批量检测多帧图像，每 batch_size 帧做一次前向推理
+        :param frames: 图像列表（numpy数组或图像路径）
+        :return: 检测结果数组列表，与输入一一对应
+        """
+        if self.tiled:
+            return self.detect_tiled(frames)
+        if self.coarse:
+            return self.detect_coarse(frames)
+        results = []
+        for i in range(0, len(frames), self.batch_size):
+            results.extend(self.backend.predict(frames[i:i + self.batch_size]))
         return results
 
+    def detect_tiled(self, frames):
+        """
+        切片检测：长边超过 tile_min_size 的帧切成相互重叠的切片（可附加缩小的整帧），
+        所有帧的切片合并成批次推理，结果平移回原图坐标后用NMS合并重复框
+        :param frames: 图像列表（numpy数组或图像路径）
+        :return: 检测结果数组列表，与输入一一对应
+        """
+        pieces = []
+        owners = []
+        offsets = []
+        for index, frame in enumerate(frames):
+            frame = load_image(frame)
+            height, width = frame.shape[:2]
+            if max(height, width) <= self.tile_min_size:
+                windows = np.array([[0, 0, width, height]])
+            else:
+                windows = tile_windows(height, width, self.tile_size, self.tile_overlap)
+                if settings.DETECT_TILE_FULL_FRAME:
+                    windows = np.concatenate([windows, [[0, 0, width, height]]])
+            for x1, y1, x2, y2 in windows.tolist():
+                # 切片是原图的视图，不拷贝像素
+                pieces.append(frame[y1:y2, x1:x2])
+                owners.append(index)
+                offsets.append((x1, y1))
+
+        predictions = []
+        for i in range(0, len(pieces), settings.DETECT_TILE_BATCH_SIZE):
+            predictions.extend(self.backend.predict(pieces[i:i + settings.DETECT_TILE_BATCH_SIZE]))
+
+        grouped = [([], []) for _ in frames]
+        for owner, prediction, offset in zip(owners, predictions, offsets):
+            grouped[owner][0].append(prediction)
+            grouped[owner][1].append(offset)
+        results = []
+        for detections, frame_offsets in grouped:
+            if len(detections) == 1:
+                results.append(detections[0])
+            else:
+                results.append(merge_tile_detections(detections, frame_offsets,
+                                                     settings.DETECT_TILE_MERGE_THRESHOLD))
+        return results
+
+    def detect_coarse(self, frames):
+        """
+        粗检测：帧按面积插值缩小到 DETECT_COARSE_IMGSZ 后检测，边界框映射回原图并按比例外扩，
+        开启 refine 时再在外扩区域上精修
+        :param frames: 图像列表（numpy数组或图像路径）
+        :return: 原图坐标下的检测结果数组列表，与输入一一对应
+        """
+        size = settings.DETECT_COARSE_IMGSZ
+        frames = [load_image(f) for f in frames]
+        small = []
+        scales = []
+        for frame in frames:
+            height, width = frame.shape[:2]
+            scale = min(1.0, size / max(height, width))
+            if scale < 1.0:
+                frame = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                                   interpolation=cv2.INTER_AREA)
+            small.append(frame)
+            scales.append(scale)
+
+        predictions = []
+        for i in range(0, len(small), self.batch_size):
+            predictions.extend(self.backend.predict(small[i:i + self.batch_size], imgsz=size))
+
+        results = []
+        for frame, scale, det in zip(frames, scales, predictions):
+            det = det.copy()
+            det[:, :4] = pad_boxes(det[:, :4] / scale, settings.DETECT_COARSE_PAD, frame.shape[:2])
+            results.append(det)
+        if self.refine:
+            results = self._refine(frames, results)
+        return results
+
+    def _refine(self, frames, results):
+        """
+        精修：所有外扩区域从原图中裁出后合并成批次做小尺寸检测，每个区域取置信度最高的框；
+        区域内没有检测到时保留外扩后的粗检测框
+        :param frames: 原始图像列表
+        :param results: 粗检测结果数组列表
+        :return: 精修后的检测结果数组列表
+        """
+        refined = [det.copy() for det in results]
+        regions = []
+        targets = []
+        for i, (frame, det) in enumerate(zip(frames, refined)):
+            for k, (x1, y1, x2, y2) in enumerate(det[:, :4].astype(int).tolist()):
+                if x2 - x1 >= 2 and y2 - y1 >= 2:
+                    regions.append(frame[y1:y2, x1:x2])
+                    targets.append((i, k, x1, y1))
+        if not regions:
+            return refined
+
+        size = settings.DETECT_REFINE_IMGSZ
+        predictions = []
+        for i in range(0, len(regions), settings.DETECT_TILE_BATCH_SIZE):
+            predictions.extend(self.backend.predict(regions[i:i + settings.DETECT_TILE_BATCH_SIZE], imgsz=size))
+
+        for (i, k, x1, y1), prediction in zip(targets, predictions):
+            if len(prediction):
+                best = prediction[prediction[:, 4].argmax()]
+                refined[i][k, :4] = best[:4] + (x1, y1, x1, y1)
+                refined[i][k, 4] = best[4]
+        return refined
+
     def get_plate_boxes(self, image):
         """
         获取车牌边界框坐标
         :param image: 输入图像
         :return: 车牌边界框列表 [[x1,y1,x2,y2], ...]
         """
+        return self._result_to_boxes(self.detect(image))
+
+    def get_plate_boxes_batch(self, frames):
+        """
+        批量获取多帧图像的车牌边界框坐标
+        :param frames: 图像列表
+        :return: 每帧的边界框列表 [[[x1,y1,x2,y2], ...], ...]
+        """
+        return [self._result_to_boxes(r) for r in self.detect_batch(frames)]
+
+    def get_plate_detections(self, image):
+        """
+        获取车牌边界框坐标和检测置信度
+        :param image: 输入图像
+        :return: (边界框列表 [[x1,y1,x2,y2], ...], 置信度列表)
+        """
         results = self.detect(image)
-        location_list = results.boxes.xyxy.tolist()
+        return self._result_to_boxes(results), results[:, 4].tolist()
+
+    def get_plate_detections_batch(self, frames):
+        """
+        批量获取多帧图像的车牌边界框坐标和检测置信度
+        :param frames: 图像列表
+        :return: [(边界框列表, 置信度列表), ...]
+        """
+        return [(self._result_to_boxes(r), r[:, 4].tolist()) for r in self.detect_batch(frames)]
+
+    def probe_batch_size(self, frame_shape=None, candidates=None, iterations=3):
+        """
+        测速并选择本机吞吐量最高的批大小
+        :param frame_shape: 测试帧形状 (H, W, C)
+        :param candidates: 候选批大小
+        :param iterations: 每个候选批大小的测速次数
+        :return: 吞吐量（帧/秒）最高的批大小
+        """
+        frame_shape = frame_shape or settings.DETECT_PROBE_SHAPE
+        candidates = candidates or settings.DETECT_BATCH_CANDIDATES
+        frame = np.random.randint(0, 255, frame_shape, dtype=np.uint8)
+
+        best_size, best_fps = 1, 0.0
+        for size in candidates:
+            frames = [frame] * size
+            # 预热一次，排除首次推理的初始化开销
+            self.backend.predict(frames)
+            start = time.perf_counter()
+            for _ in range(iterations):
+                self.backend.predict(frames)
+            elapsed = time.perf_counter() - start
+            fps = size * iterations / elapsed if elapsed > 0 else 0.0
+            if fps > best_fps:
+                best_size, best_fps = size, fps
+        return best_size
+
+    @staticmethod
+    def _result_to_boxes(results):
+        """
+        将检测结果数组转换为整数边界框列表
+        :param results: 检测结果数组 (M, 6)
+        :return: [[x1,y1,x2,y2], ...]
+        """
+        location_list = results[:, :4].tolist()
 
         if len(location_list) >= 1:
             location_list = [list(map(int, e)) for e in location_list]
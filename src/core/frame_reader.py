@@ -0,0 +1,148 @@
+# coding:utf-8
+"""
+预读取视频读取器模块
+后台线程提前解码，帧直接解码进固定数量的预分配缓冲区（环形复用），解码与推理并行且不再逐帧分配内存；
+支持"逐帧"和"只取最新帧"两种取帧方式；跳帧时被跳过的帧只 grab() 不解码
+"""
+import threading
+from collections import deque
+
+import numpy as np
+from src.config import settings
+
+
+class FrameReader:
+    """
+    预读取视频读取器类，接口与 cv2.VideoCapture 的 read / get / isOpened / release 兼容
+
+    read() 返回的帧直接引用内部缓冲区，用完后需调用 recycle(frame) 归还，
+    归还后该缓冲区会被后续解码覆盖；需要长期保留的帧请自行 copy()
+    """
+
+    def __init__(self, cap, buffer_count=None, latest_only=False, skip_frames=1):
+        """
+        初始化读取器
+        :param cap: 已打开的 cv2.VideoCapture（或提供 read/get/isOpened/release 的对象）
+        :param buffer_count: 预分配的帧缓冲区数量，即最多提前解码的帧数
+        :param latest_only: 是否只取最新帧（处理跟不上时丢弃未取走的旧帧，适合实时源）
+        :param skip_frames: 每隔多少帧解码一帧（第 skip_frames, 2*skip_frames, ... 帧），其余帧只 grab()
+        """
+        self.cap = cap
+        self.buffer_count = max(2, buffer_count or settings.READER_BUFFERS)
+        self.latest_only = latest_only
+        self.skip_frames = max(1, int(skip_frames))
+        self.frames_read = 0
+        self.dropped = 0
+        self._ring = {}
+        self._free = deque()
+        self._ready = deque()
+        self._cond = threading.Condition()
+        self._ended = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        """解码线程：取空闲缓冲区，解码进去后放入就绪队列"""
+        try:
+            success = self._grab_skipped()
+            if success:
+                success, frame = self.cap.read()
+            if success:
+                # 按第一帧的尺寸分配缓冲区，第一帧本身作为其中一个
+                buffers = [frame] + [np.empty_like(frame) for _ in range(self.buffer_count - 1)]
+                with self._cond:
+                    self._ring = {id(buf): buf for buf in buffers}
+                    self._free.extend(buffers[1:])
+                self._publish(frame)
+
+            while success:
+                with self._cond:
+                    while not self._free and not self._stopped:
+                        self._cond.wait()
+                    if self._stopped:
+                        break
+                    buf = self._free.popleft()
+                success = self._grab_skipped()
+                if success:
+                    success, frame = self.cap.read(buf)
+                if not success:
+                    self.recycle(buf)
+                    break
+                if frame is not buf:
+                    # 分辨率变化时解码器会返回新数组，原缓冲区直接归还
+                    self.recycle(buf)
+                self._publish(frame)
+        finally:
+            with self._cond:
+                self._ended = True
+                self._cond.notify_all()
+
+    def _grab_skipped(self):
+        """跳过下一帧之前的帧：只解复用不解码，也不做颜色转换"""
+        for _ in range(self.skip_frames - 1):
+            if not self.cap.grab():
+                return False
+        return True
+
+    def _publish(self, frame):
+        """放入就绪队列，只取最新帧时回收尚未取走的旧帧"""
+        with self._cond:
+            self.frames_read += 1
+            if self.latest_only:
+                while self._ready:
+                    self._recycle_locked(self._ready.popleft())
+                    self.dropped += 1
+            self._ready.append(frame)
+            self._cond.notify_all()
+
+    def _recycle_locked(self, frame):
+        if self._ring.get(id(frame)) is frame:
+            self._free.append(frame)
+
+    def recycle(self, frame):
+        """
+        归还用完的帧缓冲区；不属于本读取器的数组会被忽略
+        :param frame: read() 返回的帧
+        """
+        if frame is None:
+            return
+        with self._cond:
+            self._recycle_locked(frame)
+            self._cond.notify_all()
+
+    @property
+    def finished(self):
+        """视频源已结束且没有待取的帧"""
+        with self._cond:
+            return self._ended and not self._ready
+
+    def read(self, timeout=None):
+        """
+        取下一帧（只取最新帧模式下为当前最新的一帧），没有可用帧时阻塞等待
+        :param timeout: 最长等待时间（秒），None表示一直等待；超时与结束都返回失败，可用 finished 区分
+        :return: (是否成功, 帧)
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._ready or self._ended, timeout)
+            if not self._ready:
+                return False, None
+            return True, self._ready.popleft()
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def stop(self):
+        """停止解码线程，不释放底层视频源（视频源由调用方传入并负责释放时使用）"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+    def release(self):
+        """停止解码线程并释放底层视频源"""
+        self.stop()
+        self.cap.release()
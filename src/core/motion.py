@@ -0,0 +1,92 @@
+# coding:utf-8
+"""
+运动门控模块
+在缩小的灰度帧上做帧差，画面没有明显变化时跳过检测并复用上一次的检测结果，
+每隔固定帧数强制完整检测一次
+"""
+import cv2
+import numpy as np
+from src.config import settings
+
+
+class MotionGate:
+    """运动门控类"""
+
+    def __init__(self, width=None, pixel_threshold=None, area_threshold=None, force_interval=None):
+        """
+        初始化运动门控
+        :param width: 帧差计算使用的缩小宽度
+        :param pixel_threshold: 灰度差大于该值的像素视为变化
+        :param area_threshold: 变化像素占比超过该值时视为有运动
+        :param force_interval: 连续跳过该帧数后强制检测
+        """
+        self.width = width or settings.MOTION_WIDTH
+        self.pixel_threshold = pixel_threshold or settings.MOTION_PIXEL_THRESHOLD
+        self.area_threshold = area_threshold or settings.MOTION_AREA_THRESHOLD
+        self.force_interval = force_interval or settings.MOTION_FORCE_INTERVAL
+        # 上一次运行检测时的参考帧（与其比较，缓慢变化也会逐渐累积触发检测）
+        self.reference = None
+        self.last_boxes = []
+        self.last_confs = []
+        self.skipped_since_detect = 0
+        self.checked = 0
+        self.skipped = 0
+
+    def _small_gray(self, frame):
+        """缩小并转为模糊灰度图"""
+        h, w = frame.shape[:2]
+        height = max(1, int(round(h * self.width / float(w))))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def motion_ratio(self, frame):
+        """
+        计算当前帧相对参考帧的变化像素占比
+        :param frame: BGR图像
+        :return: (变化占比, 缩小后的灰度图)，没有参考帧时占比为1
+        """
+        gray = self._small_gray(frame)
+        if self.reference is None or self.reference.shape != gray.shape:
+            return 1.0, gray
+        diff = cv2.absdiff(gray, self.reference)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size, gray
+
+    def check(self, frame):
+        """
+        判断当前帧是否需要检测（不需要时计入跳过次数）
+        :param frame: BGR图像
+        :return: (是否需要检测, 缩小后的灰度图)，需要检测时检测完成后应调用 update
+        """
+        self.checked += 1
+        ratio, gray = self.motion_ratio(frame)
+        if ratio < self.area_threshold and self.skipped_since_detect < self.force_interval:
+            self.skipped += 1
+            self.skipped_since_detect += 1
+            return False, gray
+        return True, gray
+
+    def update(self, boxes, gray, confs=None):
+        """
+        记录一次检测结果，并把该帧作为新的参考帧
+        :param boxes: 检测到的边界框列表
+        :param gray: check 返回的灰度图
+        :param confs: 检测置信度列表（可选）
+        """
+        self.last_boxes = boxes
+        self.last_confs = confs
+        self.reference = gray
+        self.skipped_since_detect = 0
+
+    def detect(self, frame, detect_fn):
+        """
+        经门控的检测：画面静止时复用上一次结果，否则调用检测函数
+        :param frame: BGR图像
+        :param detect_fn: 检测函数，输入帧返回 (边界框列表, 置信度列表)
+        :return: (边界框列表, 置信度列表)
+        """
+        needed, gray = self.check(frame)
+        if needed:
+            boxes, confs = detect_fn(frame)
+            self.update(boxes, gray, confs)
+        return self.last_boxes, self.last_confs
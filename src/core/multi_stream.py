@@ -0,0 +1,310 @@
+# coding:utf-8
+"""
+多路视频流调度模块
+多个视频源共享同一个 PlatePipeline（检测和识别模型只加载一份）：每轮按轮转顺序从各路取最新帧，
+合并成一个批次做检测，所有路需要识别的车牌合并成一个批次做识别；
+每路有独立的跟踪器、运动门控、帧率上限和结果输出
+"""
+import json
+import threading
+import time
+
+from src.config import settings
+from src.core.frame_reader import FrameReader
+from src.core.motion import MotionGate
+from src.core.roi import load_roi
+from src.core.source import VideoSource
+from src.core.stream import FrameResult
+from src.core.tracker import PlateTracker
+from src.core.video_writer import create_writer
+
+
+class JsonlSink:
+    """把每帧结果写入JSONL文件的输出"""
+
+    def __init__(self, path):
+        """
+        :param path: 输出文件路径
+        """
+        self.file = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, name, result):
+        record = {
+            'stream': name,
+            'frame': result.index,
+            'time': round(time.time(), 3),
+            'plates': [{'text': text, 'conf': float(conf), 'box': list(map(int, box)), 'track_id': tid}
+                       for box, text, conf, tid in zip(result.boxes, result.license_list, result.conf_list,
+                                                        result.track_ids)],
+        }
+        with self._lock:
+            self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class VideoSink:
+    """把绘制了结果的帧写入输出视频的输出（帧率按实际处理速率测得）"""
+
+    def __init__(self, path, pipeline, backend=None):
+        """
+        :param path: 输出视频路径
+        :param pipeline: 用于绘制结果的 PlatePipeline
+        :param backend: 编码后端（opencv / ffmpeg）
+        """
+        self.path = path
+        self.pipeline = pipeline
+        self.backend = backend
+        self.writer = None
+
+    def __call__(self, name, result):
+        frame = result.frame
+        if self.writer is None:
+            self.writer = create_writer(self.path, None, (frame.shape[1], frame.shape[0]), backend=self.backend,
+                                        policy='drop')
+        if result.boxes:
+            frame = self.pipeline.draw_results(frame, result.boxes, result.license_list)
+        self.writer.write(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+
+
+class StreamState:
+    """单路视频流的状态"""
+
+    def __init__(self, name, source, max_fps=None, sinks=None, track=True, motion_gate=False, roi=None):
+        """
+        :param name: 视频流名称
+        :param source: 设备ID、文件路径或网络流地址
+        :param max_fps: 该路的处理帧率上限，None或0表示不限
+        :param sinks: 结果输出列表，每个输出以 sink(name, FrameResult) 的方式调用，可选提供 close()
+        :param track: 是否启用车牌跟踪
+        :param motion_gate: 是否启用运动门控
+        :param roi: 感兴趣区域多边形（默认使用配置中 ROI_POLYGONS 对该视频源的设置）
+        """
+        self.name = name
+        self.roi = load_roi(source, roi)
+        self.source = VideoSource(source, realtime=True)
+        if not self.source.isOpened():
+            raise IOError(f"无法打开视频源: {source}")
+        # 只取最新帧：某一路处理不过来时丢弃旧帧，而不是拖慢其它路
+        self.reader = FrameReader(self.source, latest_only=True)
+        self.interval = 1.0 / max_fps if max_fps else 0.0
+        self.next_due = 0.0
+        self.sinks = sinks or []
+        self.tracker = PlateTracker() if track else None
+        self.motion_gate = MotionGate() if motion_gate else None
+        self.frames = 0
+        self.plates = 0
+
+    def poll(self, now):
+        """
+        到达处理时间时取一帧
+        :param now: 当前时间（time.perf_counter）
+        :return: 帧，未到时间或没有新帧时返回None
+        """
+        if now < self.next_due:
+            return None
+        success, frame = self.reader.read(timeout=0)
+        if not success:
+            return None
+        self.frames += 1
+        if self.interval:
+            # 落后太多时不追赶
+            self.next_due = max(self.next_due + self.interval, now)
+        return frame
+
+    @property
+    def finished(self):
+        return self.reader.finished
+
+    def close(self):
+        self.reader.release()
+        for sink in self.sinks:
+            if hasattr(sink, 'close'):
+                sink.close()
+
+    def stats(self):
+        """
+        :return: {'frames', 'plates', 'dropped', 'reconnects'}
+        """
+        return {
+            'frames': self.frames,
+            'plates': self.plates,
+            'dropped': self.reader.dropped,
+            'reconnects': self.source.reconnects,
+        }
+
+
+class MultiStreamScheduler:
+    """多路视频流调度器类"""
+
+    def __init__(self, pipeline, batch_size=None):
+        """
+        初始化调度器
+        :param pipeline: 共享的 PlatePipeline（其 tracker / motion_gate 不使用，各路有独立的状态）
+        :param batch_size: 每轮最多合并检测的帧数
+        """
+        self.pipeline = pipeline
+        self.batch_size = batch_size or settings.MULTI_BATCH_SIZE
+        self.streams = []
+        self.stop_event = threading.Event()
+        self._start = 0
+
+    def add_stream(self, name, source, max_fps=None, sinks=None, track=True, motion_gate=False, roi=None):
+        """
+        添加一路视频流
+        :return: StreamState
+        """
+        state = StreamState(name, source, max_fps=max_fps, sinks=sinks, track=track, motion_gate=motion_gate,
+                            roi=roi)
+        self.streams.append(state)
+        return state
+
+    def _collect(self):
+        """
+        轮转收集本轮要处理的帧：每轮从不同的流开始，每路最多一帧，保证各路公平
+        :return: [(StreamState, 帧), ...]
+        """
+        now = time.perf_counter()
+        count = len(self.streams)
+        batch = []
+        for offset in range(count):
+            state = self.streams[(self._start + offset) % count]
+            frame = state.poll(now)
+            if frame is not None:
+                batch.append((state, frame))
+                if len(batch) >= self.batch_size:
+                    break
+        self._start = (self._start + 1) % max(count, 1)
+        return batch
+
+    def _detect(self, batch):
+        """
+        批量检测：配置了感兴趣区域的流只检测其外接矩形，运动门控判定为静止的帧复用上次结果，
+        其余帧合并为一个批次
+        :return: [(边界框列表, 置信度列表), ...]
+        """
+        detections = [None] * len(batch)
+        regions = [state.roi.crop(frame) if state.roi is not None else (frame, None) for state, frame in batch]
+        pending = []
+        for i, (state, _) in enumerate(batch):
+            if state.motion_gate is not None:
+                needed, gray = state.motion_gate.check(regions[i][0])
+                if not needed:
+                    detections[i] = (state.motion_gate.last_boxes, state.motion_gate.last_confs)
+                    continue
+                pending.append((i, gray))
+            else:
+                pending.append((i, None))
+
+        if pending:
+            metrics = self.pipeline.metrics
+            with metrics.timer('detect'):
+                detected = self.pipeline.detector.get_plate_detections_batch([regions[i][0] for i, _ in pending])
+            for (i, gray), (boxes, confs) in zip(pending, detected):
+                detections[i] = (boxes, confs)
+                state = batch[i][0]
+                if state.motion_gate is not None:
+                    state.motion_gate.update(boxes, gray, confs)
+
+        # 区域坐标映射回原帧，丢弃中心点在多边形外的框
+        for i, (state, frame) in enumerate(batch):
+            if state.roi is not None:
+                boxes, confs = detections[i]
+                boxes, confs, discarded = state.roi.restore(boxes, confs, regions[i][1], frame.shape)
+                detections[i] = (boxes, confs)
+                if discarded:
+                    self.pipeline.metrics.inc('roi_discarded', discarded)
+        return detections
+
+    def step(self):
+        """
+        处理一轮：收集、批量检测、各路跟踪、批量识别、输出
+        :return: 本轮处理的帧数
+        """
+        batch = self._collect()
+        if not batch:
+            return 0
+        pipeline = self.pipeline
+        metrics = pipeline.metrics
+        detections = self._detect(batch)
+
+        # 各路独立跟踪，需要识别的车牌合并成一个批次
+        crops, owners, items = [], [], []
+        for (state, frame), (boxes, confs) in zip(batch, detections):
+            state.plates += len(boxes)
+            metrics.inc('plates', len(boxes))
+            if state.tracker is not None:
+                with metrics.timer('track'):
+                    tracks = state.tracker.update(boxes)
+                pending, plate_images = pipeline.select_tracks_for_ocr(state.tracker, frame, tracks, confs)
+            else:
+                tracks = None
+                plate_images, pending = pipeline.select_for_ocr(frame, boxes, confs) if boxes else ([], [])
+            crops.extend(plate_images)
+            owners.extend([len(items)] * len(plate_images))
+            items.append((state, frame, boxes, tracks, pending))
+
+        results = pipeline._recognize(crops) if crops else []
+        per_item = [[] for _ in items]
+        for owner, result in zip(owners, results):
+            per_item[owner].append(result)
+
+        for (state, frame, boxes, tracks, pending), item_results in zip(items, per_item):
+            if tracks is not None:
+                for track, (text, conf) in zip(pending, item_results):
+                    track.add_read(text, conf, state.tracker.frame_index)
+                license_list = [t.text or '无法识别' for t in tracks]
+                conf_list = [t.conf if t.text else 0 for t in tracks]
+                track_ids = [t.track_id for t in tracks]
+            else:
+                item_results = pipeline.fill_results(item_results, pending, len(boxes))
+                license_list = [r[0] for r in item_results]
+                conf_list = [r[1] for r in item_results]
+                track_ids = [None] * len(boxes)
+
+            result = FrameResult(state.frames, frame, boxes, license_list, conf_list, track_ids)
+            for sink in state.sinks:
+                sink(state.name, result)
+            metrics.inc('frames')
+            state.reader.recycle(frame)
+        return len(batch)
+
+    def run(self, duration=None):
+        """
+        持续调度直到所有流结束、调用 stop() 或达到运行时长
+        :param duration: 最长运行时间（秒）
+        """
+        deadline = time.perf_counter() + duration if duration else None
+        try:
+            while not self.stop_event.is_set():
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if not self.step():
+                    if all(state.finished for state in self.streams):
+                        break
+                    # 各路都没有新帧时短暂等待
+                    time.sleep(settings.MULTI_IDLE_SLEEP)
+        finally:
+            self.close()
+
+    def stop(self):
+        """请求停止调度（可在其它线程中调用）"""
+        self.stop_event.set()
+
+    def close(self):
+        """关闭所有视频流和输出"""
+        for state in self.streams:
+            state.close()
+
+    def stats(self):
+        """
+        :return: {流名称: 该路统计}
+        """
+        return {state.name: state.stats() for state in self.streams}
@@ -0,0 +1,102 @@
+# coding:utf-8
+"""
+ONNX车牌识别模块
+直接使用ONNX Runtime运行导出为ONNX的PP-OCRv4识别模型，CTC贪心解码使用NumPy向量化实现，
+不依赖Paddle运行时
+"""
+import importlib.util
+import os
+
+import numpy as np
+from src.config import settings
+from src.core.recognizer import BaseRecognizer
+
+
+def find_rec_dict(dict_path=None):
+    """
+    查找识别模型字符字典
+    优先使用配置路径，找不到时回退到已安装paddleocr包内的字典（不导入paddleocr）
+    :param dict_path: 字典文件路径
+    :return: 字典文件路径
+    """
+    dict_path = dict_path or settings.PADDLE_REC_DICT
+    if os.path.exists(dict_path):
+        return dict_path
+
+    spec = importlib.util.find_spec('paddleocr')
+    if spec is not None and spec.origin:
+        fallback = os.path.join(os.path.dirname(spec.origin), 'ppocr', 'utils', 'ppocr_keys_v1.txt')
+        if os.path.exists(fallback):
+            return fallback
+    raise FileNotFoundError(f"找不到识别字典文件: {dict_path}")
+
+
+def load_character_list(dict_path, use_space_char=True):
+    """
+    读取字符字典，索引0为CTC空白符
+    :param dict_path: 字典文件路径
+    :param use_space_char: 是否在末尾追加空格字符（PP-OCRv4中文模型为True）
+    :return: numpy字符数组
+    """
+    with open(dict_path, 'rb') as f:
+        chars = [line.decode('utf-8').strip('\n').strip('\r\n') for line in f]
+    if use_space_char:
+        chars.append(' ')
+    return np.array(['blank'] + chars, dtype=object)
+
+
+def ctc_greedy_decode(preds, characters):
+    """
+    CTC贪心解码（向量化）
+    :param preds: 模型输出概率 (N, T, 类别数)
+    :param characters: 字符数组，索引0为空白符
+    :return: [(文本, 平均置信度), ...]
+    """
+    indices = preds.argmax(axis=2)
+    probs = preds.max(axis=2)
+
+    # 去掉与前一时刻重复的字符和空白符
+    keep = indices != 0
+    keep[:, 1:] &= indices[:, 1:] != indices[:, :-1]
+
+    counts = keep.sum(axis=1)
+    confs = np.where(counts > 0, (probs * keep).sum(axis=1) / np.maximum(counts, 1), 0.0)
+
+    results = []
+    for row_idx, row_keep, conf in zip(indices, keep, confs):
+        results.append((''.join(characters[row_idx[row_keep]]), float(conf)))
+    return results
+
+
+class OnnxPlateRecognizer(BaseRecognizer):
+    """基于ONNX Runtime的车牌识别器类，接口与PlateRecognizer一致"""
+
+    def __init__(self, model_path=None, dict_path=None, rec_image_shape=None, rec_batch_num=None,
+                 num_threads=None):
+        """
+        初始化识别器
+        :param model_path: ONNX识别模型路径
+        :param dict_path: 字符字典路径
+        :param rec_image_shape: 识别模型输入形状 (C, H, W)
+        :param rec_batch_num: 单次前向推理的最大车牌数
+        :param num_threads: ONNX Runtime算子内线程数（多进程部署时建议设小）
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("ONNX识别器需要安装 onnxruntime: pip install onnxruntime") from e
+
+        self.model_path = model_path or settings.PADDLE_REC_ONNX
+        self.rec_image_shape = tuple(rec_image_shape or settings.REC_IMAGE_SHAPE)
+        self.rec_batch_num = rec_batch_num or settings.REC_BATCH_NUM
+        self.characters = load_character_list(find_rec_dict(dict_path))
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def _infer_batch(self, batch):
+        preds = self.session.run(None, {self.input_name: batch})[0]
+        return ctc_greedy_decode(preds, self.characters)
@@ -3,24 +3,53 @@
 车牌检测识别完整流程
 整合检测和识别功能
 """
+import numpy as np
+from src.config import settings
+from src.core.async_pipeline import AsyncRunner
 from src.core.detector import PlateDetector
-from src.core.recognizer import PlateRecognizer
+from src.core.quality import QualityGate
+from src.core.recognizer import create_recognizer
+from src.core.server import InferenceServer
+from src.core.stream import StreamProcessor
 from src.utils.visualization import drawRectBox, img_cvread
-from PIL import ImageFont
-from src.config import settings
+from src.utils.metrics import MetricsRegistry
 
 
 class PlatePipeline:
     """车牌检测识别流程类"""
 
-    def __init__(self, detector=None, recognizer=None):
+    def __init__(self, detector=None, recognizer=None, tracker=None, motion_gate=None, metrics=None,
+                 quality_gate=None, roi=None):
         """
         初始化流程
         :param detector: 检测器实例
-        :param recognizer: 识别器实例
+        :param recognizer: 识别器实例（默认按配置中的REC_BACKEND创建）
+        :param tracker: 跟踪器实例（视频流使用，为None时 process_frame 每帧都识别）
+        :param motion_gate: 运动门控实例（视频流使用，画面静止时跳过检测）
+        :param metrics: 指标注册表实例（记录各阶段耗时和计数）
+        :param quality_gate: 识别前质量门控实例（默认按配置中的QUALITY_GATE创建，传入False关闭）
+        :param roi: 感兴趣区域实例（视频流使用，只检测该区域）
         """
         self.detector = detector or PlateDetector()
-        self.recognizer = recognizer or PlateRecognizer()
+        self.recognizer = recognizer or create_recognizer()
+        self.tracker = tracker
+        self.motion_gate = motion_gate
+        self.metrics = metrics or MetricsRegistry()
+        if quality_gate is None and settings.QUALITY_GATE:
+            quality_gate = QualityGate()
+        self.quality_gate = quality_gate or None
+        self.roi = roi
+        self._async_runner = None
+
+    @property
+    def ocr_count(self):
+        """累计送入识别的车牌数"""
+        return self.metrics.counter('ocr_crops')
+
+    @property
+    def rejected_count(self):
+        """累计被质量门控拒绝（跳过识别）的车牌数"""
+        return self.metrics.counter('ocr_rejected')
 
     def process_image(self, image):
         """
@@ -28,41 +57,266 @@ class PlatePipeline:
         :param image: 输入图像（numpy数组或路径）
         :return: (检测框列表, 识别结果列表, 置信度列表)
         """
+        self.metrics.inc('images')
+
         # 检测车牌位置
-        boxes = self.detector.get_plate_boxes(image)
+        with self.metrics.timer('detect'):
+            boxes, confs = self.detector.get_plate_detections(image)
 
         if not boxes:
             return [], [], []
+        self.metrics.inc('plates', len(boxes))
 
         # 读取图像（如果是路径）
         if isinstance(image, str):
-            image = img_cvread(image)
+            with self.metrics.timer('decode'):
+                image = img_cvread(image)
 
-        # 裁剪车牌区域
-        plate_images = self.detector.crop_plates(image, boxes)
+        # 裁剪车牌区域并做质量门控
+        plate_images, keep = self.select_for_ocr(image, boxes, confs)
 
         # 识别车牌号码
-        results = self.recognizer.recognize_batch(plate_images)
+        results = self.fill_results(self._recognize(plate_images) if plate_images else [], keep, len(boxes))
 
         license_list = [r[0] for r in results]
         conf_list = [r[1] for r in results]
 
         return boxes, license_list, conf_list
 
-    def draw_results(self, image, boxes, texts, font_path=None, font_size=50):
+    def process_batch(self, images):
+        """
+        批量处理多帧图像：一次批量检测，所有帧的车牌一起做一次批量识别
+        :param images: 图像列表（numpy数组或路径）
+        :return: [(检测框列表, 识别结果列表, 置信度列表), ...]，与输入一一对应
         """
-        在图像上绘制检测和识别结果
+        self.metrics.inc('images', len(images))
+        with self.metrics.timer('detect'):
+            detections = self.detector.get_plate_detections_batch(images)
+
+        plate_images = []
+        keeps = []
+        for image, (boxes, confs) in zip(images, detections):
+            if boxes and isinstance(image, str):
+                with self.metrics.timer('decode'):
+                    image = img_cvread(image)
+            crops, keep = self.select_for_ocr(image, boxes, confs) if boxes else ([], [])
+            plate_images.extend(crops)
+            keeps.append(keep)
+        self.metrics.inc('plates', sum(len(boxes) for boxes, _ in detections))
+
+        results = self._recognize(plate_images) if plate_images else []
+
+        outputs = []
+        start = 0
+        for (boxes, _), keep in zip(detections, keeps):
+            frame_results = self.fill_results(results[start:start + len(keep)], keep, len(boxes))
+            start += len(keep)
+            outputs.append((boxes, [r[0] for r in frame_results], [r[1] for r in frame_results]))
+        return outputs
+
+    def process_frame(self, frame):
+        """
+        处理视频流中的一帧：检测框经跟踪器关联后，只对新出现的车牌和低置信度车牌做识别，
+        同一车牌的多次识别结果逐字符投票融合
+        :param frame: 视频帧（numpy数组）
+        :return: (检测框列表, 识别结果列表, 置信度列表, 跟踪ID列表)
+        """
+        self.metrics.inc('frames')
+        boxes, confs = self.detect_frame(frame)
+        self.metrics.inc('plates', len(boxes))
+
+        if self.tracker is None:
+            if not boxes:
+                return [], [], [], []
+            plate_images, keep = self.select_for_ocr(frame, boxes, confs)
+            results = self.fill_results(self._recognize(plate_images) if plate_images else [], keep, len(boxes))
+            return boxes, [r[0] for r in results], [r[1] for r in results], [None] * len(boxes)
+
+        with self.metrics.timer('track'):
+            tracks = self.tracker.update(boxes)
+
+        # 被质量门控拒绝的跟踪不记录识别，下一帧重试
+        pending, plate_images = self.select_tracks_for_ocr(self.tracker, frame, tracks, confs)
+        if pending:
+            for track, (text, conf) in zip(pending, self._recognize(plate_images)):
+                track.add_read(text, conf, self.tracker.frame_index)
+
+        license_list = [t.text or '无法识别' for t in tracks]
+        conf_list = [t.conf if t.text else 0 for t in tracks]
+        return boxes, license_list, conf_list, [t.track_id for t in tracks]
+
+    def detect_frame(self, frame):
+        """
+        检测视频帧中的车牌，配置了运动门控时画面静止则复用上一次的检测结果；
+        配置了感兴趣区域时只检测（和判断运动）其外接矩形，中心点在多边形外的框被丢弃
+        :param frame: 视频帧（numpy数组）
+        :return: (车牌边界框列表 [[x1,y1,x2,y2], ...], 检测置信度列表)
+        """
+        region, offset = self.roi.crop(frame) if self.roi is not None else (frame, None)
+        with self.metrics.timer('detect'):
+            if self.motion_gate is None:
+                boxes, confs = self.detector.get_plate_detections(region)
+            else:
+                boxes, confs = self.motion_gate.detect(region, self.detector.get_plate_detections)
+        if self.roi is not None:
+            boxes, confs, discarded = self.roi.restore(boxes, confs, offset, frame.shape)
+            if discarded:
+                self.metrics.inc('roi_discarded', discarded)
+        return boxes, confs
+
+    def gate_plates(self, plate_images, confs=None):
+        """
+        识别前质量门控，累计被拒绝的车牌数
+        :param plate_images: 车牌图像列表
+        :param confs: 检测置信度列表（可选）
+        :return: 通过门控的序号列表
+        """
+        if self.quality_gate is None or not plate_images:
+            return list(range(len(plate_images)))
+        with self.metrics.timer('gate'):
+            passed = self.quality_gate.check(plate_images, confs)
+        rejected = len(plate_images) - int(passed.sum())
+        if rejected:
+            self.metrics.inc('ocr_rejected', rejected)
+        return np.flatnonzero(passed).tolist()
+
+    def select_for_ocr(self, image, boxes, confs=None):
+        """
+        裁剪车牌区域并经质量门控筛选
+        :param image: 原始图像
+        :param boxes: 边界框列表
+        :param confs: 检测置信度列表（可选）
+        :return: (通过门控的车牌图像列表, 其在 boxes 中的序号列表)
+        """
+        with self.metrics.timer('crop'):
+            plate_images = self.detector.crop_plates(image, boxes)
+        keep = self.gate_plates(plate_images, confs)
+        return [plate_images[i] for i in keep], keep
+
+    def select_tracks_for_ocr(self, tracker, frame, tracks, confs=None):
+        """
+        挑选需要识别的跟踪并裁剪，被质量门控拒绝的跟踪留待后续帧重试
+        :param tracker: 跟踪器
+        :param frame: 视频帧
+        :param tracks: tracker.update 返回的、与检测框一一对应的跟踪列表
+        :param confs: 与检测框一一对应的检测置信度列表（可选）
+        :return: (需要识别的跟踪列表, 对应的车牌图像列表)
+        """
+        indices = [i for i, t in enumerate(tracks) if tracker.needs_ocr(t)]
+        if not indices:
+            return [], []
+        pending_confs = [confs[i] for i in indices] if confs is not None else None
+        plate_images, keep = self.select_for_ocr(frame, [tracks[i].box for i in indices], pending_confs)
+        return [tracks[indices[k]] for k in keep], plate_images
+
+    @staticmethod
+    def fill_results(results, keep, count):
+        """
+        把通过门控的车牌的识别结果放回原位置，被拒绝的车牌记为无法识别
+        :param results: 通过门控的车牌的识别结果 [(车牌号, 置信度), ...]
+        :param keep: 通过门控的序号列表
+        :param count: 车牌总数
+        :return: 长度为 count 的 [(车牌号, 置信度), ...]
+        """
+        filled = [('无法识别', 0.0)] * count
+        for i, result in zip(keep, results):
+            filled[i] = result
+        return filled
+
+    def process_stream(self, source, skip_frames=1, draw=True, writer=None, ocr_workers=None, queue_size=None,
+                       controller=None):
+        """
+        多阶段流式处理视频源：采集、检测、识别线程池、绘制/编码在不同线程中并行，
+        阶段之间用有界队列连接，结果按帧顺序产出
+        :param source: 视频路径、摄像头ID或已打开的 cv2.VideoCapture
+        :param skip_frames: 每隔多少帧处理一帧
+        :param draw: 是否把结果绘制到帧上
+        :param writer: 输出视频写入器（需提供 write 方法）
+        :param ocr_workers: 识别线程数
+        :param queue_size: 各阶段之间队列的容量
+        :param controller: 自适应质量控制器（AdaptiveController，可选）
+        :return: FrameResult(index, frame, boxes, license_list, conf_list, track_ids) 生成器
+        """
+        processor = StreamProcessor(self, skip_frames=skip_frames, draw=draw, writer=writer,
+                                    ocr_workers=ocr_workers, queue_size=queue_size, controller=controller)
+        return processor.run(source)
+
+    def configure_async(self, detect_executor=None, ocr_executor=None, max_batch=None, max_wait=None,
+                        max_inflight=None):
+        """
+        配置 asyncio 接口的执行方式（不调用时首次使用按默认配置创建）
+        :param detect_executor: 执行批量检测的线程池/进程池（进程池用 create_process_executor 创建）
+        :param ocr_executor: 执行批量识别的线程池/进程池
+        :param max_batch: 单个批次的最大请求数
+        :param max_wait: 收到批次中第一个请求后最多再等待的时间（秒）
+        :param max_inflight: 使用执行器时每个阶段最多同时执行的批次数
+        :return: AsyncRunner
+        """
+        if self._async_runner is not None:
+            self._async_runner.close()
+        self._async_runner = AsyncRunner(self, detect_executor=detect_executor, ocr_executor=ocr_executor,
+                                         max_batch=max_batch, max_wait=max_wait, max_inflight=max_inflight)
+        return self._async_runner
+
+    @property
+    def async_runner(self):
+        if self._async_runner is None:
+            self.configure_async()
+        return self._async_runner
+
+    async def aprocess_image(self, image):
+        """
+        process_image 的 asyncio 版本：并发等待的协程的检测和识别请求合并成批次执行
+        :param image: 输入图像（numpy数组或路径）
+        :return: (检测框列表, 识别结果列表, 置信度列表)
+        """
+        return await self.async_runner.process_image(image)
+
+    def aprocess_stream(self, source, skip_frames=1, track=True, latest_only=None):
+        """
+        process_stream 的 asyncio 版本，用法: async for result in pipeline.aprocess_stream(source)
+        :param source: 视频路径、摄像头ID、网络流地址或已打开的 cv2.VideoCapture
+        :param skip_frames: 每隔多少帧处理一帧
+        :param track: 是否启用车牌跟踪（每个视频源独立跟踪）
+        :param latest_only: 是否只处理最新帧，None时实时源开启、本地文件关闭
+        :return: FrameResult(index, frame, boxes, license_list, conf_list, track_ids) 异步生成器
+        """
+        return self.async_runner.process_stream(source, skip_frames=skip_frames, track=track,
+                                                latest_only=latest_only)
+
+    def serve(self, host=None, port=None, max_batch=None, max_wait=None):
+        """
+        创建本地推理服务：POST /recognize 上传编码后的图像，并发请求合并成微批次处理
+        :param host: 监听地址（默认仅本机）
+        :param port: 端口，0表示由系统分配
+        :param max_batch: 单个微批次的最大图像数
+        :param max_wait: 收到批次中第一个请求后最多再等待的时间（秒）
+        :return: InferenceServer，调用 start() 后台监听或 serve_forever() 阻塞监听
+        """
+        return InferenceServer(self, host=host, port=port, max_batch=max_batch, max_wait=max_wait)
+
+    def _recognize(self, plate_images):
+        """
+        识别车牌并累计识别次数（线程安全）
+        :param plate_images: 车牌图像列表
+        :return: [(车牌号, 置信度), ...]
+        """
+        self.metrics.inc('ocr_crops', len(plate_images))
+        with self.metrics.timer('ocr'):
+            return self.recognizer.recognize_batch(plate_images)
+
+    def draw_results(self, image, boxes, texts, font_path=None, font_size=None):
+        """
+        在图像上绘制检测和识别结果（原地绘制）
         :param image: 原始图像
         :param boxes: 边界框列表
         :param texts: 识别文本列表
         :param font_path: 字体路径
-        :param font_size: 字体大小
+        :param font_size: 字体大小（默认按框高自动选择）
         :return: 绘制后的图像
         """
-        font_path = font_path or settings.FONT_PATH
-        fontC = ImageFont.truetype(font_path, font_size, 0)
-
-        for text, box in zip(texts, boxes):
-            image = drawRectBox(image, box, text, fontC)
+        with self.metrics.timer('draw'):
+            for text, box in zip(texts, boxes):
+                image = drawRectBox(image, box, text, font_path=font_path, font_size=font_size)
 
         return image
@@ -0,0 +1,80 @@
+# coding:utf-8
+"""
+车牌质量门控模块
+识别前用低成本的向量化指标给每个车牌裁剪打分：像素尺寸、宽高比、拉普拉斯方差清晰度和检测置信度，
+低于阈值的裁剪（过小、截断变形、运动模糊、低置信度）跳过识别
+"""
+import cv2
+import numpy as np
+from src.config import settings
+
+
+class QualityGate:
+    """车牌质量门控类"""
+
+    def __init__(self, min_width=None, min_height=None, aspect_range=None, min_sharpness=None, min_conf=None):
+        """
+        初始化质量门控
+        :param min_width: 最小宽度（像素）
+        :param min_height: 最小高度（像素）
+        :param aspect_range: 宽高比允许范围 (最小, 最大)
+        :param min_sharpness: 最小清晰度（缩放到固定尺寸的灰度图上的拉普拉斯方差）
+        :param min_conf: 最小检测置信度
+        """
+        self.min_width = min_width or settings.QUALITY_MIN_WIDTH
+        self.min_height = min_height or settings.QUALITY_MIN_HEIGHT
+        self.aspect_range = aspect_range or settings.QUALITY_ASPECT_RANGE
+        self.min_sharpness = settings.QUALITY_MIN_SHARPNESS if min_sharpness is None else min_sharpness
+        self.min_conf = settings.QUALITY_MIN_CONF if min_conf is None else min_conf
+        self.sharpness_size = settings.QUALITY_SHARPNESS_SIZE
+
+    def sharpness(self, plate_images):
+        """
+        计算清晰度：各裁剪缩放到同一尺寸后堆叠，一次性计算拉普拉斯响应的方差
+        :param plate_images: 车牌图像列表
+        :return: (N,) 清晰度数组
+        """
+        width, height = self.sharpness_size
+        stack = np.empty((len(plate_images), height, width), dtype=np.float32)
+        for i, image in enumerate(plate_images):
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+            stack[i] = cv2.resize(gray, (width, height), interpolation=cv2.INTER_AREA)
+        # 4邻域拉普拉斯算子，只在内部像素上计算
+        lap = (stack[:, :-2, 1:-1] + stack[:, 2:, 1:-1] + stack[:, 1:-1, :-2] + stack[:, 1:-1, 2:]
+               - 4 * stack[:, 1:-1, 1:-1])
+        return lap.reshape(len(plate_images), -1).var(axis=1)
+
+    def score(self, plate_images, confs=None):
+        """
+        计算各项质量指标
+        :param plate_images: 车牌图像列表
+        :param confs: 检测置信度列表（可选，为None时不检查置信度）
+        :return: {'width', 'height', 'aspect', 'sharpness', 'conf', 'geometry_ok'}，各为 (N,) 数组；
+                 尺寸或宽高比不合格（geometry_ok 为False）的裁剪不计算清晰度（记为0）
+        """
+        count = len(plate_images)
+        shapes = np.array([image.shape[:2] for image in plate_images], dtype=np.float32).reshape(count, 2)
+        height, width = shapes[:, 0], shapes[:, 1]
+        aspect = width / np.maximum(height, 1)
+        sharpness = np.zeros(count, dtype=np.float32)
+        geometry_ok = ((width >= self.min_width) & (height >= self.min_height)
+                       & (aspect >= self.aspect_range[0]) & (aspect <= self.aspect_range[1]))
+        candidates = np.flatnonzero(geometry_ok)
+        if len(candidates):
+            sharpness[candidates] = self.sharpness([plate_images[i] for i in candidates])
+        conf = (np.ones(count, dtype=np.float32) if confs is None
+                else np.asarray(confs, dtype=np.float32).reshape(count))
+        return {'width': width, 'height': height, 'aspect': aspect, 'sharpness': sharpness, 'conf': conf,
+                'geometry_ok': geometry_ok}
+
+    def check(self, plate_images, confs=None):
+        """
+        判断各裁剪是否值得识别
+        :param plate_images: 车牌图像列表
+        :param confs: 检测置信度列表（可选）
+        :return: (N,) 布尔数组，True 表示送入识别
+        """
+        if not plate_images:
+            return np.zeros(0, dtype=bool)
+        scores = self.score(plate_images, confs)
+        return scores['geometry_ok'] & (scores['sharpness'] >= self.min_sharpness) & (scores['conf'] >= self.min_conf)
@@ -0,0 +1,206 @@
+# coding:utf-8
+"""
+识别结果缓存模块
+以车牌裁剪图的感知哈希（缩小、模糊后灰度图的低频DCT系数）为键，对识别结果做LRU+TTL缓存，
+默认只接受哈希完全相同的条目：只差一个字符的两块车牌汉明距离可低至8，而同一车牌加噪/压缩/抖动后可达12，
+按距离近似匹配会返回另一块车牌的文本（阈值可配置，用 scripts/check_rec_cache.py 检查）
+"""
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+from src.config import settings
+from src.core.recognizer import BaseRecognizer
+
+
+def crop_fingerprint(image, hash_size=None):
+    """
+    计算车牌裁剪图的感知哈希
+    灰度化并缩放到固定尺寸（消除尺寸差异），高斯模糊抑制噪声和压缩块效应，
+    做DCT后取左上角低频系数与中位数比较（与整体亮度、对比度无关）
+    :param image: 车牌图像（BGR numpy数组）
+    :param hash_size: 低频系数块大小 (宽, 高)
+    :return: 哈希值（bytes，宽*高-1 个比特）
+    """
+    hash_w, hash_h = hash_size or settings.REC_CACHE_HASH_SIZE
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (hash_w * 4, hash_h * 4), interpolation=cv2.INTER_AREA).astype(np.float32)
+    small = cv2.GaussianBlur(small, (0, 0), 1.0)
+    low = cv2.dct(small)[:hash_h, :hash_w].ravel()
+    # 直流分量只反映整体亮度，不参与比较
+    bits = low[1:] > np.median(low[1:])
+    return np.packbits(bits).tobytes()
+
+
+# 每个字节值的比特数，用于计算打包哈希的汉明距离
+POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint16)
+
+
+def hamming_distances(keys, key):
+    """
+    计算一个哈希与一组哈希的汉明距离
+    :param keys: (N, 字节数) uint8 数组
+    :param key: 哈希值（bytes）
+    :return: (N,) 距离数组
+    """
+    return POPCOUNT[keys ^ np.frombuffer(key, dtype=np.uint8)].sum(axis=1)
+
+
+class LRUCache:
+    """带过期时间的线程安全LRU缓存"""
+
+    def __init__(self, max_size, ttl):
+        """
+        初始化缓存
+        :param max_size: 最大条目数
+        :param ttl: 条目有效期（秒），<=0 表示永不过期
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        读取缓存
+        :param key: 键
+        :return: 值，未命中或已过期时返回None
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, stamp = item
+            if self.ttl > 0 and time.monotonic() - stamp > self.ttl:
+                del self._data[key]
+                self._keys_changed()
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """
+        写入缓存，超出容量时淘汰最久未使用的条目
+        :param key: 键
+        :param value: 值
+        """
+        with self._lock:
+            added = key not in self._data
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+            # 只有新增键时才会淘汰，覆盖已有键不改变键集合
+            if added:
+                self._keys_changed()
+
+    def _keys_changed(self):
+        """键集合变化（新增、淘汰或过期删除）时调用，调用方已持有锁"""
+
+    def __len__(self):
+        return len(self._data)
+
+
+class FingerprintCache(LRUCache):
+    """按汉明距离查找的感知哈希缓存：键为等长的哈希值"""
+
+    def __init__(self, max_size, ttl, max_distance):
+        """
+        初始化缓存
+        :param max_size: 最大条目数
+        :param ttl: 条目有效期（秒），<=0 表示永不过期
+        :param max_distance: 视为同一车牌的最大汉明距离（比特数），0表示只接受完全相同的键
+        """
+        super().__init__(max_size, ttl)
+        self.max_distance = max_distance
+        # 键矩阵 (键列表, (N, 字节数) uint8 数组)，键集合变化后在下一次近似查找时重建
+        self._matrix = None
+
+    def _keys_changed(self):
+        self._matrix = None
+
+    def get_nearest(self, key):
+        """
+        读取汉明距离最近且不超过阈值的条目（完全相同的键直接命中）
+        :param key: 哈希值
+        :return: 值，未命中或已过期时返回None
+        """
+        value = self.get(key)
+        if value is not None or self.max_distance <= 0:
+            return value
+        with self._lock:
+            if not self._data:
+                return None
+            if self._matrix is None:
+                keys = list(self._data)
+                self._matrix = (keys, np.frombuffer(b''.join(keys), dtype=np.uint8).reshape(len(keys), -1))
+            keys, matrix = self._matrix
+            distances = hamming_distances(matrix, key)
+            nearest = int(distances.argmin())
+            if distances[nearest] > self.max_distance:
+                return None
+            key = keys[nearest]
+        return self.get(key)
+
+
+class CachedRecognizer(BaseRecognizer):
+    """带结果缓存的识别器包装类，接口与PlateRecognizer一致"""
+
+    def __init__(self, recognizer, max_size=None, ttl=None, hash_size=None, max_distance=None):
+        """
+        初始化
+        :param recognizer: 被包装的识别器实例
+        :param max_size: 缓存最大条目数（默认使用配置中的REC_CACHE_OPT_IN_SIZE）
+        :param ttl: 缓存有效期（秒）
+        :param hash_size: 感知哈希的低频系数块大小 (宽, 高)
+        :param max_distance: 视为同一车牌的最大汉明距离（比特数），0表示只接受完全相同的键
+        """
+        self.recognizer = recognizer
+        self.hash_size = hash_size or settings.REC_CACHE_HASH_SIZE
+        self.cache = FingerprintCache(max_size or settings.REC_CACHE_OPT_IN_SIZE,
+                                      settings.REC_CACHE_TTL if ttl is None else ttl,
+                                      settings.REC_CACHE_MAX_DISTANCE if max_distance is None else max_distance)
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def stats(self):
+        """
+        缓存统计
+        :return: {'hits', 'misses', 'hit_rate', 'size'}
+        """
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'size': len(self.cache),
+        }
+
+    def _recognize_raw(self, images):
+        results = [(None, None)] * len(images)
+        keys = [None] * len(images)
+        missed = []
+        for i, img in enumerate(images):
+            if img is None or img.ndim < 2 or img.shape[0] == 0 or img.shape[1] == 0:
+                continue
+            keys[i] = crop_fingerprint(img, self.hash_size)
+            cached = self.cache.get_nearest(keys[i])
+            if cached is not None:
+                results[i] = cached
+            else:
+                missed.append(i)
+
+        with self._stats_lock:
+            self.hits += sum(1 for k in keys if k is not None) - len(missed)
+            self.misses += len(missed)
+
+        if missed:
+            for i, result in zip(missed, self.recognizer._recognize_raw([images[i] for i in missed])):
+                results[i] = result
+                # 识别失败的结果不缓存，下一帧可能更清晰
+                if result[0]:
+                    self.cache.put(keys[i], result)
+        return results
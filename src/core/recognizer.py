@@ -1,31 +1,22 @@
 # coding:utf-8
 """
 车牌识别模块
-使用PaddleOCR进行车牌号码识别
+使用PaddleOCR进行车牌号码识别，也可选用不依赖Paddle运行时的ONNX识别后端
 """
-from paddleocr import PaddleOCR
+import threading
+
 from src.config import settings
+from src.utils.preprocess import rec_batch_groups, resize_norm_rec_batch
 
 
-class PlateRecognizer:
-    """车牌识别器类"""
+class BaseRecognizer:
+    """
+    识别器基类
+    负责分组、批量预处理和结果整理，子类只需实现单批次前向推理 _infer_batch
+    """
 
-    def __init__(self, cls_model_dir=None, rec_model_dir=None, use_angle_cls=False):
-        """
-        初始化识别器
-        :param cls_model_dir: 分类模型路径
-        :param rec_model_dir: 识别模型路径
-        :param use_angle_cls: 是否使用角度分类
-        """
-        self.cls_model_dir = cls_model_dir or settings.PADDLE_CLS_MODEL
-        self.rec_model_dir = rec_model_dir or settings.PADDLE_REC_MODEL
-        self.ocr = PaddleOCR(
-            use_angle_cls=use_angle_cls,
-            lang="ch",
-            det=False,
-            cls_model_dir=self.cls_model_dir,
-            rec_model_dir=self.rec_model_dir
-        )
+    rec_image_shape = None
+    rec_batch_num = None
 
     def recognize(self, image):
         """
@@ -33,14 +24,7 @@ class PlateRecognizer:
         :param image: 车牌图像（numpy数组）
         :return: (车牌号, 置信度) 或 (None, None)
         """
-        result = self.ocr.ocr(image, cls=True)[0]
-        if result:
-            license_name, conf = result[0][1]
-            # 去除特殊字符
-            if '·' in license_name:
-                license_name = license_name.replace('·', '')
-            return license_name, conf
-        return None, None
+        return self._recognize_raw([image])[0]
 
     def recognize_batch(self, images):
         """
@@ -49,10 +33,117 @@ class PlateRecognizer:
         :return: [(车牌号, 置信度), ...]
         """
         results = []
-        for img in images:
-            license_num, conf = self.recognize(img)
+        for license_num, conf in self._recognize_raw(images):
             if license_num:
                 results.append((license_num, conf))
             else:
                 results.append(('无法识别', 0))
         return results
+
+    def _prepare(self, images):
+        """
+        识别前的额外处理（如方向分类），默认不做处理
+        :param images: 车牌图像列表
+        :return: 处理后的车牌图像列表
+        """
+        return images
+
+    def _infer_batch(self, batch):
+        """
+        对一个批量张量执行前向推理并解码
+        :param batch: float32 张量 (N, C, H, W)
+        :return: [(文本, 置信度), ...]
+        """
+        raise NotImplementedError
+
+    def _recognize_raw(self, images):
+        """
+        对一组车牌图像执行批量识别：按宽度分组，缩放到模型输入高度并填充为一个张量，
+        每组只做一次前向推理
+        :param images: 车牌图像列表
+        :return: [(车牌号, 置信度) 或 (None, None), ...]，顺序与输入一致
+        """
+        results = [(None, None)] * len(images)
+        # 过滤空裁剪（检测框贴边时可能出现）
+        valid = [i for i, img in enumerate(images)
+                 if img is not None and img.ndim == 3 and img.shape[0] > 0 and img.shape[1] > 0]
+        if not valid:
+            return results
+
+        img_list = self._prepare([images[i] for i in valid])
+        for group in rec_batch_groups(img_list, self.rec_batch_num):
+            batch = resize_norm_rec_batch([img_list[i] for i in group], self.rec_image_shape)
+            for i, (license_name, conf) in zip(group, self._infer_batch(batch)):
+                # 去除特殊字符
+                license_name = license_name.replace('·', '')
+                if license_name:
+                    results[valid[i]] = (license_name, float(conf))
+        return results
+
+
+class PlateRecognizer(BaseRecognizer):
+    """车牌识别器类"""
+
+    def __init__(self, cls_model_dir=None, rec_model_dir=None, use_angle_cls=False, rec_batch_num=None):
+        """
+        初始化识别器
+        :param cls_model_dir: 分类模型路径
+        :param rec_model_dir: 识别模型路径
+        :param use_angle_cls: 是否使用角度分类
+        :param rec_batch_num: 单次前向推理的最大车牌数
+        """
+        from paddleocr import PaddleOCR
+
+        self.cls_model_dir = cls_model_dir or settings.PADDLE_CLS_MODEL
+        self.rec_model_dir = rec_model_dir or settings.PADDLE_REC_MODEL
+        self.use_angle_cls = use_angle_cls
+        self.rec_batch_num = rec_batch_num or settings.REC_BATCH_NUM
+        self.ocr = PaddleOCR(
+            use_angle_cls=use_angle_cls,
+            lang="ch",
+            det=False,
+            cls_model_dir=self.cls_model_dir,
+            rec_model_dir=self.rec_model_dir
+        )
+        self.rec_image_shape = self.ocr.text_recognizer.rec_image_shape
+        # Paddle预测器的输入/输出张量不能被多个线程同时使用
+        self._lock = threading.Lock()
+
+    def _prepare(self, images):
+        if self.use_angle_cls:
+            images, _, _ = self.ocr.text_classifier(images)
+        return images
+
+    def _infer_batch(self, batch):
+        text_recognizer = self.ocr.text_recognizer
+        with self._lock:
+            text_recognizer.input_tensor.copy_from_cpu(batch)
+            text_recognizer.predictor.run()
+            outputs = [t.copy_to_cpu() for t in text_recognizer.output_tensors]
+        preds = outputs[0] if len(outputs) == 1 else outputs
+        return text_recognizer.postprocess_op(preds)
+
+
+def create_recognizer(backend=None, cache_size=None, cache_ttl=None, **kwargs):
+    """
+    创建识别器
+    :param backend: 识别后端名称（paddle / onnxruntime）
+    :param cache_size: 识别结果缓存条目数，0表示不缓存（默认使用配置中的REC_CACHE_SIZE）
+    :param cache_ttl: 识别结果缓存有效期（秒）
+    :param kwargs: 传给识别器构造函数的参数
+    :return: 识别器实例
+    """
+    backend = backend or settings.REC_BACKEND
+    if backend == 'paddle':
+        recognizer = PlateRecognizer(**kwargs)
+    elif backend == 'onnxruntime':
+        from src.core.onnx_recognizer import OnnxPlateRecognizer
+        recognizer = OnnxPlateRecognizer(**kwargs)
+    else:
+        raise ValueError(f"未知的识别后端: {backend}，可选: paddle, onnxruntime")
+
+    cache_size = settings.REC_CACHE_SIZE if cache_size is None else cache_size
+    if cache_size > 0:
+        from src.core.rec_cache import CachedRecognizer
+        recognizer = CachedRecognizer(recognizer, max_size=cache_size, ttl=cache_ttl)
+    return recognizer
@@ -0,0 +1,125 @@
+# coding:utf-8
+"""
+感兴趣区域模块
+每个视频源可配置一个ROI多边形：只检测多边形的外接矩形区域，
+中心点落在多边形之外的检测框在裁剪和识别之前丢弃
+"""
+import json
+import os
+
+import cv2
+import numpy as np
+from src.config import settings
+
+
+def parse_polygon(value):
+    """
+    解析多边形配置
+    :param value: 顶点列表 [[x, y], ...]，或其JSON字符串，或 "x1,y1;x2,y2;..." 格式的字符串
+    :return: (N, 2) float32 数组
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        if value.startswith('['):
+            value = json.loads(value)
+        else:
+            value = [point.split(',') for point in value.split(';') if point.strip()]
+    polygon = np.asarray(value, dtype=np.float32).reshape(-1, 2)
+    if len(polygon) < 3:
+        raise ValueError(f"ROI多边形至少需要3个顶点: {value}")
+    return polygon
+
+
+class RegionOfInterest:
+    """感兴趣区域类"""
+
+    def __init__(self, polygon):
+        """
+        初始化
+        :param polygon: 多边形顶点，坐标全部不大于1时视为相对帧宽高的比例坐标
+        """
+        self.polygon = parse_polygon(polygon)
+        self.relative = bool((self.polygon <= 1.0).all())
+        self._shape = None
+        self._rect = None
+        self._mask = None
+
+    def _resolve(self, shape):
+        """按帧尺寸计算多边形的像素坐标、外接矩形和掩码（尺寸不变时复用）"""
+        shape = tuple(shape[:2])
+        if shape == self._shape:
+            return
+        height, width = shape
+        points = self.polygon * (width, height) if self.relative else self.polygon
+        points = np.round(points).astype(np.int32)
+        x1, y1 = np.clip(points.min(axis=0), 0, (width, height))
+        x2, y2 = np.clip(points.max(axis=0) + 1, 0, (width, height))
+        if x2 <= x1 or y2 <= y1:
+            raise ValueError(f"ROI多边形不在画面范围内: {self.polygon.tolist()}")
+        mask = np.zeros(shape, dtype=np.uint8)
+        cv2.fillPoly(mask, [points], 1)
+        self._shape = shape
+        self._rect = (int(x1), int(y1), int(x2), int(y2))
+        self._mask = mask.astype(bool)
+
+    def rect(self, shape):
+        """
+        :param shape: 帧尺寸 (H, W, ...)
+        :return: 多边形的外接矩形 (x1, y1, x2, y2)
+        """
+        self._resolve(shape)
+        return self._rect
+
+    def crop(self, frame):
+        """
+        取外接矩形区域（原帧的视图，不拷贝像素）
+        :param frame: 视频帧
+        :return: (区域图像, (左上角x, 左上角y))
+        """
+        x1, y1, x2, y2 = self.rect(frame.shape)
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def restore(self, boxes, confs, offset, shape):
+        """
+        把区域内的检测框平移回原帧坐标，并丢弃中心点在多边形之外的框
+        :param boxes: 区域坐标下的边界框列表
+        :param confs: 置信度列表（可为None）
+        :param offset: crop 返回的区域左上角坐标
+        :param shape: 原帧尺寸
+        :return: (边界框列表, 置信度列表, 丢弃的框数)
+        """
+        if not boxes:
+            return [], [] if confs is not None else None, 0
+        self._resolve(shape)
+        x, y = offset
+        array = np.asarray(boxes, dtype=np.int64).reshape(-1, 4) + (x, y, x, y)
+        height, width = self._shape
+        cx = np.clip((array[:, 0] + array[:, 2]) // 2, 0, width - 1)
+        cy = np.clip((array[:, 1] + array[:, 3]) // 2, 0, height - 1)
+        inside = self._mask[cy, cx]
+        kept = array[inside].tolist()
+        if confs is not None:
+            confs = [conf for conf, keep in zip(confs, inside) if keep]
+        return kept, confs, int(len(array) - inside.sum())
+
+
+def source_key(source):
+    """视频源在 ROI_POLYGONS 配置中的键：设备ID、网络流地址或文件路径"""
+    return str(source).strip()
+
+
+def load_roi(source, polygon=None):
+    """
+    获取视频源的感兴趣区域
+    :param source: 设备ID、文件路径或网络流地址
+    :param polygon: 显式指定的多边形（优先于配置）
+    :return: RegionOfInterest，未配置时返回None
+    """
+    if polygon is None:
+        polygons = settings.ROI_POLYGONS
+        key = source_key(source)
+        # 文件也可以只用文件名作为键
+        polygon = polygons.get(key, polygons.get(os.path.basename(key)))
+    if polygon is None:
+        return None
+    return RegionOfInterest(polygon)
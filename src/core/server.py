@@ -0,0 +1,140 @@
+# coding:utf-8
+"""
+本地推理服务模块
+常驻进程在本机提供HTTP接口：POST /recognize 上传编码后的图像（JPEG/PNG等原始字节），
+并发请求在最大等待窗口内合并成微批次，一次批量检测和识别后各自返回JSON结果
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+from src.config import settings
+from src.core.batching import MicroBatcher
+
+
+def format_plates(boxes, license_list, conf_list):
+    """
+    把单张图像的处理结果转换为可JSON序列化的列表
+    :return: [{'box': [x1, y1, x2, y2], 'text': 车牌号, 'conf': 置信度}, ...]
+    """
+    return [{'box': list(map(int, box)), 'text': text, 'conf': round(float(conf), 4)}
+            for box, text, conf in zip(boxes, license_list, conf_list)]
+
+
+class InferenceServer:
+    """本地推理服务类"""
+
+    def __init__(self, pipeline, host=None, port=None, max_batch=None, max_wait=None):
+        """
+        初始化服务（不会开始监听，调用 start() 或 serve_forever()）
+        :param pipeline: PlatePipeline 实例
+        :param host: 监听地址（默认仅本机）
+        :param port: 端口，0表示由系统分配
+        :param max_batch: 单个微批次的最大图像数
+        :param max_wait: 收到批次中第一个请求后最多再等待的时间（秒）
+        """
+        self.pipeline = pipeline
+        self.host = host or settings.SERVER_HOST
+        self.port = settings.SERVER_PORT if port is None else port
+        self.batcher = MicroBatcher(self._process, max_batch=max_batch, max_wait=max_wait)
+        self.httpd = ThreadingHTTPServer((self.host, self.port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def _process(self, images):
+        """批处理函数：一个微批次的图像一起检测和识别"""
+        metrics = self.pipeline.metrics
+        metrics.inc('server_batches')
+        return [format_plates(*result) for result in self.pipeline.process_batch(images)]
+
+    def recognize(self, data):
+        """
+        识别一张编码后的图像（阻塞直到所在批次处理完成，可在多个线程中并发调用）
+        :param data: 图像文件字节
+        :return: [{'box', 'text', 'conf'}, ...]
+        """
+        with self.pipeline.metrics.timer('decode'):
+            image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError("无法解码图像数据")
+        return self.batcher.submit(image).result()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send_json(self, status, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == '/health':
+                    self._send_json(200, {'status': 'ok', **server.batcher.stats()})
+                elif self.path == '/metrics':
+                    data = server.pipeline.metrics.to_prometheus().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                if self.path != '/recognize':
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get('Content-Length') or 0)
+                if length <= 0:
+                    self._send_json(400, {'error': '请求体为空'})
+                    return
+                if length > settings.SERVER_MAX_BODY:
+                    self._send_json(413, {'error': f'图像超过 {settings.SERVER_MAX_BODY} 字节'})
+                    return
+                data = self.rfile.read(length)
+                start = time.perf_counter()
+                try:
+                    plates = server.recognize(data)
+                except ValueError as e:
+                    self._send_json(400, {'error': str(e)})
+                    return
+                except Exception as e:
+                    self._send_json(500, {'error': str(e)})
+                    return
+                server.pipeline.metrics.observe('request', time.perf_counter() - start)
+                self._send_json(200, {'plates': plates})
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """在后台线程中开始监听"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """在当前线程中监听，直到 shutdown()"""
+        self.httpd.serve_forever()
+
+    def shutdown(self):
+        """停止监听，处理完已提交的请求后关闭"""
+        if self._thread is not None:
+            self.httpd.shutdown()
+            self._thread.join()
+        self.httpd.server_close()
+        self.batcher.close()
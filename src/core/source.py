@@ -0,0 +1,199 @@
+# coding:utf-8
+"""
+视频源模块
+统一摄像头设备ID、本地视频文件和网络流（RTSP/HTTP/RTMP等）的打开方式；
+实时源读取失败时按指数退避自动重连，本地文件可按原始帧率限速读取以模拟实时源
+"""
+import glob
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+from src.config import settings
+
+# 网络流地址前缀
+STREAM_SCHEMES = ('rtsp://', 'rtsps://', 'rtmp://', 'http://', 'https://', 'udp://', 'tcp://', 'srt://')
+
+
+def parse_source(source):
+    """
+    解析视频源
+    :param source: 设备ID（整数或数字字符串）、文件路径或网络流地址
+    :return: (类型, 规范化后的源)，类型为 'device' / 'stream' / 'file'
+    """
+    if isinstance(source, int):
+        return 'device', source
+    source = str(source).strip()
+    if source.isdigit():
+        return 'device', int(source)
+    if source.lower().startswith(STREAM_SCHEMES):
+        return 'stream', source
+    return 'file', source
+
+
+def open_capture(source, timeout=None):
+    """
+    打开视频源
+    :param source: 设备ID、文件路径或网络流地址
+    :param timeout: 网络流的打开/读取超时（秒）
+    :return: cv2.VideoCapture（可能未成功打开，需检查 isOpened()）
+    """
+    kind, source = parse_source(source)
+    if kind == 'stream':
+        timeout_ms = int((timeout or settings.SOURCE_TIMEOUT) * 1000)
+        cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG, [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms,
+                                                        cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms])
+    else:
+        cap = cv2.VideoCapture(source)
+    if kind != 'file':
+        # 实时源只保留最少的内部缓冲，减少积压的旧帧（部分后端不支持，忽略即可）
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+def _probe_device(device_id):
+    """打开设备并抓取一帧，成功时返回已打开的 VideoCapture"""
+    cap = cv2.VideoCapture(device_id)
+    if cap.isOpened() and cap.grab():
+        return cap
+    cap.release()
+    return None
+
+
+def find_camera(max_id=None):
+    """
+    查找可用的摄像头：Linux下只探测存在的 /dev/video* 设备，多个候选并行探测
+    :param max_id: 最大探测的设备ID（不含）
+    :return: 可用的最小设备ID，没有时返回None
+    """
+    max_id = max_id or settings.CAMERA_PROBE_IDS
+    if sys.platform.startswith('linux'):
+        nodes = glob.glob('/dev/video*')
+        ids = sorted(int(n[len('/dev/video'):]) for n in nodes if n[len('/dev/video'):].isdigit())
+        candidates = [i for i in ids if i < max_id]
+    else:
+        candidates = list(range(max_id))
+    if not candidates:
+        return None
+
+    with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+        caps = list(executor.map(_probe_device, candidates))
+    found = None
+    for device_id, cap in zip(candidates, caps):
+        if cap is not None:
+            if found is None:
+                found = device_id
+            cap.release()
+    return found
+
+
+class VideoSource:
+    """
+    视频源类，接口与 cv2.VideoCapture 的 read / grab / get / isOpened / release 兼容
+
+    设备和网络流读取失败时自动重连（指数退避），本地文件读到结尾即结束；
+    配合 FrameReader(source, latest_only=True) 使用时总是处理最新解码的帧
+    """
+
+    def __init__(self, source, realtime=False, reconnect_attempts=None, timeout=None):
+        """
+        初始化视频源
+        :param source: 设备ID、文件路径或网络流地址
+        :param realtime: 本地文件是否按原始帧率限速读取（模拟实时源，便于用文件测试）
+        :param reconnect_attempts: 单次断线的最大重连次数，0表示不限
+        :param timeout: 网络流的打开/读取超时（秒）
+        """
+        self.kind, self.source = parse_source(source)
+        self.live = self.kind != 'file'
+        self.realtime = realtime and not self.live
+        self.reconnect_attempts = (settings.SOURCE_RECONNECT_ATTEMPTS
+                                   if reconnect_attempts is None else reconnect_attempts)
+        self.timeout = timeout
+        self.reconnects = 0
+        self._closed = threading.Event()
+        self.cap = open_capture(self.source, timeout)
+        self._frame_interval = 0.0
+        if self.realtime:
+            fps = self.cap.get(cv2.CAP_PROP_FPS)
+            self._frame_interval = 1.0 / fps if fps > 0 else 0.0
+        self._next_time = None
+
+    def _pace(self):
+        """按原始帧率限速"""
+        if not self._frame_interval:
+            return
+        now = time.perf_counter()
+        if self._next_time is None or now - self._next_time > 1.0:
+            # 第一帧或处理严重滞后时重新对齐时钟，不追赶
+            self._next_time = now
+        elif self._next_time > now:
+            time.sleep(self._next_time - now)
+        self._next_time += self._frame_interval
+
+    def _reconnect(self):
+        """
+        断线重连：等待时间从 SOURCE_RECONNECT_DELAY 开始按倍数增长，上限 SOURCE_RECONNECT_MAX_DELAY
+        :return: 是否重连成功
+        """
+        delay = settings.SOURCE_RECONNECT_DELAY
+        attempt = 0
+        while not self._closed.is_set():
+            attempt += 1
+            if self.reconnect_attempts and attempt > self.reconnect_attempts:
+                return False
+            self.cap.release()
+            if self._closed.wait(delay):
+                return False
+            self.cap = open_capture(self.source, self.timeout)
+            if self.cap.isOpened():
+                self.reconnects += 1
+                return True
+            delay = min(delay * 2, settings.SOURCE_RECONNECT_MAX_DELAY)
+        return False
+
+    def read(self, image=None):
+        """
+        读取一帧，实时源失败时重连后继续
+        :param image: 可选的输出缓冲区（与 cv2.VideoCapture.read 相同）
+        :return: (是否成功, 帧)
+        """
+        while not self._closed.is_set():
+            success, frame = self.cap.read(image)
+            if success:
+                self._pace()
+                return True, frame
+            if not self.live or not self._reconnect():
+                break
+        return False, None
+
+    def grab(self):
+        """
+        抓取一帧但不解码，实时源失败时重连后继续
+        :return: 是否成功
+        """
+        while not self._closed.is_set():
+            if self.cap.grab():
+                self._pace()
+                return True
+            if not self.live or not self._reconnect():
+                break
+        return False
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def set(self, prop_id, value):
+        return self.cap.set(prop_id, value)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def release(self):
+        """停止重连并释放底层视频源"""
+        self._closed.set()
+        self.cap.release()
+
+    def __repr__(self):
+        return f"VideoSource({self.kind}: {self.source})"
@@ -0,0 +1,248 @@
+# coding:utf-8
+"""
+多阶段流式处理模块
+采集、检测、识别线程池、绘制/编码各自独立运行，阶段之间用有界队列连接（队列满时上游阻塞），
+结果按帧序号顺序输出
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+from src.config import settings
+
+# 流式处理的单帧输出
+FrameResult = namedtuple('FrameResult', ['index', 'frame', 'boxes', 'license_list', 'conf_list', 'track_ids'])
+
+# 队列结束标记
+_END = object()
+
+
+class StreamProcessor:
+    """多阶段流式处理器类"""
+
+    def __init__(self, pipeline, skip_frames=1, draw=True, writer=None, ocr_workers=None, queue_size=None,
+                 controller=None):
+        """
+        初始化流式处理器
+        :param pipeline: PlatePipeline 实例（提供检测器、识别器和可选的跟踪器）
+        :param skip_frames: 每隔多少帧处理一帧
+        :param draw: 是否在绘制阶段把结果画到帧上
+        :param writer: 输出视频写入器（需提供 write 方法），在绘制阶段写入
+        :param ocr_workers: 识别线程数
+        :param queue_size: 各阶段之间队列的容量
+        :param controller: 自适应质量控制器（AdaptiveController，可选），运行中调整跳帧、检测尺寸和识别频率
+        """
+        self.pipeline = pipeline
+        self.skip_frames = max(1, int(skip_frames))
+        self.draw = draw
+        self.writer = writer
+        self.ocr_workers = ocr_workers or settings.STREAM_OCR_WORKERS
+        self.queue_size = queue_size or settings.STREAM_QUEUE_SIZE
+        self.stop_event = threading.Event()
+        self.controller = controller
+        if controller is not None:
+            controller.bind(self)
+
+    def run(self, source):
+        """
+        启动各阶段线程并按帧顺序产出结果
+        :param source: 视频路径、摄像头ID、已打开的 cv2.VideoCapture 或 FrameReader
+        :return: FrameResult 生成器；使用 FrameReader 时产出的帧在取下一个结果后会被复用
+        """
+        cap = source if hasattr(source, 'read') else cv2.VideoCapture(source)
+        if not cap.isOpened():
+            raise IOError(f"无法打开视频源: {source}")
+        # FrameReader 的帧缓冲区需要在用完后归还
+        recycle = getattr(cap, 'recycle', None)
+
+        # 只取最新帧时不在检测队列中积压旧帧
+        detect_queue = queue.Queue(1 if getattr(cap, 'latest_only', False) else self.queue_size)
+        render_queue = queue.Queue(self.queue_size)
+        output_queue = queue.Queue(self.queue_size)
+        executor = ThreadPoolExecutor(max_workers=self.ocr_workers)
+
+        threads = [
+            threading.Thread(target=self._guard, args=(self._capture, output_queue, cap, detect_queue), daemon=True),
+            threading.Thread(target=self._guard, args=(self._detect, output_queue, detect_queue, render_queue,
+                                                       executor), daemon=True),
+            threading.Thread(target=self._guard, args=(self._render, output_queue, render_queue, output_queue),
+                             daemon=True),
+        ]
+        for t in threads:
+            t.start()
+
+        try:
+            while True:
+                item = output_queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+                if recycle is not None:
+                    recycle(item.frame)
+        finally:
+            self.stop_event.set()
+            for q in (detect_queue, render_queue, output_queue):
+                self._drain(q)
+            for t in threads:
+                t.join(timeout=1.0)
+            executor.shutdown(wait=False)
+            if cap is not source:
+                cap.release()
+
+    def _guard(self, stage, error_queue, *args):
+        """
+        运行阶段函数，出错时把异常交给消费端并停止所有阶段
+        :param stage: 阶段函数
+        :param error_queue: 输出队列
+        """
+        try:
+            stage(*args)
+        except Exception as e:
+            self.stop_event.set()
+            self._drain(error_queue)
+            error_queue.put(e)
+
+    def _put(self, q, item):
+        """
+        阻塞写入队列（背压），停止时放弃
+        :return: 是否写入成功
+        """
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """
+        阻塞读取队列，停止时返回结束标记
+        """
+        while not self.stop_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    @staticmethod
+    def _drain(q):
+        """清空队列，解除上游阻塞"""
+        try:
+            while True:
+                q.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _capture(self, cap, out_queue):
+        """采集阶段：读取视频帧"""
+        index = 0
+        metrics = self.pipeline.metrics
+        # FrameReader 已在解码线程中跳帧，每读一帧对应源中的 step 帧
+        step = getattr(cap, 'skip_frames', 1)
+        grab = getattr(cap, 'grab', None)
+        while not self.stop_event.is_set():
+            if grab is not None and (index + 1) % self.skip_frames != 0:
+                # 跳过的帧只 grab() 不解码
+                with metrics.timer('grab'):
+                    success = grab()
+                if not success:
+                    break
+                index += 1
+                continue
+            with metrics.timer('decode'):
+                success, frame = cap.read()
+            if not success:
+                break
+            index += step
+            if index % self.skip_frames != 0:
+                if hasattr(cap, 'recycle'):
+                    cap.recycle(frame)
+                continue
+            if not self._put(out_queue, (index, frame, time.perf_counter())):
+                return
+        self._put(out_queue, _END)
+
+    def _detect(self, in_queue, out_queue, executor):
+        """检测阶段：检测、跟踪关联，并把需要识别的车牌提交到识别线程池"""
+        pipeline = self.pipeline
+        tracker = pipeline.tracker
+        metrics = pipeline.metrics
+        while True:
+            item = self._get(in_queue)
+            if item is _END:
+                break
+            index, frame, captured = item
+            start = time.perf_counter()
+            boxes, confs = pipeline.detect_frame(frame)
+            metrics.inc('plates', len(boxes))
+
+            if tracker is not None:
+                with metrics.timer('track'):
+                    tracks = tracker.update(boxes)
+                # 被质量门控拒绝的跟踪不记录识别帧，下一帧重试
+                pending, plate_images = pipeline.select_tracks_for_ocr(tracker, frame, tracks, confs)
+                # 提交时即记录识别帧，避免识别结果返回前重复提交
+                for t in pending:
+                    t.last_ocr_frame = tracker.frame_index
+            else:
+                tracks = None
+                plate_images, pending = pipeline.select_for_ocr(frame, boxes, confs) if boxes else ([], [])
+
+            future = executor.submit(self._recognize, plate_images) if plate_images else None
+            frame_index = tracker.frame_index if tracker is not None else index
+            cost = time.perf_counter() - start
+            if not self._put(out_queue, (index, frame, captured, cost, boxes, tracks, pending, frame_index, future)):
+                return
+        self._put(out_queue, _END)
+
+    def _recognize(self, plate_images):
+        """
+        识别线程池中执行的识别
+        :return: ([(车牌号, 置信度), ...], 耗时)
+        """
+        start = time.perf_counter()
+        results = self.pipeline._recognize(plate_images)
+        return results, time.perf_counter() - start
+
+    def _render(self, in_queue, out_queue):
+        """绘制/编码阶段：按帧顺序等待识别结果、融合跟踪结果、绘制并写入输出视频"""
+        pipeline = self.pipeline
+        while True:
+            item = self._get(in_queue)
+            if item is _END:
+                break
+            index, frame, captured, cost, boxes, tracks, pending, frame_index, future = item
+            results, ocr_time = future.result() if future is not None else ([], 0.0)
+
+            if tracks is not None:
+                for track, (text, conf) in zip(pending, results):
+                    track.add_read(text, conf, frame_index)
+                license_list = [t.text or '无法识别' for t in tracks]
+                conf_list = [t.conf if t.text else 0 for t in tracks]
+                track_ids = [t.track_id for t in tracks]
+            else:
+                # 未跟踪时 pending 为通过质量门控的检测框序号
+                results = pipeline.fill_results(results, pending, len(boxes))
+                license_list = [r[0] for r in results]
+                conf_list = [r[1] for r in results]
+                track_ids = [None] * len(boxes)
+
+            if self.draw and boxes:
+                frame = pipeline.draw_results(frame, boxes, license_list)
+            if self.writer is not None:
+                with pipeline.metrics.timer('encode'):
+                    self.writer.write(frame)
+            pipeline.metrics.inc('frames')
+            if self.controller is not None:
+                # 识别耗时平摊到识别线程上
+                self.controller.observe(time.perf_counter() - captured, cost + ocr_time / self.ocr_workers)
+            if not self._put(out_queue, FrameResult(index, frame, boxes, license_list, conf_list, track_ids)):
+                return
+        self._put(out_queue, _END)
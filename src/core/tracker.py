@@ -0,0 +1,181 @@
+# coding:utf-8
+"""
+车牌跟踪模块
+SORT风格的IoU关联 + 匀速运动预测，为每个车牌分配稳定的跟踪ID，
+并对同一车牌的多次识别结果做逐字符投票融合
+"""
+from collections import defaultdict
+
+import numpy as np
+from src.config import settings
+
+
+def iou_matrix(a, b):
+    """
+    计算两组边界框的IoU矩阵
+    :param a: (N, 4) x1,y1,x2,y2
+    :param b: (M, 4) x1,y1,x2,y2
+    :return: (N, M)
+    """
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+class PlateTrack:
+    """单个车牌的跟踪状态"""
+
+    def __init__(self, track_id, box, frame_index):
+        """
+        初始化跟踪
+        :param track_id: 跟踪ID
+        :param box: 边界框 [x1,y1,x2,y2]
+        :param frame_index: 创建时的帧序号
+        """
+        self.track_id = track_id
+        self.start_frame = frame_index
+        self.box = list(box)
+        self.velocity = np.zeros(4, dtype=np.float32)
+        self.hits = 1
+        self.time_since_update = 0
+        self.last_ocr_frame = None
+        self.ocr_attempts = 0
+        self.reads = []
+        self.text = None
+        self.conf = 0.0
+
+    def predict(self):
+        """
+        按匀速模型预测下一帧位置
+        :return: 预测边界框
+        """
+        return np.asarray(self.box, dtype=np.float32) + self.velocity * (self.time_since_update + 1)
+
+    def update(self, box):
+        """
+        用新的检测框更新跟踪，速度做指数平滑
+        :param box: 边界框 [x1,y1,x2,y2]
+        """
+        delta = (np.asarray(box, dtype=np.float32) - np.asarray(self.box, dtype=np.float32))
+        delta /= self.time_since_update + 1
+        self.velocity = 0.5 * self.velocity + 0.5 * delta
+        self.box = list(box)
+        self.hits += 1
+        self.time_since_update = 0
+
+    def add_read(self, text, conf, frame_index):
+        """
+        记录一次识别结果并重新融合
+        :param text: 识别文本（'无法识别'视为无效结果）
+        :param conf: 置信度
+        :param frame_index: 识别时的帧序号
+        """
+        self.last_ocr_frame = frame_index
+        self.ocr_attempts += 1
+        if text and text != '无法识别':
+            self.reads.append((text, float(conf)))
+            self.text, self.conf = vote_text(self.reads)
+
+
+def vote_text(reads):
+    """
+    逐字符投票融合多次识别结果
+    先按置信度加权选出最常见的长度，再对该长度的结果逐位置加权投票
+    :param reads: [(文本, 置信度), ...]
+    :return: (融合文本, 融合置信度)
+    """
+    length_weights = defaultdict(float)
+    for text, conf in reads:
+        length_weights[len(text)] += conf
+    length = max(length_weights, key=length_weights.get)
+    candidates = [(text, conf) for text, conf in reads if len(text) == length]
+
+    chars = []
+    agreement = []
+    for pos in range(length):
+        weights = defaultdict(float)
+        for text, conf in candidates:
+            weights[text[pos]] += conf
+        best = max(weights, key=weights.get)
+        total = sum(weights.values())
+        chars.append(best)
+        agreement.append(weights[best] / total if total > 0 else 0.0)
+
+    mean_conf = sum(conf for _, conf in candidates) / len(candidates)
+    return ''.join(chars), mean_conf * (sum(agreement) / len(agreement) if agreement else 0.0)
+
+
+class PlateTracker:
+    """车牌跟踪器类"""
+
+    def __init__(self, iou_threshold=None, max_age=None, ocr_conf=None, reocr_interval=None, max_reads=None):
+        """
+        初始化跟踪器
+        :param iou_threshold: 检测框与跟踪关联的最小IoU
+        :param max_age: 跟踪允许连续丢失的最大帧数
+        :param ocr_conf: 融合置信度低于该值的跟踪会周期性重新识别
+        :param reocr_interval: 低置信度跟踪重新识别的帧间隔
+        :param max_reads: 每个跟踪最多识别的次数
+        """
+        self.iou_threshold = iou_threshold or settings.TRACK_IOU_THRESHOLD
+        self.max_age = max_age or settings.TRACK_MAX_AGE
+        self.ocr_conf = ocr_conf or settings.TRACK_OCR_CONF
+        self.reocr_interval = reocr_interval or settings.TRACK_REOCR_INTERVAL
+        self.max_reads = max_reads or settings.TRACK_MAX_READS
+        self.tracks = []
+        self.frame_index = 0
+        self.next_id = 1
+
+    def update(self, boxes):
+        """
+        用当前帧检测框更新跟踪
+        :param boxes: 检测框列表 [[x1,y1,x2,y2], ...]
+        :return: 与检测框一一对应的跟踪列表
+        """
+        self.frame_index += 1
+        assigned = [None] * len(boxes)
+        matched = set()
+
+        if self.tracks and boxes:
+            predicted = np.stack([t.predict() for t in self.tracks])
+            iou = iou_matrix(boxes, predicted)
+            # 按IoU从大到小贪心匹配
+            for flat in np.argsort(-iou, axis=None):
+                d, t = divmod(int(flat), iou.shape[1])
+                if iou[d, t] < self.iou_threshold:
+                    break
+                if assigned[d] is not None or t in matched:
+                    continue
+                self.tracks[t].update(boxes[d])
+                assigned[d] = self.tracks[t]
+                matched.add(t)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched:
+                track.time_since_update += 1
+        self.tracks = [t for t in self.tracks if t.time_since_update <= self.max_age]
+
+        for d, box in enumerate(boxes):
+            if assigned[d] is None:
+                track = PlateTrack(self.next_id, box, self.frame_index)
+                self.next_id += 1
+                self.tracks.append(track)
+                assigned[d] = track
+        return assigned
+
+    def needs_ocr(self, track):
+        """
+        判断跟踪是否需要识别：新跟踪立即识别，低置信度跟踪按间隔重新识别
+        :param track: 跟踪对象
+        :return: 是否需要识别
+        """
+        if track.last_ocr_frame is None:
+            return True
+        if track.conf >= self.ocr_conf or track.ocr_attempts >= self.max_reads:
+            return False
+        return self.frame_index - track.last_ocr_frame >= self.reocr_interval
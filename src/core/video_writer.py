@@ -0,0 +1,222 @@
+# coding:utf-8
+"""
+异步视频写入模块
+编码在独立线程中进行（ffmpeg后端的编码在独立进程中进行），处理线程只把帧拷贝进预分配的缓冲区后立即返回；
+缓冲区用尽时按策略阻塞等待或丢帧。支持 OpenCV VideoWriter 和 ffmpeg 管道（libx264）两种后端，
+未指定帧率时按前若干帧的实际写入间隔测得
+"""
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import cv2
+import numpy as np
+from src.config import settings
+
+# 队列结束标记
+_END = object()
+
+
+class OpenCVEncoder:
+    """OpenCV VideoWriter 编码后端"""
+
+    def __init__(self, path, fps, size, fourcc='mp4v'):
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if not self.writer.isOpened():
+            raise IOError(f"无法创建输出视频: {path}")
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+
+class FFmpegEncoder:
+    """ffmpeg 管道编码后端：BGR原始帧写入 ffmpeg 标准输入，由 libx264 编码"""
+
+    def __init__(self, path, fps, size, preset=None, crf=None, ffmpeg_path=None):
+        binary = shutil.which(ffmpeg_path or settings.FFMPEG_PATH)
+        if binary is None:
+            raise FileNotFoundError(f"未找到ffmpeg可执行文件: {ffmpeg_path or settings.FFMPEG_PATH}")
+        width, height = size
+        command = [
+            binary, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{width}x{height}', '-r', f'{fps:.3f}', '-i', '-',
+            '-an', '-c:v', 'libx264', '-preset', preset or settings.WRITER_PRESET,
+            '-crf', str(settings.WRITER_CRF if crf is None else crf), '-pix_fmt', 'yuv420p', path,
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(frame.data)
+
+    def close(self):
+        self.process.stdin.close()
+        if self.process.wait() != 0:
+            raise IOError(f"ffmpeg 编码失败，退出码: {self.process.returncode}")
+
+
+# 编码后端注册表
+ENCODERS = {
+    'opencv': OpenCVEncoder,
+    'ffmpeg': FFmpegEncoder,
+}
+
+
+class AsyncVideoWriter:
+    """
+    异步视频写入器类，接口与 cv2.VideoWriter 的 write / isOpened / release 兼容
+
+    write() 把帧拷贝进空闲缓冲区后立即返回，调用方之后可以继续修改或复用该帧
+    """
+
+    def __init__(self, path, fps, size, backend=None, queue_size=None, policy=None, preset=None, crf=None):
+        """
+        初始化写入器
+        :param path: 输出视频路径
+        :param fps: 帧率，为None时按前若干帧的写入间隔测得
+        :param size: 帧尺寸 (宽, 高)
+        :param backend: 编码后端（opencv / ffmpeg）
+        :param queue_size: 待编码帧缓冲区数量
+        :param policy: 缓冲区用尽时的策略：block 阻塞等待，drop 丢弃该帧
+        :param preset: ffmpeg 后端的 libx264 预设
+        :param crf: ffmpeg 后端的 libx264 质量参数
+        """
+        backend = backend or settings.WRITER_BACKEND
+        if backend not in ENCODERS:
+            raise ValueError(f"未知的编码后端: {backend}，可选: {', '.join(ENCODERS)}")
+        self.policy = policy or settings.WRITER_POLICY
+        if self.policy not in ('block', 'drop'):
+            raise ValueError(f"未知的缓冲区策略: {self.policy}，可选: block, drop")
+
+        self.path = path
+        self.fps = fps
+        self.size = tuple(size)
+        self.backend = backend
+        self.encoder_kwargs = {'preset': preset, 'crf': crf} if backend == 'ffmpeg' else {}
+        self.queue_size = max(2, queue_size or settings.WRITER_QUEUE_SIZE)
+        self.written = 0
+        self.dropped = 0
+        self.error = None
+
+        # 帧率已知时立即打开编码后端，配置错误（如找不到ffmpeg）直接在此抛出
+        self._encoder = self._open_encoder() if fps else None
+
+        width, height = self.size
+        self._free = queue.Queue()
+        for _ in range(self.queue_size):
+            self._free.put(np.empty((height, width, 3), dtype=np.uint8))
+        self._pending = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def isOpened(self):
+        return self.error is None
+
+    def write(self, frame):
+        """
+        提交一帧待编码
+        :param frame: BGR图像，尺寸需与 size 一致
+        """
+        if self.error is not None:
+            raise self.error
+        if self.policy == 'drop':
+            try:
+                buf = self._free.get_nowait()
+            except queue.Empty:
+                self.dropped += 1
+                return
+        else:
+            buf = self._get_free()
+        np.copyto(buf, frame)
+        self._pending.put((buf, time.perf_counter()))
+
+    def _get_free(self):
+        """阻塞等待空闲缓冲区，编码线程出错时抛出其异常"""
+        while True:
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                if self.error is not None:
+                    raise self.error
+
+    def _measure_fps(self, probe):
+        """
+        按前若干帧的写入间隔测量帧率（测量期间的帧暂存在缓冲区中）
+        :param probe: 已取出的 (帧, 时间戳) 列表
+        :return: 是否已收到结束标记
+        """
+        count = min(settings.WRITER_FPS_PROBE_FRAMES, self.queue_size)
+        while len(probe) < count:
+            item = self._pending.get()
+            if item is _END:
+                break
+            probe.append(item)
+        if len(probe) >= 2 and probe[-1][1] > probe[0][1]:
+            # 取整：部分编码器（如mpeg4）不支持任意分数帧率
+            measured = (len(probe) - 1) / (probe[-1][1] - probe[0][1])
+            self.fps = int(min(max(round(measured), 1), 120))
+        else:
+            self.fps = settings.WRITER_DEFAULT_FPS
+        return len(probe) < count
+
+    def _open_encoder(self):
+        return ENCODERS[self.backend](self.path, self.fps, self.size, **self.encoder_kwargs)
+
+    def _encode(self, encoder, buf):
+        encoder.write(buf)
+        self.written += 1
+        self._free.put(buf)
+
+    def _loop(self):
+        """编码线程"""
+        encoder = self._encoder
+        try:
+            probe = []
+            ended = False
+            if encoder is None:
+                ended = self._measure_fps(probe)
+                encoder = self._open_encoder()
+            for buf, _ in probe:
+                self._encode(encoder, buf)
+            while not ended:
+                item = self._pending.get()
+                if item is _END:
+                    break
+                self._encode(encoder, item[0])
+        except Exception as e:
+            # 之后的 write() / release() 会抛出该异常
+            self.error = e
+        finally:
+            if encoder is not None:
+                try:
+                    encoder.close()
+                except Exception as e:
+                    self.error = self.error or e
+
+    def release(self):
+        """等待已提交的帧编码完成并关闭输出文件"""
+        self._pending.put(_END)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+def create_writer(path, fps, size, backend=None, queue_size=None, policy=None, preset=None, crf=None):
+    """
+    创建异步视频写入器
+    :param path: 输出视频路径
+    :param fps: 帧率，为None时按实际写入速率测得
+    :param size: 帧尺寸 (宽, 高)
+    :param backend: 编码后端名称（opencv / ffmpeg，默认使用配置中的WRITER_BACKEND）
+    :param queue_size: 待编码帧缓冲区数量
+    :param policy: 缓冲区用尽时的策略（block / drop）
+    :param preset: ffmpeg 后端的 libx264 预设（如 ultrafast / veryfast / medium）
+    :param crf: ffmpeg 后端的 libx264 质量参数
+    :return: AsyncVideoWriter 实例
+    """
+    return AsyncVideoWriter(path, fps, size, backend=backend, queue_size=queue_size, policy=policy,
+                            preset=preset, crf=crf)
@@ -0,0 +1,224 @@
+# coding:utf-8
+"""
+性能指标模块
+按阶段记录耗时（滑动窗口分位数 p50/p95/p99）和计数器，
+可导出为Prometheus文本格式（文本文件或本地HTTP端点）和JSON汇总
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from src.config import settings
+
+# 导出的分位数
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class StageStats:
+    """单个阶段的耗时统计"""
+
+    def __init__(self, window):
+        """
+        :param window: 计算分位数的滑动窗口大小
+        """
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+
+    def quantiles(self):
+        """
+        :return: {分位数: 秒}
+        """
+        if not self.samples:
+            return {q: 0.0 for q in QUANTILES}
+        values = np.percentile(np.fromiter(self.samples, dtype=np.float64), [q * 100 for q in QUANTILES])
+        return dict(zip(QUANTILES, values.tolist()))
+
+
+class MetricsRegistry:
+    """线程安全的指标注册表"""
+
+    def __init__(self, window=None, prefix='plate'):
+        """
+        初始化
+        :param window: 分位数滑动窗口大小
+        :param prefix: 导出指标名前缀
+        """
+        self.window = window or settings.METRICS_WINDOW
+        self.prefix = prefix
+        self.stages = {}
+        self.counters = {}
+        self.start_time = time.time()
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        """
+        记录一次阶段耗时
+        :param stage: 阶段名
+        :param seconds: 耗时（秒）
+        """
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats(self.window)
+            stats.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """
+        阶段计时上下文
+        :param stage: 阶段名
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def inc(self, name, value=1):
+        """
+        计数器累加
+        :param name: 计数器名
+        :param value: 增量
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def counter(self, name):
+        """
+        读取计数器
+        :param name: 计数器名
+        :return: 当前值
+        """
+        return self.counters.get(name, 0)
+
+    def summary(self):
+        """
+        指标汇总
+        :return: {'uptime_seconds', 'counters', 'stages': {阶段: {count, mean_ms, p50_ms, p95_ms, p99_ms}}}
+        """
+        with self._lock:
+            stages = {}
+            for name, stats in self.stages.items():
+                q = stats.quantiles()
+                stages[name] = {
+                    'count': stats.count,
+                    'mean_ms': stats.total / stats.count * 1000 if stats.count else 0.0,
+                    'p50_ms': q[0.5] * 1000,
+                    'p95_ms': q[0.95] * 1000,
+                    'p99_ms': q[0.99] * 1000,
+                }
+            return {
+                'uptime_seconds': time.time() - self.start_time,
+                'counters': dict(self.counters),
+                'stages': stages,
+            }
+
+    def to_prometheus(self):
+        """
+        导出为Prometheus文本格式
+        :return: 文本
+        """
+        name = f"{self.prefix}_stage_latency_seconds"
+        lines = [f"# HELP {name} Per-stage latency over the last {self.window} samples.",
+                 f"# TYPE {name} summary"]
+        with self._lock:
+            for stage, stats in sorted(self.stages.items()):
+                for q, value in stats.quantiles().items():
+                    lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {value:.6f}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {stats.total:.6f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {stats.count}')
+            for counter, value in sorted(self.counters.items()):
+                metric = f"{self.prefix}_{counter}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """
+        写入Prometheus文本文件（先写临时文件再替换，避免采集到半个文件）
+        :param path: 输出路径
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def write_json(self, path):
+        """
+        写入JSON汇总
+        :param path: 输出路径
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+    def start_textfile_writer(self, path, interval=None):
+        """
+        启动后台线程定期写入Prometheus文本文件
+        :param path: 输出路径
+        :param interval: 写入间隔（秒）
+        :return: 停止事件，set() 后线程退出
+        """
+        interval = interval or settings.METRICS_FLUSH_INTERVAL
+        stop_event = threading.Event()
+
+        def loop():
+            while not stop_event.wait(interval):
+                self.write_prometheus(path)
+
+        threading.Thread(target=loop, daemon=True).start()
+        return stop_event
+
+    def serve_http(self, port, host='127.0.0.1'):
+        """
+        启动本地HTTP端点：/metrics 返回Prometheus文本，/metrics.json 返回JSON汇总
+        :param port: 端口
+        :param host: 监听地址（默认仅本机）
+        :return: HTTP服务器对象，shutdown() 停止
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body, content_type = registry.to_prometheus(), 'text/plain; version=0.0.4'
+                elif self.path == '/metrics.json':
+                    body, content_type = json.dumps(registry.summary(), ensure_ascii=False), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def format_stage_table(summary):
+    """
+    格式化阶段耗时表，用于控制台输出
+    :param summary: MetricsRegistry.summary() 的结果
+    :return: 文本行列表
+    """
+    lines = [f"  {'阶段':<10}{'次数':>8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}"]
+    for stage, s in summary['stages'].items():
+        lines.append(f"  {stage:<10}{s['count']:>8}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+    return lines
@@ -0,0 +1,146 @@
+# coding:utf-8
+"""
+后处理工具模块
+提供YOLOv8原始输出解码和NMS等NumPy实现（与具体推理框架无关）
+"""
+import numpy as np
+
+# 按类别偏移检测框，使一次NMS即可实现分类别抑制
+MAX_WH = 7680
+
+
+def nms(boxes, scores, iou_threshold):
+    """
+    非极大值抑制
+    :param boxes: 边界框 (N, 4)，格式 x1,y1,x2,y2
+    :param scores: 置信度 (N,)
+    :param iou_threshold: IoU阈值，大于该值的框被抑制
+    :return: 保留框的索引（按置信度降序）
+    """
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def fast_nms(boxes, scores, threshold, metric='iou'):
+    """
+    矩阵形式的非极大值抑制：一次计算两两重叠度，某个框与任一置信度更高的框重叠超过阈值即被抑制
+    （不做逐个迭代，被抑制的框仍会抑制其它框，结果比贪心NMS略严格）
+    :param boxes: 边界框 (N, 4)，格式 x1,y1,x2,y2
+    :param scores: 置信度 (N,)
+    :param threshold: 重叠度阈值
+    :param metric: 重叠度度量，iou 为交并比，ios 为交集占较小框面积的比例（适合合并被切片截断的框）
+    :return: 保留框的索引（按置信度降序）
+    """
+    order = scores.argsort()[::-1]
+    boxes = boxes[order]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    lt = np.maximum(boxes[:, None, :2], boxes[None, :, :2])
+    rb = np.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    if metric == 'ios':
+        overlap = inter / (np.minimum(areas[:, None], areas[None, :]) + 1e-9)
+    else:
+        overlap = inter / (areas[:, None] + areas[None, :] - inter + 1e-9)
+    # 只看置信度更高的框（上三角）
+    overlap = np.triu(overlap, k=1)
+    return order[overlap.max(axis=0, initial=0) <= threshold]
+
+
+def merge_tile_detections(detections, offsets, threshold, metric='ios'):
+    """
+    把各切片的检测结果平移回原图坐标并合并重复框
+    :param detections: 各切片的检测结果列表，每项为 (M, 6) 数组 [x1,y1,x2,y2,conf,cls]
+    :param offsets: 各切片左上角在原图中的坐标 [(x, y), ...]
+    :param threshold: 合并的重叠度阈值
+    :param metric: 重叠度度量（iou / ios）
+    :return: 合并后的 (M, 6) 数组
+    """
+    parts = []
+    for det, (x, y) in zip(detections, offsets):
+        if len(det):
+            det = det.copy()
+            det[:, [0, 2]] += x
+            det[:, [1, 3]] += y
+            parts.append(det)
+    if not parts:
+        return np.zeros((0, 6), dtype=np.float32)
+    merged = np.concatenate(parts)
+    # 按类别偏移，一次NMS即可分类别合并
+    keep = fast_nms(merged[:, :4] + merged[:, 5:6] * MAX_WH, merged[:, 4], threshold, metric)
+    return merged[keep]
+
+
+def pad_boxes(boxes, ratio, shape):
+    """
+    按框宽/高的比例外扩边界框并裁剪到图像范围内
+    :param boxes: (N, 4) x1,y1,x2,y2
+    :param ratio: 每边外扩的比例
+    :param shape: 图像 (H, W)
+    :return: (N, 4) 外扩后的边界框
+    """
+    height, width = shape
+    pad = (boxes[:, 2:] - boxes[:, :2]) * ratio
+    out = np.concatenate([boxes[:, :2] - pad, boxes[:, 2:] + pad], axis=1)
+    out[:, [0, 2]] = np.clip(out[:, [0, 2]], 0, width)
+    out[:, [1, 3]] = np.clip(out[:, [1, 3]], 0, height)
+    return out
+
+
+def xywh2xyxy(boxes):
+    """
+    中心点格式转换为角点格式
+    :param boxes: (N, 4) cx,cy,w,h
+    :return: (N, 4) x1,y1,x2,y2
+    """
+    out = np.empty_like(boxes)
+    half_w, half_h = boxes[:, 2] / 2, boxes[:, 3] / 2
+    out[:, 0] = boxes[:, 0] - half_w
+    out[:, 1] = boxes[:, 1] - half_h
+    out[:, 2] = boxes[:, 0] + half_w
+    out[:, 3] = boxes[:, 1] + half_h
+    return out
+
+
+def postprocess_yolo(preds, geometries, conf, iou, max_det=300):
+    """
+    解码YOLOv8原始输出并映射回原图坐标
+    :param preds: 模型输出 (N, 4+类别数, 锚点数)
+    :param geometries: 预处理返回的 [LetterboxGeometry, ...]
+    :param conf: 置信度阈值
+    :param iou: NMS的IoU阈值
+    :param max_det: 每帧最多保留的检测框数
+    :return: 每帧的检测结果列表，每项为 (M, 6) 数组 [x1,y1,x2,y2,conf,cls]
+    """
+    outputs = []
+    for pred, geometry in zip(preds, geometries):
+        pred = pred.T
+        class_scores = pred[:, 4:]
+        cls = class_scores.argmax(1)
+        scores = class_scores[np.arange(len(cls)), cls]
+        mask = scores > conf
+        if not mask.any():
+            outputs.append(np.zeros((0, 6), dtype=np.float32))
+            continue
+
+        boxes = xywh2xyxy(pred[mask, :4])
+        scores, cls = scores[mask], cls[mask]
+        keep = nms(boxes + cls[:, None] * MAX_WH, scores, iou)[:max_det]
+        boxes, scores, cls = boxes[keep], scores[keep], cls[keep]
+
+        geometry.restore(boxes)
+        outputs.append(np.concatenate(
+            [boxes, scores[:, None], cls[:, None]], axis=1).astype(np.float32))
+    return outputs
@@ -0,0 +1,220 @@
+# coding:utf-8
+"""
+预处理工具模块
+提供检测和识别模型输入的批量预处理函数（与具体推理框架无关）
+"""
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import cv2
+import numpy as np
+from src.config import settings
+
+# letterbox 填充颜色（与ultralytics一致）
+PAD_COLOR = (114, 114, 114)
+
+
+def rec_batch_groups(images, batch_num):
+    """
+    按宽高比对车牌图像分组，宽度相近的图像放在同一批次以减少填充
+    :param images: 车牌图像列表
+    :param batch_num: 每批最大图像数
+    :return: 索引分组列表 [[idx, ...], ...]
+    """
+    ratios = [img.shape[1] / float(img.shape[0]) for img in images]
+    order = sorted(range(len(images)), key=lambda i: ratios[i])
+    batch_num = max(1, int(batch_num))
+    return [order[i:i + batch_num] for i in range(0, len(order), batch_num)]
+
+
+def resize_norm_rec_batch(images, rec_image_shape):
+    """
+    将一组车牌图像缩放到识别模型输入高度，并填充为同一宽度的批量张量
+    :param images: 车牌图像列表（BGR numpy数组）
+    :param rec_image_shape: 识别模型输入形状 (C, H, W)
+    :return: float32 张量，形状 (N, C, H, W')，W' 为本批次所需最大宽度
+    """
+    img_c, img_h, img_w = rec_image_shape
+    max_wh_ratio = img_w / float(img_h)
+    for img in images:
+        h, w = img.shape[:2]
+        max_wh_ratio = max(max_wh_ratio, w / float(h))
+    batch_w = int(img_h * max_wh_ratio)
+
+    # 填充部分保持0，与PaddleOCR的resize_norm_img一致
+    batch = np.zeros((len(images), img_c, img_h, batch_w), dtype=np.float32)
+    for i, img in enumerate(images):
+        h, w = img.shape[:2]
+        resized_w = min(batch_w, int(math.ceil(img_h * w / float(h))))
+        resized = cv2.resize(img, (resized_w, img_h))
+        view = batch[i, :, :, :resized_w]
+        # (x / 255 - 0.5) / 0.5 合并为一次乘加
+        np.multiply(resized.transpose(2, 0, 1), 2.0 / 255.0, out=view)
+        view -= 1.0
+    return batch
+
+
+def load_image(image):
+    """
+    读取图像（支持含中文名的路径），numpy数组原样返回
+    :param image: 图像路径或numpy数组
+    :return: BGR numpy数组
+    """
+    if isinstance(image, str):
+        return cv2.imdecode(np.fromfile(image, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return image
+
+
+class LetterboxGeometry:
+    """某一输入分辨率 letterbox 到模型输入的几何参数（与ultralytics的LetterBox一致）"""
+
+    __slots__ = ('shape', 'imgsz', 'ratio', 'size', 'pad', 'scale', 'offset', 'limit')
+
+    def __init__(self, shape, imgsz):
+        """
+        :param shape: 原图尺寸 (H, W)
+        :param imgsz: 模型输入边长
+        """
+        h, w = shape
+        r = min(imgsz / h, imgsz / w)
+        new_w, new_h = int(round(w * r)), int(round(h * r))
+        dw, dh = (imgsz - new_w) / 2, (imgsz - new_h) / 2
+        left, top = int(round(dw - 0.1)), int(round(dh - 0.1))
+        self.shape = (h, w)
+        self.imgsz = imgsz
+        self.ratio = r
+        self.size = (new_w, new_h)
+        self.pad = (left, top)
+        # 模型输入坐标 -> 原图坐标的仿射变换 x * scale + offset，再裁剪到 [0, limit]
+        self.scale = np.float32(1.0 / r)
+        self.offset = np.array([-left, -top, -left, -top], dtype=np.float32) / np.float32(r)
+        self.limit = np.array([w, h, w, h], dtype=np.float32)
+
+    def restore(self, boxes):
+        """
+        把模型输入坐标下的 xyxy 边界框映射回原图（原地修改）
+        :param boxes: (M, 4) float32 数组
+        :return: boxes
+        """
+        np.multiply(boxes, self.scale, out=boxes)
+        boxes += self.offset
+        return np.clip(boxes, 0, self.limit, out=boxes)
+
+
+@lru_cache(maxsize=64)
+def letterbox_geometry(shape, imgsz):
+    """
+    获取 letterbox 几何参数，同一输入分辨率只计算一次
+    :param shape: 原图尺寸 (H, W)
+    :param imgsz: 模型输入边长
+    :return: LetterboxGeometry
+    """
+    return LetterboxGeometry(shape, imgsz)
+
+
+def letterbox(img, new_shape=640, color=PAD_COLOR):
+    """
+    等比缩放并填充为正方形输入（与ultralytics的LetterBox一致）
+    :param img: BGR图像
+    :param new_shape: 目标边长
+    :param color: 填充颜色
+    :return: (填充后图像, 缩放比例, (左侧填充, 顶部填充))
+    """
+    geometry = letterbox_geometry(img.shape[:2], new_shape)
+    (new_w, new_h), (left, top) = geometry.size, geometry.pad
+    padded = np.empty((new_shape, new_shape, 3), dtype=np.uint8)
+    padded[...] = color
+    region = padded[top:top + new_h, left:left + new_w]
+    if img.shape[:2] == (new_h, new_w):
+        region[...] = img
+    else:
+        cv2.resize(img, (new_w, new_h), dst=region, interpolation=cv2.INTER_LINEAR)
+    return padded, geometry.ratio, (left, top)
+
+
+class DetectorPreprocessor:
+    """
+    检测模型输入预处理类
+    letterbox 缩放直接写入预分配的 uint8 画布，BGR转RGB、HWC转CHW、转float32和归一化合并为整批一次乘法，
+    写入预分配的输入张量；缓冲区按 (批大小, 输入边长) 复用，每个线程一份，并发推理互不干扰
+    """
+
+    def __init__(self, max_buffers=None, color=PAD_COLOR):
+        """
+        初始化
+        :param max_buffers: 每个线程最多缓存的缓冲区组数（超出时淘汰最久未用的）
+        :param color: letterbox 填充颜色
+        """
+        self.max_buffers = max_buffers or settings.DETECT_INPUT_BUFFERS
+        self.color = color
+        self._local = threading.local()
+
+    def _buffers(self, count, imgsz):
+        """
+        获取当前线程 (批大小, 输入边长) 对应的缓冲区
+        :return: [uint8 画布 (N, S, S, 3), float32 张量 (N, 3, S, S), 各槽位当前的几何参数]
+        """
+        cache = getattr(self._local, 'cache', None)
+        if cache is None:
+            cache = self._local.cache = OrderedDict()
+        key = (count, imgsz)
+        buffers = cache.pop(key, None)
+        if buffers is None:
+            buffers = [np.empty((count, imgsz, imgsz, 3), dtype=np.uint8),
+                       np.empty((count, 3, imgsz, imgsz), dtype=np.float32),
+                       [None] * count]
+            while len(cache) >= self.max_buffers:
+                cache.popitem(last=False)
+        cache[key] = buffers
+        return buffers
+
+    def prepare(self, frames, imgsz):
+        """
+        将多帧图像预处理为检测模型输入张量：letterbox、BGR转RGB、HWC转CHW、归一化到[0,1]
+        :param frames: BGR图像列表
+        :param imgsz: 模型输入边长
+        :return: (float32 张量 (N, 3, imgsz, imgsz), [LetterboxGeometry, ...])；
+                 张量是复用的缓冲区，同一线程下一次调用时会被覆盖
+        """
+        canvas, tensor, layout = self._buffers(len(frames), imgsz)
+        geometries = []
+        for i, frame in enumerate(frames):
+            geometry = letterbox_geometry(frame.shape[:2], imgsz)
+            (new_w, new_h), (left, top) = geometry.size, geometry.pad
+            # 槽位的缩放区域位置不变时填充边框无需重写
+            if layout[i] is not geometry:
+                canvas[i] = self.color
+                layout[i] = geometry
+            region = canvas[i, top:top + new_h, left:left + new_w]
+            if frame.shape[:2] == (new_h, new_w):
+                region[...] = frame
+            else:
+                cv2.resize(frame, (new_w, new_h), dst=region, interpolation=cv2.INTER_LINEAR)
+            geometries.append(geometry)
+        np.multiply(canvas[..., ::-1].transpose(0, 3, 1, 2), np.float32(1.0 / 255.0), out=tensor)
+        return tensor, geometries
+
+
+def tile_windows(height, width, tile_size, overlap):
+    """
+    计算相互重叠的切片窗口，最后一行/列与图像边缘对齐
+    :param height: 图像高度
+    :param width: 图像宽度
+    :param tile_size: 切片边长
+    :param overlap: 相邻切片的重叠比例 [0, 1)
+    :return: (K, 4) int 数组，每行为 x1,y1,x2,y2
+    """
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return np.zeros(1, dtype=np.int64)
+        count = int(np.ceil((length - tile_size) / stride)) + 1
+        return np.minimum(np.arange(count) * stride, length - tile_size)
+
+    xs, ys = starts(width), starts(height)
+    x1, y1 = np.meshgrid(xs, ys)
+    x1, y1 = x1.ravel(), y1.ravel()
+    return np.stack([x1, y1, np.minimum(x1 + tile_size, width), np.minimum(y1 + tile_size, height)], axis=1)
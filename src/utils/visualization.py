@@ -8,8 +8,12 @@ from PyQt5.QtGui import QPixmap, QImage
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import os
+from functools import lru_cache
 from src.config import settings
 
+# 渲染好的文字标签缓存条目数
+LABEL_CACHE_SIZE = 256
+
 
 def cv_show(name, img):
     """
@@ -22,48 +26,104 @@ def cv_show(name, img):
     cv2.destroyAllWindows()
 
 
-def drawRectBox(image, rect, addText, fontC, color=(0, 0, 255)):
+@lru_cache(maxsize=None)
+def get_font(font_size, font_path=None):
+    """
+    按字号缓存字体对象，避免每个框都重新加载字体文件
+    :param font_size: 字号
+    :param font_path: 字体路径（默认使用配置中的FONT_PATH）
+    :return: 字体对象
+    """
+    try:
+        return ImageFont.truetype(font_path or settings.FONT_PATH, font_size, 0)
+    except OSError:
+        # 如果字体加载失败，使用默认字体
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=LABEL_CACHE_SIZE)
+def render_label(text, font_size, font_path=None, bg_color=(0, 0, 255)):
+    """
+    渲染文字标签（背景色块+白字）并按 (文字, 字号) 缓存
+    :param text: 标签文字
+    :param font_size: 字号
+    :param font_path: 字体路径
+    :param bg_color: 背景颜色 (B, G, R)
+    :return: (标签图像 HxWx3, 不透明度 HxWx1 float32, 标签左上角相对框左上角的偏移 (dx, dy))
+    """
+    font = get_font(font_size, font_path)
+    tx0, ty0, tx1, ty1 = font.getbbox(text)
+    text_width, text_height = tx1 - tx0, ty1 - ty0
+
+    # 相对框左上角的坐标：背景块在框上方，文字原点在背景块内缩进5像素
+    origin = (5, -text_height - 5)
+    left = min(0, origin[0] + tx0)
+    top = min(-text_height - 10, origin[1] + ty0)
+    right = max(text_width + 11, origin[0] + tx1)
+    bottom = max(1, origin[1] + ty1)
+    size = (right - left, bottom - top)
+    bg_box = [-left, -text_height - 10 - top, text_width + 10 - left, -top]
+    text_pos = (origin[0] - left, origin[1] - top)
+
+    # 颜色图底色为白色，字形抗锯齿边缘在背景块外也保持白色；覆盖范围单独记在蒙版中
+    patch = Image.new('RGB', size, (255, 255, 255))
+    draw = ImageDraw.Draw(patch)
+    draw.rectangle(bg_box, fill=tuple(bg_color))
+    draw.text(text_pos, text, (255, 255, 255), font=font)
+
+    mask = Image.new('L', size, 0)
+    draw = ImageDraw.Draw(mask)
+    draw.rectangle(bg_box, fill=255)
+    draw.text(text_pos, text, 255, font=font)
+
+    alpha = np.asarray(mask, dtype=np.float32)[:, :, None] / 255
+    return np.asarray(patch), alpha, (left, top)
+
+
+def blend_patch(image, patch, alpha, x, y):
+    """
+    把小图按不透明度原地混合到图像的 (x, y) 处，超出图像的部分裁掉
+    :param image: 目标图像（原地修改）
+    :param patch: 小图 HxWx3
+    :param alpha: 不透明度 HxWx1
+    :param x: 左上角x
+    :param y: 左上角y
     """
-    绘制矩形框与文字标签
+    h, w = patch.shape[:2]
+    x1, y1 = max(x, 0), max(y, 0)
+    x2, y2 = min(x + w, image.shape[1]), min(y + h, image.shape[0])
+    if x1 >= x2 or y1 >= y2:
+        return
+    patch = patch[y1 - y:y2 - y, x1 - x:x2 - x]
+    alpha = alpha[y1 - y:y2 - y, x1 - x:x2 - x]
+    roi = image[y1:y2, x1:x2]
+    roi[:] = roi + (patch.astype(np.float32) - roi) * alpha
+
+
+def drawRectBox(image, rect, addText, fontC=None, color=(0, 0, 255), font_path=None, font_size=None):
+    """
+    绘制矩形框与文字标签（原地绘制，只混合标签所在的小块区域）
     :param image: 原始图像
     :param rect: 矩形框坐标 [x1, y1, x2, y2]
     :param addText: 要显示的文字
-    :param fontC: 字体对象
+    :param fontC: 兼容旧接口保留，不再使用（字体按字号缓存）
     :param color: 边框颜色 (B, G, R)
-    :return: 绘制后的图像
+    :param font_path: 字体路径
+    :param font_size: 字号（默认按框高自动选择）
+    :return: 绘制后的图像（与输入为同一数组）
     """
+    x1, y1, x2, y2 = map(int, rect[:4])
     # 绘制矩形框
-    cv2.rectangle(image, (rect[0], rect[1]), (rect[2], rect[3]), color, 2)
-
-    # 使用PIL绘制中文文字
-    font_size = int((rect[3] - rect[1]) / 1.5)
-    font_size = max(20, min(font_size, 100))  # 限制字体大小范围
-
-    try:
-        fontC = ImageFont.truetype(settings.FONT_PATH, font_size, 0)
-    except:
-        # 如果字体加载失败，使用默认字体
-        fontC = ImageFont.load_default()
-
-    img = Image.fromarray(image)
-    draw = ImageDraw.Draw(img)
-
-    # 绘制文字背景
-    text_bbox = draw.textbbox((0, 0), addText, font=fontC)
-    text_width = text_bbox[2] - text_bbox[0]
-    text_height = text_bbox[3] - text_bbox[1]
-
-    bg_x1 = rect[0]
-    bg_y1 = rect[1] - text_height - 10
-    bg_x2 = rect[0] + text_width + 10
-    bg_y2 = rect[1]
-
-    draw.rectangle([bg_x1, bg_y1, bg_x2, bg_y2], fill=(0, 0, 255))
+    cv2.rectangle(image, (x1, y1), (x2, y2), color, 2)
 
-    # 绘制文字
-    draw.text((rect[0] + 5, rect[1] - text_height - 5), addText, (255, 255, 255), font=fontC)
+    # 使用PIL渲染中文标签
+    if font_size is None:
+        font_size = int((y2 - y1) / 1.5)
+        font_size = max(20, min(font_size, 100))  # 限制字体大小范围
 
-    return np.array(img)
+    patch, alpha, (dx, dy) = render_label(addText, font_size, font_path)
+    blend_patch(image, patch, alpha, x1 + dx, y1 + dy)
+    return image
 
 
 def img_cvread(path):
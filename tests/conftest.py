@@ -0,0 +1,9 @@
+# coding:utf-8
+"""
+测试公共配置
+"""
+import sys
+import os
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,124 @@
+# coding:utf-8
+"""
+自适应质量控制测试
+"""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import settings
+from src.core.adaptive import AdaptiveController, format_decision
+from src.utils.metrics import MetricsRegistry
+
+
+def make_processor(skip_frames=1, reocr_interval=10, imgsz=640, dynamic_imgsz=True, track=True):
+    """构造只含控制器用到的属性的处理器"""
+    tracker = SimpleNamespace(reocr_interval=reocr_interval) if track else None
+    detector = SimpleNamespace(imgsz=imgsz, dynamic_imgsz=dynamic_imgsz)
+    pipeline = SimpleNamespace(tracker=tracker, detector=detector, metrics=MetricsRegistry())
+    return SimpleNamespace(pipeline=pipeline, skip_frames=skip_frames)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的 perf_counter"""
+    now = [0.0]
+    monkeypatch.setattr('src.core.adaptive.time.perf_counter', lambda: now[0])
+    return now
+
+
+def run_window(controller, clock, cost, latency=0.05):
+    """送入一个完整评估窗口的样本"""
+    samples = settings.ADAPT_MIN_SAMPLES
+    for _ in range(samples):
+        clock[0] += controller.interval / (samples - 1)
+        controller.observe(latency, cost)
+
+
+def test_ladder_order():
+    controller = AdaptiveController(target_fps=25, imgsz_levels=(640, 512, 320), max_skip=3,
+                                    max_reocr_interval=40)
+    controller.bind(make_processor())
+    assert controller.ladder == [
+        {'skip_frames': 1, 'reocr_interval': 10, 'imgsz': 640},
+        {'skip_frames': 1, 'reocr_interval': 20, 'imgsz': 640},
+        {'skip_frames': 1, 'reocr_interval': 40, 'imgsz': 640},
+        {'skip_frames': 1, 'reocr_interval': 40, 'imgsz': 512},
+        {'skip_frames': 1, 'reocr_interval': 40, 'imgsz': 320},
+        {'skip_frames': 2, 'reocr_interval': 40, 'imgsz': 320},
+        {'skip_frames': 3, 'reocr_interval': 40, 'imgsz': 320},
+    ]
+
+
+def test_ladder_skips_unavailable_knobs():
+    controller = AdaptiveController(target_fps=25, max_skip=2)
+    controller.bind(make_processor(dynamic_imgsz=False, track=False))
+    assert controller.ladder == [{'skip_frames': 1}, {'skip_frames': 2}]
+
+
+def test_requires_a_target():
+    with pytest.raises(ValueError):
+        AdaptiveController()
+
+
+def test_load_uses_worst_budget():
+    controller = AdaptiveController(target_fps=20, target_latency=0.2)
+    controller.bind(make_processor(skip_frames=2))
+    # 每个处理帧预算 2/20 = 0.1 秒
+    assert controller.load(0.1, 0.15) == pytest.approx(1.5)
+    assert controller.load(0.3, 0.05) == pytest.approx(1.5)
+
+
+def test_degrades_then_recovers_one_level_at_a_time(clock, tmp_path):
+    log_path = tmp_path / 'adapt.jsonl'
+    decisions = []
+    controller = AdaptiveController(target_fps=25, interval=1.0, imgsz_levels=(640, 320), max_skip=2,
+                                    max_reocr_interval=20, on_decision=decisions.append,
+                                    log_path=str(log_path))
+    processor = make_processor()
+    controller.bind(processor)
+    pipeline = processor.pipeline
+
+    # 超出预算：每个窗口降一级，调整后的下一个窗口只排空不评估
+    run_window(controller, clock, cost=0.08)
+    assert controller.level == 1 and pipeline.tracker.reocr_interval == 20
+    run_window(controller, clock, cost=0.08)
+    assert controller.level == 1
+    run_window(controller, clock, cost=0.08)
+    assert controller.level == 2 and pipeline.detector.imgsz == 320
+    run_window(controller, clock, cost=0.08)
+    run_window(controller, clock, cost=0.08)
+    assert controller.level == 3 and processor.skip_frames == 2
+
+    # 最低档仍超出预算只记录一次
+    for _ in range(3):
+        run_window(controller, clock, cost=0.2)
+    assert [d.action for d in decisions] == ['degrade'] * 3 + ['saturated']
+
+    # 连续低负载窗口后才升一级
+    for _ in range(settings.ADAPT_RECOVER_WINDOWS - 1):
+        run_window(controller, clock, cost=0.005)
+    assert controller.level == 3
+    run_window(controller, clock, cost=0.005)
+    assert controller.level == 2 and processor.skip_frames == 1
+    assert decisions[-1].changes == {'skip_frames': (2, 1)}
+    assert controller.state == {'skip_frames': 1, 'reocr_interval': 20, 'imgsz': 320}
+
+    controller.close()
+    logged = [json.loads(line) for line in log_path.read_text(encoding='utf-8').splitlines()]
+    assert [entry['action'] for entry in logged] == [d.action for d in decisions]
+    assert pipeline.metrics.counter('adapt_degrade') == 3
+    assert '跳帧间隔 2->1' in format_decision(decisions[-1])
+
+
+def test_waits_for_min_samples(clock):
+    controller = AdaptiveController(target_fps=25, interval=1.0)
+    controller.bind(make_processor())
+    for _ in range(settings.ADAPT_MIN_SAMPLES - 1):
+        clock[0] += 5.0
+        controller.observe(0.05, 1.0)
+    assert controller.level == 0
+    clock[0] += 5.0
+    controller.observe(0.05, 1.0)
+    assert controller.level == 1
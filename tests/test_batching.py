@@ -0,0 +1,92 @@
+# coding:utf-8
+"""
+动态微批处理测试
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.core.batching import MicroBatcher
+
+
+class RecordingBatch:
+    """记录每个批次的批处理函数，第一个批次可阻塞到放行为止"""
+
+    def __init__(self, block_first=False):
+        self.batches = []
+        self.release = threading.Event()
+        if not block_first:
+            self.release.set()
+
+    def __call__(self, items):
+        if not self.batches:
+            self.release.wait(5.0)
+        self.batches.append(list(items))
+        return [item * 2 for item in items]
+
+
+def test_full_batch_flushes_without_waiting():
+    fn = RecordingBatch()
+    batcher = MicroBatcher(fn, max_batch=4, max_wait=10.0)
+    start = time.perf_counter()
+    futures = [batcher.submit(i) for i in range(4)]
+    assert [f.result(timeout=2.0) for f in futures] == [0, 2, 4, 6]
+    assert time.perf_counter() - start < 5.0
+    assert fn.batches == [[0, 1, 2, 3]]
+    batcher.close()
+
+
+def test_partial_batch_flushes_after_max_wait():
+    fn = RecordingBatch()
+    batcher = MicroBatcher(fn, max_batch=8, max_wait=0.05)
+    futures = [batcher.submit(i) for i in range(3)]
+    assert [f.result(timeout=2.0) for f in futures] == [0, 2, 4]
+    assert fn.batches == [[0, 1, 2]]
+    assert batcher.stats() == {'batches': 1, 'items': 3, 'mean_batch_size': 3.0}
+    batcher.close()
+
+
+def test_requests_queued_while_busy_form_next_batches():
+    fn = RecordingBatch(block_first=True)
+    batcher = MicroBatcher(fn, max_batch=3, max_wait=0.0)
+    first = batcher.submit(0)
+    time.sleep(0.05)
+    futures = [batcher.submit(i) for i in range(1, 6)]
+    fn.release.set()
+    assert first.result(timeout=2.0) == 0
+    assert [f.result(timeout=2.0) for f in futures] == [2, 4, 6, 8, 10]
+    assert fn.batches == [[0], [1, 2, 3], [4, 5]]
+    batcher.close()
+
+
+def test_close_flushes_pending_requests():
+    fn = RecordingBatch()
+    batcher = MicroBatcher(fn, max_batch=16, max_wait=10.0)
+    futures = [batcher.submit(i) for i in range(2)]
+    batcher.close()
+    assert [f.result(timeout=0) for f in futures] == [0, 2]
+
+
+def test_batch_errors_reach_every_request():
+    def fail(items):
+        raise RuntimeError('boom')
+
+    batcher = MicroBatcher(fail, max_batch=2, max_wait=0.0)
+    futures = [batcher.submit(i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=2.0)
+    batcher.close()
+
+
+def test_executor_runs_batches_concurrently():
+    fn = RecordingBatch()
+    with ThreadPoolExecutor(2) as executor:
+        batcher = MicroBatcher(fn, max_batch=2, max_wait=0.01, executor=executor, max_inflight=2)
+        futures = [batcher.submit(i) for i in range(5)]
+        batcher.close()
+        assert [f.result(timeout=0) for f in futures] == [0, 2, 4, 6, 8]
+    assert sorted(x for batch in fn.batches for x in batch) == list(range(5))
+    assert all(len(batch) <= 2 for batch in fn.batches)
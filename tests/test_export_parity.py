@@ -0,0 +1,30 @@
+# coding:utf-8
+"""
+导出模型与torch后端的一致性测试（缺少权重或推理运行时时跳过）
+"""
+import glob
+import os
+import shutil
+
+import pytest
+
+from src.config import settings
+
+
+@pytest.mark.parametrize('fmt, runtime', [('onnx', 'onnxruntime'), ('openvino', 'openvino')])
+def test_exported_model_matches_torch(tmp_path, fmt, runtime):
+    pytest.importorskip('ultralytics')
+    pytest.importorskip(runtime)
+    if not os.path.exists(settings.YOLO_MODEL_PATH):
+        pytest.skip(f"权重文件不存在: {settings.YOLO_MODEL_PATH}")
+    images = sorted(glob.glob(os.path.join(settings.TEST_IMAGES_DIR, '*.jpg')))
+    if not images:
+        pytest.skip(f"测试图片不存在: {settings.TEST_IMAGES_DIR}")
+
+    from scripts.export_model import FORMAT_BACKENDS, export, verify_parity
+
+    # 导出文件写在权重旁边，复制到临时目录避免覆盖models/下已导出的模型
+    weights = str(tmp_path / os.path.basename(settings.YOLO_MODEL_PATH))
+    shutil.copy(settings.YOLO_MODEL_PATH, weights)
+    path = export(weights, fmt, settings.DETECT_IMGSZ)
+    assert verify_parity(FORMAT_BACKENDS[fmt], path, images, settings.DETECT_IMGSZ, weights)
@@ -0,0 +1,120 @@
+# coding:utf-8
+"""
+预读取视频读取器测试
+"""
+import numpy as np
+
+from src.core.frame_reader import FrameReader
+
+
+class FakeCapture:
+    """按序号生成帧的视频源，read(image) 时解码进传入的缓冲区"""
+
+    def __init__(self, count, shape=(4, 6, 3)):
+        self.count = count
+        self.shape = shape
+        self.position = 0
+        self.decoded = 0
+        self.released = False
+
+    def grab(self):
+        if self.position >= self.count:
+            return False
+        self.position += 1
+        return True
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        self.decoded += 1
+        if image is None:
+            image = np.empty(self.shape, dtype=np.uint8)
+        image[...] = self.position
+        return True, image
+
+    def get(self, prop_id):
+        return 0
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        self.released = True
+
+
+def read_all(reader, recycle=True):
+    frames = []
+    while True:
+        success, frame = reader.read(timeout=2.0)
+        if not success:
+            break
+        frames.append((int(frame[0, 0, 0]), id(frame)))
+        if recycle:
+            reader.recycle(frame)
+    return frames
+
+
+def test_reads_every_frame_in_order():
+    cap = FakeCapture(10)
+    reader = FrameReader(cap, buffer_count=3)
+    assert [value for value, _ in read_all(reader)] == list(range(1, 11))
+    assert reader.finished and reader.frames_read == 10 and reader.dropped == 0
+    reader.release()
+    assert cap.released
+
+
+def test_recycled_buffers_are_reused():
+    reader = FrameReader(FakeCapture(20), buffer_count=3)
+    frames = read_all(reader)
+    assert len(frames) == 20
+    assert len({buffer for _, buffer in frames}) <= 3
+    reader.release()
+
+
+def test_blocks_until_buffers_are_recycled():
+    reader = FrameReader(FakeCapture(10), buffer_count=2)
+    held = []
+    for _ in range(2):
+        success, frame = reader.read(timeout=2.0)
+        assert success
+        held.append(frame)
+    # 两个缓冲区都未归还，解码线程无法继续
+    assert reader.read(timeout=0.1) == (False, None)
+    assert not reader.finished
+    reader.recycle(held[0])
+    success, frame = reader.read(timeout=2.0)
+    assert success and frame is held[0] and int(frame[0, 0, 0]) == 3
+    reader.release()
+
+
+def test_foreign_arrays_are_ignored_on_recycle():
+    reader = FrameReader(FakeCapture(3), buffer_count=2)
+    reader.recycle(np.zeros((4, 6, 3), dtype=np.uint8))
+    reader.recycle(None)
+    assert [value for value, _ in read_all(reader)] == [1, 2, 3]
+    reader.release()
+
+
+def test_skip_frames_grabs_without_decoding():
+    cap = FakeCapture(10)
+    reader = FrameReader(cap, buffer_count=4, skip_frames=3)
+    assert [value for value, _ in read_all(reader)] == [3, 6, 9]
+    assert cap.decoded == 3
+    reader.release()
+
+
+def test_latest_only_drops_stale_frames():
+    cap = FakeCapture(6)
+    reader = FrameReader(cap, buffer_count=8, latest_only=True)
+    reader._thread.join(2.0)
+    assert [value for value, _ in read_all(reader)] == [6]
+    assert reader.dropped == 5 and reader.frames_read == 6
+    reader.release()
+
+
+def test_stop_keeps_source_open():
+    cap = FakeCapture(100)
+    reader = FrameReader(cap, buffer_count=2)
+    reader.read(timeout=2.0)
+    reader.stop()
+    assert not reader._thread.is_alive() and not cap.released
@@ -0,0 +1,96 @@
+# coding:utf-8
+"""
+检测输入预处理与YOLOv8输出后处理测试
+"""
+import numpy as np
+import pytest
+
+from src.utils.postprocess import postprocess_yolo
+from src.utils.preprocess import DetectorPreprocessor, letterbox, letterbox_geometry
+
+
+def to_model(boxes, geometry):
+    """原图 xyxy -> 模型输入坐标下的 cx,cy,w,h"""
+    boxes = np.asarray(boxes, dtype=np.float32)
+    left, top = geometry.pad
+    xyxy = boxes * geometry.ratio + (left, top, left, top)
+    return np.concatenate([(xyxy[:, :2] + xyxy[:, 2:]) / 2, xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+
+
+def make_preds(rows, anchors=64):
+    """
+    构造 (1, 4+类别数, 锚点数) 的模型输出，未用到的锚点置信度为0
+    :param rows: [(cx, cy, w, h, 各类别分数...), ...]
+    """
+    rows = np.asarray(rows, dtype=np.float32)
+    pred = np.zeros((anchors, rows.shape[1]), dtype=np.float32)
+    pred[:len(rows)] = rows
+    return pred.T[None]
+
+
+@pytest.mark.parametrize('shape', [(1080, 1920), (1920, 1080), (480, 640), (640, 640)])
+def test_postprocess_restores_original_coordinates(shape):
+    geometry = letterbox_geometry(shape, 640)
+    height, width = shape
+    truth = np.array([[0.2 * width, 0.5 * height, 0.4 * width, 0.56 * height],
+                      [0.6 * width, 0.1 * height, 0.9 * width, 0.2 * height]], dtype=np.float32)
+    rows = np.concatenate([to_model(truth, geometry), [[0.9, 0.0], [0.0, 0.8]]], axis=1)
+    det = postprocess_yolo(make_preds(rows), [geometry], conf=0.25, iou=0.45)[0]
+    assert det.dtype == np.float32 and det.shape == (2, 6)
+    np.testing.assert_allclose(det[:, :4], truth, atol=0.5)
+    np.testing.assert_allclose(det[:, 4:], [[0.9, 0], [0.8, 1]], atol=1e-6)
+
+
+def test_postprocess_clips_to_frame():
+    geometry = letterbox_geometry((1080, 1920), 640)
+    # 框延伸到填充区域和画面之外
+    rows = [[620, 320, 80, 400, 0.9]]
+    det = postprocess_yolo(make_preds(rows), [geometry], conf=0.25, iou=0.45)[0]
+    x1, y1, x2, y2 = det[0, :4]
+    assert 0 <= x1 < x2 <= 1920 and y1 == 0 and y2 == 1080
+
+
+def test_postprocess_filters_and_suppresses():
+    geometry = letterbox_geometry((640, 640), 640)
+    rows = [[100, 100, 80, 30, 0.9], [102, 101, 80, 30, 0.85], [300, 300, 80, 30, 0.1],
+            [500, 500, 80, 30, 0.6]]
+    det = postprocess_yolo(make_preds(rows), [geometry], conf=0.25, iou=0.45)[0]
+    np.testing.assert_allclose(det[:, 4], [0.9, 0.6], atol=1e-6)
+    assert len(postprocess_yolo(make_preds(rows), [geometry], conf=0.25, iou=0.45, max_det=1)[0]) == 1
+    empty = postprocess_yolo(make_preds(rows), [geometry], conf=0.95, iou=0.45)[0]
+    assert empty.shape == (0, 6)
+
+
+def test_postprocess_batch_uses_each_geometry():
+    shapes = [(1080, 1920), (480, 640)]
+    geometries = [letterbox_geometry(shape, 640) for shape in shapes]
+    truth = np.array([[100, 200, 300, 260]], dtype=np.float32)
+    preds = np.concatenate([make_preds(np.concatenate([to_model(truth, g), [[0.9]]], axis=1))
+                            for g in geometries])
+    for det in postprocess_yolo(preds, geometries, conf=0.25, iou=0.45):
+        np.testing.assert_allclose(det[:, :4], truth, atol=0.5)
+
+
+def test_preprocessor_matches_letterbox():
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (360, 640, 3), dtype=np.uint8),
+              rng.integers(0, 255, (480, 360, 3), dtype=np.uint8)]
+    tensor, geometries = DetectorPreprocessor().prepare(frames, 320)
+    assert tensor.shape == (2, 3, 320, 320) and tensor.dtype == np.float32
+    for frame, geometry, chw in zip(frames, geometries, tensor):
+        padded, ratio, pad = letterbox(frame, 320)
+        assert (ratio, pad) == (geometry.ratio, geometry.pad)
+        expected = padded[..., ::-1].transpose(2, 0, 1).astype(np.float32) * np.float32(1 / 255)
+        np.testing.assert_array_equal(chw, expected)
+
+
+def test_preprocessor_reuses_buffers_and_repads():
+    preprocessor = DetectorPreprocessor()
+    wide = np.full((360, 640, 3), 255, dtype=np.uint8)
+    tall = np.full((640, 360, 3), 255, dtype=np.uint8)
+    first, _ = preprocessor.prepare([wide], 320)
+    second, _ = preprocessor.prepare([tall], 320)
+    assert second is first
+    # 换成竖图后，上一帧横图留下的区域被重新填充
+    expected = letterbox(tall, 320)[0][..., ::-1].transpose(2, 0, 1).astype(np.float32) * np.float32(1 / 255)
+    np.testing.assert_array_equal(second[0], expected)
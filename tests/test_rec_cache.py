@@ -0,0 +1,81 @@
+# coding:utf-8
+"""
+识别结果缓存测试
+"""
+import numpy as np
+
+from src.core.recognizer import BaseRecognizer
+from src.core.rec_cache import CachedRecognizer, FingerprintCache, LRUCache, crop_fingerprint
+
+
+class CountingRecognizer(BaseRecognizer):
+    """记录调用次数、按图像均值返回固定文本的识别器"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def _recognize_raw(self, images):
+        self.calls += len(images)
+        return [(f"皖A{int(img.mean()):05d}", 0.9) for img in images]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2, 0)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_lru_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('src.core.rec_cache.time.monotonic', lambda: now[0])
+    cache = LRUCache(4, 5.0)
+    cache.put('a', 1)
+    now[0] += 6.0
+    assert cache.get('a') is None and len(cache) == 0
+
+
+def test_fingerprint_cache_default_is_exact():
+    cache = FingerprintCache(4, 0, 0)
+    cache.put(b'\x00\x00', 'a')
+    assert cache.get_nearest(b'\x00\x00') == 'a'
+    assert cache.get_nearest(b'\x00\x01') is None
+
+
+def test_fingerprint_cache_matrix_survives_misses():
+    cache = FingerprintCache(2, 0, 2)
+    cache.put(b'\x00\x00', 'a')
+    cache.put(b'\xff\xff', 'b')
+    assert cache.get_nearest(b'\x00\x03') == 'a'
+    matrix = cache._matrix
+    assert cache.get_nearest(b'\x0f\x0f') is None
+    assert cache.get(b'\x12\x34') is None
+    cache.put(b'\x00\x00', 'a2')
+    assert cache._matrix is matrix
+
+    # 新增键（并淘汰最旧的键）后重建
+    cache.put(b'\xf0\xf0', 'c')
+    assert cache._matrix is None
+    assert cache.get_nearest(b'\xf0\xf1') == 'c'
+
+
+def test_cached_recognizer_reuses_results():
+    rng = np.random.default_rng(0)
+    plate = rng.integers(0, 255, (40, 130, 3), dtype=np.uint8)
+    other = rng.integers(0, 255, (40, 130, 3), dtype=np.uint8)
+    inner = CountingRecognizer()
+    recognizer = CachedRecognizer(inner)
+    assert recognizer.cache.max_size > 0
+
+    first = recognizer._recognize_raw([plate, other])
+    assert recognizer._recognize_raw([plate.copy(), other]) == first
+    assert inner.calls == 2
+    assert recognizer.stats()['hits'] == 2 and recognizer.stats()['size'] == 2
+
+
+def test_fingerprint_ignores_brightness():
+    rng = np.random.default_rng(1)
+    plate = rng.integers(40, 200, (40, 130, 3), dtype=np.uint8)
+    assert crop_fingerprint(plate) == crop_fingerprint(plate + 20)
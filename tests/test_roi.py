@@ -0,0 +1,69 @@
+# coding:utf-8
+"""
+感兴趣区域测试
+"""
+import numpy as np
+import pytest
+
+from src.config import settings
+from src.core.roi import RegionOfInterest, load_roi, parse_polygon
+
+# 1000x600 帧上的三角形：左下、右下、顶点在上方中间
+TRIANGLE = [[100, 500], [900, 500], [500, 100]]
+
+
+@pytest.mark.parametrize('value', [
+    TRIANGLE, '[[100, 500], [900, 500], [500, 100]]', '100,500; 900,500; 500,100'])
+def test_parse_polygon_formats(value):
+    np.testing.assert_array_equal(parse_polygon(value), TRIANGLE)
+
+
+def test_parse_polygon_rejects_degenerate():
+    with pytest.raises(ValueError):
+        parse_polygon('0,0; 10,10')
+
+
+def test_crop_is_bounding_rect_view():
+    frame = np.zeros((600, 1000, 3), dtype=np.uint8)
+    roi = RegionOfInterest(TRIANGLE)
+    region, offset = roi.crop(frame)
+    assert roi.rect(frame.shape) == (100, 100, 901, 501)
+    assert offset == (100, 100) and region.shape == (401, 801, 3)
+    assert np.shares_memory(region, frame)
+
+
+def test_restore_shifts_and_filters_by_center():
+    roi = RegionOfInterest(TRIANGLE)
+    roi.rect((600, 1000))
+    # 区域坐标：第一个框中心(500, 400)在三角形内，第二个中心(50, 50)在外接矩形的左上角、三角形外
+    boxes = [[350, 280, 450, 320], [0, 30, 100, 70]]
+    kept, confs, discarded = roi.restore(boxes, [0.9, 0.8], (100, 100), (600, 1000))
+    assert kept == [[450, 380, 550, 420]]
+    assert confs == [0.9] and discarded == 1
+
+
+def test_restore_without_confs_and_empty():
+    roi = RegionOfInterest(TRIANGLE)
+    assert roi.restore([], None, (0, 0), (600, 1000)) == ([], None, 0)
+    assert roi.restore([], [], (0, 0), (600, 1000)) == ([], [], 0)
+    kept, confs, _ = roi.restore([[350, 280, 450, 320]], None, (100, 100), (600, 1000))
+    assert kept == [[450, 380, 550, 420]] and confs is None
+
+
+def test_relative_polygon_follows_frame_size():
+    roi = RegionOfInterest([[0.0, 0.5], [1.0, 0.5], [1.0, 1.0], [0.0, 1.0]])
+    assert roi.rect((600, 1000)) == (0, 300, 1000, 600)
+    assert roi.rect((1080, 1920)) == (0, 540, 1920, 1080)
+
+
+def test_polygon_outside_frame_raises():
+    roi = RegionOfInterest([[2000, 2000], [2100, 2000], [2100, 2100]])
+    with pytest.raises(ValueError):
+        roi.rect((600, 1000))
+
+
+def test_load_roi_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, 'ROI_POLYGONS', {'gate.mp4': TRIANGLE})
+    assert load_roi('/data/videos/gate.mp4') is not None
+    assert load_roi('/data/videos/other.mp4') is None
+    assert load_roi(0, '0,0; 10,0; 10,10') is not None
@@ -0,0 +1,77 @@
+# coding:utf-8
+"""
+切片检测窗口与合并测试
+"""
+import numpy as np
+import pytest
+
+from src.utils.postprocess import fast_nms, merge_tile_detections, nms
+from src.utils.preprocess import tile_windows
+
+
+@pytest.mark.parametrize('height, width, tile_size, overlap', [
+    (1080, 1920, 640, 0.2), (2160, 3840, 640, 0.25), (700, 641, 640, 0.0), (480, 640, 640, 0.2)])
+def test_tile_windows_cover_image(height, width, tile_size, overlap):
+    windows = tile_windows(height, width, tile_size, overlap)
+    assert (windows[:, :2] >= 0).all()
+    assert (windows[:, 2] <= width).all() and (windows[:, 3] <= height).all()
+    assert ((windows[:, 2:] - windows[:, :2]) <= tile_size).all()
+
+    covered = np.zeros((height, width), dtype=bool)
+    for x1, y1, x2, y2 in windows:
+        covered[y1:y2, x1:x2] = True
+    assert covered.all()
+
+    # 相邻切片的重叠不少于要求（最后一列/行与边缘对齐，重叠只会更多）
+    xs = np.unique(windows[:, 0])
+    if len(xs) > 1:
+        assert (np.diff(xs) <= int(tile_size * (1 - overlap))).all()
+        assert windows[:, 2].max() == width
+
+
+def test_tile_windows_single_tile_for_small_image():
+    assert tile_windows(480, 640, 640, 0.2).tolist() == [[0, 0, 640, 480]]
+
+
+def test_fast_nms_matches_greedy_nms_without_chains():
+    boxes = np.array([[0, 0, 100, 40], [5, 0, 105, 40], [300, 300, 400, 340], [302, 301, 401, 341]],
+                     dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7, 0.95], dtype=np.float32)
+    assert fast_nms(boxes, scores, 0.5).tolist() == nms(boxes, scores, 0.5).tolist() == [3, 0]
+
+
+def test_fast_nms_suppressed_boxes_still_suppress():
+    # B 被 A 抑制，C 与 A 不重叠但与 B 重叠：贪心NMS保留C，矩阵NMS不保留
+    boxes = np.array([[0, 0, 100, 40], [40, 0, 140, 40], [80, 0, 180, 40]], dtype=np.float32)
+    scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+    assert nms(boxes, scores, 0.3).tolist() == [0, 2]
+    assert fast_nms(boxes, scores, 0.3).tolist() == [0]
+
+
+def test_fast_nms_ios_merges_truncated_box():
+    # 被切片边缘截断的框只占完整框的一部分，IoU低但交集占小框面积的比例高
+    boxes = np.array([[100, 100, 300, 160], [100, 100, 160, 160]], dtype=np.float32)
+    scores = np.array([0.9, 0.85], dtype=np.float32)
+    assert fast_nms(boxes, scores, 0.5, metric='iou').tolist() == [0, 1]
+    assert fast_nms(boxes, scores, 0.5, metric='ios').tolist() == [0]
+
+
+def test_fast_nms_empty():
+    assert fast_nms(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), 0.5).tolist() == []
+
+
+def test_merge_tile_detections_shifts_and_merges():
+    # 同一车牌被两个相邻切片检测到：左切片中被截断，右切片中完整
+    left = np.array([[580, 200, 640, 240, 0.8, 0]], dtype=np.float32)
+    right = np.array([[68, 200, 168, 240, 0.9, 0], [10, 10, 50, 30, 0.6, 1]], dtype=np.float32)
+    merged = merge_tile_detections([left, right, np.zeros((0, 6), dtype=np.float32)],
+                                   [(0, 0), (512, 0), (0, 512)], 0.5)
+    np.testing.assert_allclose(merged, [[580, 200, 680, 240, 0.9, 0], [522, 10, 562, 30, 0.6, 1]])
+    # 输入不被修改
+    assert left[0, 0] == 580 and right[0, 0] == 68
+
+
+def test_merge_tile_detections_keeps_classes_apart():
+    det = np.array([[0, 0, 100, 40, 0.9, 0], [0, 0, 100, 40, 0.8, 1]], dtype=np.float32)
+    assert len(merge_tile_detections([det], [(0, 0)], 0.5)) == 2
+    assert merge_tile_detections([], [], 0.5).shape == (0, 6)
@@ -0,0 +1,76 @@
+# coding:utf-8
+"""
+车牌跟踪与识别结果投票测试
+"""
+import pytest
+
+from src.core.tracker import PlateTrack, PlateTracker, vote_text
+
+
+def test_vote_text_majority_per_character():
+    text, conf = vote_text([('皖A12345', 0.9), ('皖A12845', 0.9), ('皖A12345', 0.9)])
+    assert text == '皖A12345'
+    # 第6位只有2/3的权重一致
+    assert conf == pytest.approx(0.9 * (6 + 2 / 3) / 7)
+
+
+def test_vote_text_weights_by_confidence():
+    text, _ = vote_text([('皖A12345', 0.95), ('皖B12345', 0.3), ('皖B12345', 0.3)])
+    assert text == '皖A12345'
+
+
+def test_vote_text_ignores_minority_length():
+    text, conf = vote_text([('皖A12345', 0.8), ('皖A1234', 0.9), ('皖A12345', 0.8)])
+    assert text == '皖A12345'
+    assert conf == pytest.approx(0.8)
+
+
+def test_add_read_skips_failed_reads():
+    track = PlateTrack(1, [0, 0, 10, 10], 1)
+    track.add_read('无法识别', 0.0, 1)
+    assert track.text is None and track.ocr_attempts == 1
+    track.add_read('皖A12345', 0.7, 2)
+    track.add_read('', 0.0, 3)
+    assert (track.text, track.conf) == ('皖A12345', pytest.approx(0.7))
+    assert track.last_ocr_frame == 3 and track.ocr_attempts == 3
+
+
+def test_tracker_keeps_id_and_reocr_schedule():
+    tracker = PlateTracker(iou_threshold=0.3, max_age=2, ocr_conf=0.9, reocr_interval=3, max_reads=3)
+    track = tracker.update([[100, 100, 200, 140]])[0]
+    assert tracker.needs_ocr(track)
+    track.add_read('皖A12345', 0.5, tracker.frame_index)
+
+    # 匀速移动的框关联到同一跟踪
+    for step in range(1, 3):
+        assert tracker.update([[100 + 5 * step, 100, 200 + 5 * step, 140]])[0] is track
+        assert not tracker.needs_ocr(track)
+    tracker.update([[115, 100, 215, 140]])
+    assert tracker.needs_ocr(track)
+
+    # 达到最多识别次数后不再识别
+    track.add_read('皖A12345', 0.5, tracker.frame_index)
+    for _ in range(3):
+        tracker.update([[115, 100, 215, 140]])
+    assert tracker.needs_ocr(track)
+    track.add_read('皖A12345', 0.5, tracker.frame_index)
+    for _ in range(3):
+        tracker.update([[115, 100, 215, 140]])
+    assert not tracker.needs_ocr(track)
+
+
+def test_tracker_stops_reocr_when_confident():
+    tracker = PlateTracker(ocr_conf=0.9, reocr_interval=1)
+    track = tracker.update([[0, 0, 50, 20]])[0]
+    track.add_read('皖A12345', 0.95, tracker.frame_index)
+    tracker.update([[0, 0, 50, 20]])
+    assert not tracker.needs_ocr(track)
+
+
+def test_tracker_drops_stale_tracks():
+    tracker = PlateTracker(max_age=1)
+    first = tracker.update([[0, 0, 50, 20]])[0]
+    tracker.update([])
+    tracker.update([])
+    second = tracker.update([[0, 0, 50, 20]])[0]
+    assert second is not first and second.track_id == first.track_id + 1